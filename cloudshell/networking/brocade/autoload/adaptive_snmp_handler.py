@@ -0,0 +1,307 @@
+import math
+import time
+
+from pyasn1.type.univ import Null
+from pysnmp.error import PySnmpError
+from pysnmp.proto import errind
+from pysnmp.proto.rfc1902 import ObjectName
+from pysnmp.smi.rfc1902 import ObjectIdentity
+from cloudshell.snmp.quali_snmp import QualiMibTable
+from cloudshell.networking.brocade.local_storage import get_storage_path, load_json, save_json
+from cloudshell.networking.brocade.autoload.snmp_rate_limiter import get_device_rate_limiter, SnmpRateLimiter
+from cloudshell.networking.brocade.resource_drivers_map import BROCADE_SNMP_PROFILES
+
+# walk sends many PDUs, single slow response shouldn't abort it, same as QualiSnmp default timeout
+WALK_MIN_TIMEOUT = 1.0
+# rows per GETBULK PDU sent by walk
+WALK_MAX_REPETITIONS = 10
+
+
+class SnmpRttEstimator(object):
+    ALPHA = 0.125
+    BETA = 0.25
+    K = 4
+
+    def __init__(self, srtt=None, rttvar=None, min_timeout=0.2, max_timeout=10.0, default_timeout=1.0):
+        """Smoothed round trip time estimator, same as TCP retransmission timer (RFC 6298)
+
+        :param srtt: smoothed round trip time in seconds, None if there are no samples yet
+        :param rttvar: round trip time variation in seconds
+        :param min_timeout: lower bound for calculated timeout
+        :param max_timeout: upper bound for calculated timeout
+        :param default_timeout: timeout used until first sample
+        """
+
+        self.srtt = srtt
+        self.rttvar = rttvar
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_timeout = default_timeout
+
+    def add_sample(self, rtt):
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2.0
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+
+    @property
+    def timeout(self):
+        if self.srtt is None:
+            return self.default_timeout
+        return min(max(self.srtt + self.K * self.rttvar, self.min_timeout), self.max_timeout)
+
+    def backoff_timeout(self, attempt):
+        """Timeout for provided retry attempt, doubled on every attempt
+
+        :param attempt: retry attempt, 0 for first request
+        """
+
+        return min(self.timeout * (2 ** attempt), self.max_timeout)
+
+    def to_dict(self):
+        return {'srtt': self.srtt, 'rttvar': self.rttvar}
+
+    @classmethod
+    def load(cls, device_key, **kwargs):
+        if device_key is None:
+            return cls(**kwargs)
+        data = load_json(get_storage_path('snmp_rtt', device_key), default={})
+        return cls(srtt=data.get('srtt'), rttvar=data.get('rttvar'), **kwargs)
+
+    def save(self, device_key):
+        if self.srtt is not None and device_key is not None:
+            save_json(get_storage_path('snmp_rtt', device_key), self.to_dict())
+
+
+class AdaptiveSnmpHandler(object):
+    def __init__(self, snmp_handler, logger, retries=3, transport_retries=1):
+        """Wrap QualiSnmp, derive request timeouts and retry backoff from observed round trip time of the device,
+        pace all requests with per device token bucket
+
+        :param snmp_handler: QualiSnmp object
+        :param logger: logger
+        :param retries: number of retries with doubled timeout after request timed out
+        :param transport_retries: pysnmp retransmissions per single attempt
+        """
+
+        self._snmp = snmp_handler
+        self._logger = logger
+        self.retries = retries
+        self.transport_retries = transport_retries
+        self.is_shared_engine = False
+        self.device_key = self._get_device_key()
+        self.rtt_estimator = SnmpRttEstimator.load(self.device_key)
+        if self.device_key is None:
+            # unknown device doesn't share limiter and statistics with other devices
+            self._logger.debug('SNMP target address is unknown, rate limit and round trip time are not shared')
+            self.rate_limiter = SnmpRateLimiter(**self._get_rate_profile('default'))
+        else:
+            self.rate_limiter = get_device_rate_limiter(self.device_key, **self._get_rate_profile('default'))
+
+    def __getattr__(self, item):
+        return getattr(self._snmp, item)
+
+    def _get_device_key(self):
+        """Device 'host:port' from snmp target, None if target address is unknown"""
+
+        target = getattr(self._snmp, 'target', None)
+        transport_address = getattr(target, 'transportAddr', None)
+        if transport_address and transport_address[0]:
+            if len(transport_address) > 1 and transport_address[1]:
+                return '{0}:{1}'.format(transport_address[0], transport_address[1])
+            return str(transport_address[0])
+        return None
+
+    @staticmethod
+    def _get_rate_profile(model):
+        profile = BROCADE_SNMP_PROFILES.get(model, BROCADE_SNMP_PROFILES['default'])
+        return {key: profile[key] for key in ('pdu_rate', 'burst', 'max_outstanding') if key in profile}
+
+    def apply_profile(self, model):
+        """Tune rate limiter with model specific SNMP profile from BROCADE_SNMP_PROFILES
+
+        :param model: model name, i.e. 'VDX_6740'
+        """
+
+        self.rate_limiter.configure(**self._get_rate_profile(model))
+
+    def _set_target_timeout(self, timeout):
+        target = getattr(self._snmp, 'target', None)
+        if target is not None:
+            # pysnmp engine caches target configuration per timeout value, keep number of distinct values small
+            target.timeout = math.ceil(timeout * 10) / 10.0
+            target.retries = self.transport_retries
+
+    @staticmethod
+    def _is_timeout(error):
+        """Request failed because device didn't respond, QualiSnmp raises PySnmpError(error indication)"""
+
+        return isinstance(error, PySnmpError) and any(isinstance(arg, errind.RequestTimedOut) for arg in error.args)
+
+    def _call(self, method, args, min_timeout=None):
+        """Execute single PDU snmp request, add round trip time sample, retry with exponential backoff on timeout
+
+        :param method: request method
+        :param args: request method arguments
+        :param min_timeout: lower bound for request timeout
+        """
+
+        attempt = 0
+        while True:
+            timeout = max(self.rtt_estimator.backoff_timeout(attempt), min_timeout or 0)
+            self._set_target_timeout(timeout)
+            self.rate_limiter.acquire()
+            start_time = time.time()
+            try:
+                result = method(*args)
+            except Exception as e:
+                self.rate_limiter.release()
+                if not self._is_timeout(e) or attempt >= self.retries:
+                    raise
+                attempt += 1
+                self._logger.debug('SNMP request timed out after {0:.2f}s, retry {1} of {2}'.format(
+                    timeout, attempt, self.retries))
+                continue
+            elapsed = time.time() - start_time
+            self.rate_limiter.release()
+            # Karn's algorithm: responses which could belong to retransmission are not sampled
+            if attempt == 0 and elapsed < timeout:
+                self.rtt_estimator.add_sample(elapsed)
+            return result
+
+    def get(self, *oids):
+        return self._call(self._snmp.get, oids)
+
+    def _get_next_rows(self, columns, start_oids, max_repetitions):
+        """Send single GETBULK PDU (GETNEXT for SNMPv1) for provided columns
+
+        :return: tuple (rows inside walked columns, True if end of columns is reached)
+        """
+
+        security = self._snmp.security
+        if getattr(security, 'mpModel', 1) == 0:
+            error_indication, error_status, error_index, var_bind_table = self._snmp.cmd_gen.nextCmd(
+                security, self._snmp.target, *start_oids, lexicographicMode=True, maxCalls=1)
+        else:
+            error_indication, error_status, error_index, var_bind_table = self._snmp.cmd_gen.bulkCmd(
+                security, self._snmp.target, 0, max_repetitions, *start_oids, lexicographicMode=True, maxCalls=1)
+        if error_indication:
+            raise PySnmpError(error_indication)
+        if error_status:
+            raise PySnmpError(error_status)
+        rows = []
+        for row in var_bind_table:
+            if len(row) != len(columns) or any(isinstance(value, Null) or not column.isPrefixOf(name)
+                                               for column, (name, value) in zip(columns, row)):
+                return rows, True
+            rows.append(row)
+        return rows, not rows
+
+    def _walk_columns(self, columns, max_repetitions=WALK_MAX_REPETITIONS):
+        """Walk columns in parallel PDU by PDU, every PDU is paced by rate limiter and retried separately
+
+        :param columns: list of ObjectName
+        :return: list of rows, every row is a list of (oid, value) pairs
+        """
+
+        rows = []
+        start_oids = list(columns)
+        while True:
+            next_rows, is_end = self._call(self._get_next_rows, (columns, start_oids, max_repetitions),
+                                           min_timeout=WALK_MIN_TIMEOUT)
+            rows.extend(next_rows)
+            if is_end:
+                return rows
+            start_oids = [name for name, value in next_rows[-1]]
+
+    def walk(self, oid, *indexes):
+        """Same as QualiSnmp.walk, but table is read PDU by PDU through rate limiter and adaptive timeout
+
+        :param oid: table or column, i.e. ('IF-MIB', 'ifTable')
+        :rtype: QualiMibTable
+        """
+
+        column = ObjectIdentity(*oid).resolveWithMib(self._snmp.mib_viewer).getOid()
+        result = QualiMibTable(oid[1])
+        for row in self._walk_columns([column]):
+            name, value = row[0]
+            mib_module, mib_name, suffix = self._snmp.mib_viewer.getNodeLocation(name)
+            # same index types as QualiSnmp.walk
+            if str(suffix).isdigit():
+                index = int(str(suffix))
+            elif str(suffix).replace('.', '', 1).isdigit():
+                index = float(str(suffix))
+            else:
+                index = str(suffix)
+            if not result.get(index):
+                result[index] = {'suffix': str(suffix)}
+            result[index][mib_name] = value.prettyPrint()
+        if indexes:
+            result = result.get_rows(*indexes)
+        return result
+
+    def get_table(self, snmp_module_name, table_name):
+        """Same as QualiSnmp.get_table, but table is walked with retries and backoff,
+        empty table is returned only when all retries failed
+
+        :rtype: QualiMibTable
+        """
+
+        try:
+            return self.walk((snmp_module_name, table_name))
+        except Exception as e:
+            self._logger.error('Failed to load snmp table {0}::{1}: {2}'.format(snmp_module_name, table_name, e))
+            return QualiMibTable(table_name)
+
+    def bulk_walk(self, oids, max_repetitions=25):
+        """Walk provided columns in parallel with GETBULK
+
+        :param oids: list of numeric column oids, i.e. ['1.3.6.1.2.1.31.1.1.1.6', ...]
+        :param max_repetitions: rows per GETBULK response
+        :return: list of rows, every row is a list of (oid, value) pairs
+        """
+
+        return self._walk_columns([ObjectName(oid.strip('.')) for oid in oids], max_repetitions)
+
+    def get_property(self, snmp_module_name, property_name, index, return_type='str'):
+        """Same as QualiSnmp.get_property, but request goes through adaptive timeout"""
+
+        ret_value = 0 if return_type == 'int' else ''
+        if isinstance(index, basestring):
+            # same as QualiSnmp: '1.2' index is two sub identifiers
+            index = tuple(index.split('.'))
+        elif not isinstance(index, tuple):
+            index = (index,)
+        try:
+            value = self.get((snmp_module_name, property_name) + index)[property_name]
+            ret_value = int(value) if return_type == 'int' else value.strip(' \t\n\r')
+        except Exception as e:
+            self._logger.debug('Failed to get {0}::{1}.{2}: {3}'.format(snmp_module_name, property_name, index, e))
+        return ret_value
+
+    def get_properties(self, snmp_module_name, index, properties):
+        """Same as QualiSnmp.get_properties
+
+        :param properties: dict {property name: return type}
+        :return: dict {index: {property name: value}}
+        """
+
+        result = {index: {}}
+        for property_name, return_type in properties.iteritems():
+            result[index][property_name] = self.get_property(snmp_module_name, property_name, index, return_type)
+        return result
+
+    def save_statistics(self):
+        """Persist learned round trip time for the next discovery of the same device,
+        nothing is persisted if device address is unknown"""
+
+        if self.device_key is None:
+            return
+        try:
+            self.rtt_estimator.save(self.device_key)
+        except (IOError, OSError) as e:
+            self._logger.debug('Failed to save SNMP round trip time: {0}'.format(e))
+        self._logger.debug('SNMP round trip time for {0}: srtt {1}, timeout {2:.2f}s'.format(
+            self.device_key, self.rtt_estimator.srtt, self.rtt_estimator.timeout))
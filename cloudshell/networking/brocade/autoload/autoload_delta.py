@@ -0,0 +1,98 @@
+from cloudshell.networking.brocade.local_storage import get_storage_path, load_json, save_json
+
+
+def autoload_details_to_dict(autoload_details):
+    """Convert AutoLoadDetails to json serializable snapshot
+
+    :param autoload_details: AutoLoadDetails object
+    :return: dict {'resources': {relative address: {...}}, 'attributes': {relative address: {name: value}}}
+    """
+
+    resources = {}
+    for resource in autoload_details.resources:
+        resources[resource.relative_address] = {'model': resource.model, 'name': resource.name,
+                                                'unique_identifier': resource.unique_identifier}
+    attributes = {}
+    for attribute in autoload_details.attributes:
+        attributes.setdefault(attribute.relative_address, {})[attribute.attribute_name] = \
+            attribute.attribute_value
+    return {'resources': resources, 'attributes': attributes}
+
+
+class AutoloadDelta(object):
+    def __init__(self, full_result=None):
+        """Difference between two autoload results of the same device
+
+        added and changed items keep AutoLoadResource/AutoLoadAttribute objects from the new result,
+        removed resources are relative addresses, removed attributes are (relative address, attribute name) tuples
+        """
+
+        self.is_first_discovery = False
+        self.added_resources = []
+        self.changed_resources = []
+        self.removed_resources = []
+        self.added_attributes = []
+        self.changed_attributes = []
+        self.removed_attributes = []
+        self.full_result = full_result
+
+    @property
+    def is_empty(self):
+        return not (self.added_resources or self.changed_resources or self.removed_resources or
+                    self.added_attributes or self.changed_attributes or self.removed_attributes)
+
+    def __str__(self):
+        return 'resources +{0} ~{1} -{2}, attributes +{3} ~{4} -{5}'.format(
+            len(self.added_resources), len(self.changed_resources), len(self.removed_resources),
+            len(self.added_attributes), len(self.changed_attributes), len(self.removed_attributes))
+
+
+def get_autoload_delta(previous, autoload_details, return_full_result=False):
+    """Compare autoload result with the previous snapshot
+
+    :param previous: snapshot from autoload_details_to_dict or None
+    :param autoload_details: new AutoLoadDetails
+    :param return_full_result: keep new AutoLoadDetails in delta
+    :rtype: AutoloadDelta
+    """
+
+    delta = AutoloadDelta(autoload_details if return_full_result else None)
+    if previous is None:
+        delta.is_first_discovery = True
+        previous = {'resources': {}, 'attributes': {}}
+    previous_resources = previous.get('resources', {})
+    previous_attributes = previous.get('attributes', {})
+
+    current_addresses = set()
+    for resource in autoload_details.resources:
+        current_addresses.add(resource.relative_address)
+        old_resource = previous_resources.get(resource.relative_address)
+        if old_resource is None:
+            delta.added_resources.append(resource)
+        elif (old_resource['model'], old_resource['name'], old_resource['unique_identifier']) != \
+                (resource.model, resource.name, resource.unique_identifier):
+            delta.changed_resources.append(resource)
+    delta.removed_resources = sorted(set(previous_resources.keys()) - current_addresses)
+
+    current_attributes = set()
+    for attribute in autoload_details.attributes:
+        key = (attribute.relative_address, attribute.attribute_name)
+        current_attributes.add(key)
+        old_attributes = previous_attributes.get(attribute.relative_address, {})
+        if attribute.attribute_name not in old_attributes:
+            delta.added_attributes.append(attribute)
+        elif old_attributes[attribute.attribute_name] != attribute.attribute_value:
+            delta.changed_attributes.append(attribute)
+    for relative_address, attributes in previous_attributes.iteritems():
+        for attribute_name in attributes:
+            if (relative_address, attribute_name) not in current_attributes:
+                delta.removed_attributes.append((relative_address, attribute_name))
+    return delta
+
+
+def load_autoload_snapshot(device_key):
+    return load_json(get_storage_path('autoload_result', device_key))
+
+
+def save_autoload_snapshot(device_key, autoload_details):
+    save_json(get_storage_path('autoload_result', device_key), autoload_details_to_dict(autoload_details))
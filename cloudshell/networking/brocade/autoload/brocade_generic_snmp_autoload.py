@@ -1,43 +1,155 @@
 import re
-import os
+import threading
+from contextlib import contextmanager
 
 import inject
 from cloudshell.networking.operations.interfaces.autoload_operations_interface import AutoloadOperationsInterface
 
-from cloudshell.shell.core.driver_context import AutoLoadDetails
+from cloudshell.shell.core.driver_context import AutoLoadDetails, AutoLoadAttribute
 from cloudshell.snmp.quali_snmp import QualiMibTable
 from cloudshell.networking.autoload.networking_autoload_resource_structure import Port, PortChannel, PowerPort, \
     Chassis, Module
 from cloudshell.networking.autoload.networking_autoload_resource_attributes import NetworkingStandardRootAttributes
-from cloudshell.networking.brocade.resource_drivers_map import BROCADE_RESOURCE_DRIVERS_MAP
+from cloudshell.networking.brocade.resource_drivers_map import BROCADE_RESOURCE_DRIVERS_MAP, BROCADE_SNMP_PROFILES
+from cloudshell.networking.brocade.autoload.snmp_request_batch import SnmpPropertyBatch
+from cloudshell.networking.brocade.autoload.adaptive_snmp_handler import AdaptiveSnmpHandler
+from cloudshell.networking.brocade.autoload.shared_snmp_engine import attach_shared_engine, BROCADE_MIB_PATH
+from cloudshell.networking.brocade.autoload.autoload_delta import get_autoload_delta, load_autoload_snapshot, \
+    save_autoload_snapshot
+from cloudshell.networking.brocade.autoload.brocade_optics_autoload import BrocadeOpticsAutoload, OPTICS_DETAILS
+
+
+def _format_ipv6(octets):
+    """Build compressed IPv6 address string from list of 16 octets"""
+
+    groups = ['{0:x}'.format((octets[i] << 8) | octets[i + 1]) for i in range(0, 16, 2)]
+    best_start, best_len, start = -1, 1, None
+    for i, group in enumerate(groups + ['end']):
+        if group == '0':
+            start = i if start is None else start
+        elif start is not None:
+            if i - start > best_len:
+                best_start, best_len = start, i - start
+            start = None
+    if best_start == -1:
+        return ':'.join(groups)
+    return ':'.join(groups[:best_start]) + '::' + ':'.join(groups[best_start + best_len:])
+
+
+# ipAddressAddrType: (address family, address length, InetAddress length including zone index)
+INET_ADDRESS_TYPES = {1: ('ipv4', 4, 4), 2: ('ipv6', 16, 16), 3: ('ipv4', 4, 8), 4: ('ipv6', 16, 20)}
+
+
+def _parse_inet_address(index):
+    """Parse ipAddressTable index (InetAddressType.InetAddress) into address string,
+    InetAddress is prefixed with its length unless agent encodes index as IMPLIED
+
+    :param index: table row suffix, i.e. '1.4.10.0.0.1'
+    :return: tuple (address family 'ipv4' or 'ipv6', address) or None
+    """
+
+    parts = str(index).split('.')
+    if not all(part.isdigit() for part in parts) or len(parts) < 5:
+        return None
+    parts = [int(part) for part in parts]
+    address_type, octets = parts[0], parts[1:]
+    if address_type not in INET_ADDRESS_TYPES:
+        return None
+    family, address_length, expected_length = INET_ADDRESS_TYPES[address_type]
+    if len(octets) == expected_length + 1 and octets[0] == expected_length:
+        octets = octets[1:]
+    elif len(octets) != expected_length:
+        return None
+    if family == 'ipv4':
+        return family, '.'.join(str(octet) for octet in octets[:address_length])
+    return family, _format_ipv6(octets[:address_length])
+
+
+class _DiscoveryState(object):
+    def __init__(self, snmp_handler=None):
+        """Working state of a single discover() call
+
+        :param snmp_handler: QualiSnmp object for discovered device, None to use injected one
+        """
+
+        self.snmp = None
+        self.raw_snmp = snmp_handler
+        self.exclusion_list = []
+        self.excluded_models = []
+        self.module_list = []
+        self.chassis_list = []
+        self.port_list = []
+        self.power_supply_list = []
+        self.relative_path = {}
+        self.port_mapping = None
+        self.if_descr_mapping = {}
+        self.snmp_max_var_binds = BROCADE_SNMP_PROFILES['default']['max_var_binds']
+        self.resources = list()
+        self.attributes = list()
+        self.if_table = None
+        self.entity_table = None
+        self.lldp_local_table = None
+        self.lldp_remote_table = None
+        self.cdp_index_table = None
+        self.cdp_table = None
+        self.duplex_table = None
+        self.ip_address_index = {}
+        self.port_channel_ports = None
+
+
+def _state_property(name):
+    """Instance attribute stored in the discovery state of the current thread"""
+
+    return property(lambda self: getattr(self._state, name),
+                    lambda self, value: setattr(self._state, name, value))
 
 
 class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
-    def __init__(self, snmp_handler=None, logger=None, supported_os=None):
-        """Basic init with injected snmp handler and logger
+    exclusion_list = _state_property('exclusion_list')
+    _excluded_models = _state_property('excluded_models')
+    module_list = _state_property('module_list')
+    chassis_list = _state_property('chassis_list')
+    port_list = _state_property('port_list')
+    power_supply_list = _state_property('power_supply_list')
+    relative_path = _state_property('relative_path')
+    port_mapping = _state_property('port_mapping')
+    if_descr_mapping = _state_property('if_descr_mapping')
+    snmp_max_var_binds = _state_property('snmp_max_var_binds')
+    resources = _state_property('resources')
+    attributes = _state_property('attributes')
+    if_table = _state_property('if_table')
+    entity_table = _state_property('entity_table')
+    lldp_local_table = _state_property('lldp_local_table')
+    lldp_remote_table = _state_property('lldp_remote_table')
+    cdp_index_table = _state_property('cdp_index_table')
+    cdp_table = _state_property('cdp_table')
+    duplex_table = _state_property('duplex_table')
+    ip_address_index = _state_property('ip_address_index')
+    port_channel_ports = _state_property('port_channel_ports')
+
+    def __init__(self, snmp_handler=None, logger=None, supported_os=None, load_optics=False,
+                 optics_attribute_names=None):
+        """Basic init with injected snmp handler and logger,
+        discovery working state is kept per discover() call, so instance could be reused and shared between threads
 
         :param snmp_handler:
         :param logger:
+        :param load_optics: collect transceiver inventory and DOM readings as port attributes
+        :param optics_attribute_names: dict {transceiver detail: port attribute name} for attributes defined
+            in the shell datamodel, details without attribute are only logged
         :return:
         """
 
         self._snmp = snmp_handler
         self._logger = logger
-        self.exclusion_list = []
-        self._excluded_models = []
-        self.module_list = []
-        self.chassis_list = []
+        self._local = threading.local()
         self.supported_os = supported_os
-        self.port_list = []
-        self.power_supply_list = []
-        self.relative_path = {}
-        self.port_mapping = {}
         self.entity_table_black_list = ['alarm', 'fan', 'sensor', 'other']
         self.port_exclude_pattern = 'serial|stack|engine|management|vlan|other|softwareLoopback|tunnel|fibreChannel|' \
                                     'eth[0-9]'
         self.module_exclude_pattern = 'cevsfp'
-        self.resources = list()
-        self.attributes = list()
+        self.load_optics = load_optics
+        self.optics_attribute_names = optics_attribute_names or {}
 
     @property
     def logger(self):
@@ -48,22 +160,59 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
                 raise Exception('BrocadeAutoload', 'Logger is none or empty')
         return self._logger
 
+    @property
+    def _state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = self._local.state = _DiscoveryState(self._snmp)
+        return state
+
+    @contextmanager
+    def _discovery_state(self, snmp_handler=None):
+        """Create fresh working state for discovery running in current thread"""
+
+        self._local.state = _DiscoveryState(snmp_handler or self._snmp)
+        try:
+            yield self._local.state
+        finally:
+            self._local.state = None
+
     @property
     def snmp(self):
-        if self._snmp is None:
-            try:
-                self._snmp = inject.instance('snmp_handler')
-            except:
-                raise Exception('BrocadeAutoload', 'Snmp handler is none or empty')
-        return self._snmp
+        state = self._state
+        if state.snmp is None:
+            snmp_handler = state.raw_snmp
+            if snmp_handler is None:
+                try:
+                    snmp_handler = inject.instance('snmp_handler')
+                except:
+                    raise Exception('BrocadeAutoload', 'Snmp handler is none or empty')
+            if isinstance(snmp_handler, AdaptiveSnmpHandler):
+                state.snmp = snmp_handler
+            else:
+                shared_handler = attach_shared_engine(snmp_handler, self.logger)
+                state.snmp = AdaptiveSnmpHandler(shared_handler or snmp_handler, self.logger)
+                state.snmp.is_shared_engine = shared_handler is not None
+        return state.snmp
 
     def load_brocade_mib(self):
-        path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'mibs'))
-        self.snmp.update_mib_sources(path)
+        # shared engine has brocade MIBs registered once on creation
+        if not getattr(self.snmp, 'is_shared_engine', False):
+            self.snmp.update_mib_sources(BROCADE_MIB_PATH)
 
-    def discover(self):
+    def discover(self, snmp_handler=None):
         """Load device structure and attributes: chassis, modules, submodules, ports, port-channels and power supplies
 
+        :param snmp_handler: optional QualiSnmp object of the device, overrides handler provided on init
+        :return: AutoLoadDetails object
+        """
+
+        with self._discovery_state(snmp_handler):
+            return self._discover()
+
+    def _discover(self):
+        """Discover device using working state of current discovery
+
         :return: AutoLoadDetails object
         """
 
@@ -79,6 +228,7 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
 
         if len(self.chassis_list) < 1:
             self.logger.error('Entity table error, no chassis found')
+            self.snmp.save_statistics()
             return AutoLoadDetails(list(), list())
 
         for chassis in self.chassis_list:
@@ -105,6 +255,7 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         self._get_port_channels()
 
         result = AutoLoadDetails(resources=self.resources, attributes=self.attributes)
+        self.snmp.save_statistics()
 
         self.logger.info('*******************************************')
         self.logger.info('Discover completed. The following Structure have been loaded:' +
@@ -122,6 +273,28 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         self.logger.info('SNMP discovery Completed')
         return result
 
+    def discover_delta(self, return_full_result=False, snmp_handler=None):
+        """Discover device and compare result with the previous one stored locally for the same device
+
+        :param return_full_result: keep full AutoLoadDetails in delta.full_result
+        :param snmp_handler: optional QualiSnmp object of the device, overrides handler provided on init
+        :return: AutoloadDelta object with added, changed and removed resources and attributes
+        """
+
+        with self._discovery_state(snmp_handler):
+            result = self._discover()
+            device_key = self.snmp.device_key
+        if device_key is None:
+            self.logger.warning('SNMP target address is unknown, autoload result is compared with empty snapshot')
+            previous = None
+        else:
+            previous = load_autoload_snapshot(device_key)
+        delta = get_autoload_delta(previous, result, return_full_result)
+        if result.resources and device_key is not None:
+            save_autoload_snapshot(device_key, result)
+        self.logger.info('Autoload delta: {0}'.format(delta))
+        return delta
+
     def _is_valid_device_os(self):
         """Validate device OS using snmp
         :return: True or False
@@ -165,8 +338,7 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         self.cdp_index_table = self.snmp.get_table('BROCADE-CDP-MIB', 'cdpInterface')
         self.cdp_table = self.snmp.get_table('BROCADE-CDP-MIB', 'cdpCacheTable')
         self.duplex_table = self.snmp.get_table('EtherLike-MIB', 'dot3StatsIndex')
-        self.ip_v4_table = self.snmp.get_table('IP-MIB', 'ipAddrTable')
-        self.ip_v6_table = self.snmp.get_table('IPV6-MIB', 'ipv6AddrEntry')
+        self.ip_address_index = self._load_ip_addresses()
         self.port_channel_ports = self.snmp.get_table('IEEE8023-LAG-MIB', 'dot3adAggPortAttachedAggID')
 
         self.logger.info('MIB Tables loaded successfully')
@@ -286,6 +458,14 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
             else:
                 self.port_list.remove(port)
 
+    def _get_property_batch(self):
+        """Create batch which coalesces get_property requests of one autoload phase into multi-varbind GETs
+
+        :rtype: SnmpPropertyBatch
+        """
+
+        return SnmpPropertyBatch(self.snmp, self.logger, max_var_binds=self.snmp_max_var_binds)
+
     def _add_resource(self, resource):
         """Add object data to resources and attributes lists
 
@@ -373,12 +553,18 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         """
 
         self.logger.info('Start loading Chassis')
+        batch = self._get_property_batch()
+        chassis_requests = {}
         for chassis in chassis_list:
-            chassis_id = self.relative_path[chassis]
-            chassis_details_map = {
-                'chassis_model': self.snmp.get_property('ENTITY-MIB', 'entPhysicalModelName', chassis),
-                'serial_number': self.snmp.get_property('ENTITY-MIB', 'entPhysicalSerialNum', chassis)
+            chassis_requests[chassis] = {
+                'chassis_model': batch.get_property('ENTITY-MIB', 'entPhysicalModelName', chassis),
+                'serial_number': batch.get_property('ENTITY-MIB', 'entPhysicalSerialNum', chassis)
             }
+        batch.execute()
+
+        for chassis in chassis_list:
+            chassis_id = self.relative_path[chassis]
+            chassis_details_map = {key: request.value for key, request in chassis_requests[chassis].iteritems()}
             if chassis_details_map['chassis_model'] == '':
                 chassis_details_map['chassis_model'] = self.entity_table[chassis]['entPhysicalDescr']
             relative_path = '{0}'.format(chassis_id)
@@ -394,16 +580,22 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         """
 
         self.logger.info('Start loading Modules')
+        batch = self._get_property_batch()
+        module_requests = {}
+        for module in self.module_list:
+            module_requests[module] = {
+                'version': batch.get_property('ENTITY-MIB', 'entPhysicalSoftwareRev', module),
+                'serial_number': batch.get_property('ENTITY-MIB', 'entPhysicalSerialNum', module)
+            }
+        batch.execute()
+
         for module in self.module_list:
             module_id = self.relative_path[module]
             module_index = self._get_resource_id(module)
             # Change Brocade Module Name to be -1
             module_index = str(int(module_index) - 1)
-            module_details_map = {
-                'module_model': self.entity_table[module]['entPhysicalDescr'],
-                'version': self.snmp.get_property('ENTITY-MIB', 'entPhysicalSoftwareRev', module),
-                'serial_number': self.snmp.get_property('ENTITY-MIB', 'entPhysicalSerialNum', module)
-            }
+            module_details_map = {key: request.value for key, request in module_requests[module].iteritems()}
+            module_details_map['module_model'] = self.entity_table[module]['entPhysicalDescr']
 
             if '/' in module_id and len(module_id.split('/')) < 3:
                 module_name = 'Module {0}'.format(module_index)
@@ -424,6 +616,17 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         """
 
         self.logger.info('Start loading Power Ports')
+        batch = self._get_property_batch()
+        port_requests = {}
+        for port in self.power_supply_list:
+            port_requests[port] = {
+                'port_model': batch.get_property('ENTITY-MIB', 'entPhysicalModelName', port),
+                'description': batch.get_property('ENTITY-MIB', 'entPhysicalDescr', port, 'str'),
+                'version': batch.get_property('ENTITY-MIB', 'entPhysicalHardwareRev', port),
+                'serial_number': batch.get_property('ENTITY-MIB', 'entPhysicalSerialNum', port)
+            }
+        batch.execute()
+
         for port in self.power_supply_list:
             port_id = self.entity_table[port]['entPhysicalParentRelPos']
             parent_index = int(self.entity_table[port]['entPhysicalContainedIn'])
@@ -431,11 +634,7 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
             chassis_id = self.get_relative_path(parent_index)
             relative_path = '{0}/PP{1}-{2}'.format(chassis_id, parent_id, port_id)
             port_name = 'PP{0}'.format(self.power_supply_list.index(port))
-            port_details = {'port_model': self.snmp.get_property('ENTITY-MIB', 'entPhysicalModelName', port, ),
-                            'description': self.snmp.get_property('ENTITY-MIB', 'entPhysicalDescr', port, 'str'),
-                            'version': self.snmp.get_property('ENTITY-MIB', 'entPhysicalHardwareRev', port),
-                            'serial_number': self.snmp.get_property('ENTITY-MIB', 'entPhysicalSerialNum', port)
-                            }
+            port_details = {key: request.value for key, request in port_requests[port].iteritems()}
             power_port_object = PowerPort(name=port_name, relative_path=relative_path, **port_details)
             self._add_resource(power_port_object)
 
@@ -489,6 +688,9 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         """
 
         self.logger.info('Start loading Ports')
+        optics_details = {}
+        if self.load_optics:
+            optics_details = BrocadeOpticsAutoload(self.snmp, self.logger).discover(self._get_mapping)
         for port in self.port_list:
             interface_name = port['ifDescr']
             # Add Chassis to Interface name
@@ -512,13 +714,35 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
                              #'adjacent': self._get_adjacent(self.port_mapping[port])
                              }
             attribute_map.update(self._get_interface_details(port))
-            attribute_map.update(self._get_ip_interface_details(port))
+            attribute_map.update(self._get_ip_interface_details(port['suffix']))
             port_object = Port(name=interface_name, relative_path=self.relative_path[int(port['suffix'])],
                                **attribute_map)
             self._add_resource(port_object)
+            if int(port['suffix']) in optics_details:
+                self._add_optics_attributes(self.relative_path[int(port['suffix'])],
+                                            optics_details[int(port['suffix'])])
             self.logger.info('Added ' + interface_name + ' Port')
         self.logger.info('Finished Loading Ports')
 
+    def _add_optics_attributes(self, relative_path, optics):
+        """Add transceiver details to port attributes
+
+        :param relative_path: port relative path
+        :param optics: dict with transceiver details from BrocadeOpticsAutoload
+        """
+
+        not_mapped = []
+        for key in OPTICS_DETAILS:
+            if not optics.get(key):
+                continue
+            attribute_name = self.optics_attribute_names.get(key)
+            if attribute_name:
+                self.attributes.append(AutoLoadAttribute(relative_path, attribute_name, optics[key]))
+            else:
+                not_mapped.append('{0}: {1}'.format(key, optics[key]))
+        if not_mapped:
+            self.logger.info('Transceiver of port {0}: {1}'.format(relative_path, ', '.join(not_mapped)))
+
     def get_relative_path(self, item_id):
         """Build relative path for received item
 
@@ -572,11 +796,47 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
 
         elements = raw_entity_table.filter_by_column('ContainedIn').sort_by_column('ParentRelPos').keys()
         for element in reversed(elements):
-            parent_id = int(self.entity_table[element]['entPhysicalContainedIn'])
+            parent_id = int(raw_entity_table[element]['entPhysicalContainedIn'])
 
             if parent_id not in raw_entity_table or parent_id in self.exclusion_list:
                 self.exclusion_list.append(element)
 
+    def _load_ip_addresses(self):
+        """Load interface addresses with a single walk of address family independent IP-MIB::ipAddressTable,
+        legacy IP-MIB::ipAddrTable and IPV6-MIB::ipv6AddrTable are walked only if device doesn't support it
+
+        :return: dict {ifIndex: {'ipv4': [addresses], 'ipv6': [addresses]}}
+        """
+
+        result = {}
+        try:
+            ip_address_table = self.snmp.get_table('IP-MIB', 'ipAddressIfIndex')
+        except Exception as e:
+            self.logger.error('Failed to load ipAddressTable: {0}'.format(e.message))
+            ip_address_table = {}
+        for key, value in ip_address_table.iteritems():
+            if_index = value.get('ipAddressIfIndex', '')
+            address = _parse_inet_address(value.get('suffix', key))
+            if if_index.isdigit() and address:
+                result.setdefault(int(if_index), {'ipv4': [], 'ipv6': []})[address[0]].append(address[1])
+        if result:
+            return result
+
+        self.logger.info('ipAddressTable is not supported, loading ipAddrTable and ipv6AddrTable')
+        ip_v4_table = self.snmp.get_table('IP-MIB', 'ipAdEntIfIndex')
+        for key, value in ip_v4_table.iteritems():
+            if_index = value.get('ipAdEntIfIndex', '')
+            if if_index.isdigit():
+                address = str(value.get('suffix', key))
+                result.setdefault(int(if_index), {'ipv4': [], 'ipv6': []})['ipv4'].append(address)
+        ip_v6_table = self.snmp.get_table('IPV6-MIB', 'ipv6AddrPfxLength')
+        for key, value in ip_v6_table.iteritems():
+            parts = str(value.get('suffix', key)).split('.')
+            if len(parts) == 17 and all(part.isdigit() for part in parts):
+                address = _format_ipv6([int(part) for part in parts[1:]])
+                result.setdefault(int(parts[0]), {'ipv4': [], 'ipv6': []})['ipv6'].append(address)
+        return result
+
     def _get_ip_interface_details(self, port_index):
         """Get IP address details for provided port
 
@@ -585,16 +845,12 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
         """
 
         interface_details = {'ipv4_address': '', 'ipv6_address': ''}
-        if self.ip_v4_table and len(self.ip_v4_table) > 1:
-            for key, value in self.ip_v4_table.iteritems():
-                if 'ipAdEntIfIndex' in value and int(value['ipAdEntIfIndex']) == port_index:
-                    interface_details['IPv4 Address'] = key
-                break
-        if self.ip_v6_table and len(self.ip_v6_table) > 1:
-            for key, value in self.ip_v6_table.iteritems():
-                if 'ipAdEntIfIndex' in value and int(value['ipAdEntIfIndex']) == port_index:
-                    interface_details['IPv6 Address'] = key
-                break
+        addresses = self.ip_address_index.get(int(port_index))
+        if addresses:
+            if addresses['ipv4']:
+                interface_details['ipv4_address'] = addresses['ipv4'][0]
+            if addresses['ipv6']:
+                interface_details['ipv6_address'] = addresses['ipv6'][0]
         return interface_details
 
     def _get_interface_details(self, port_index):
@@ -679,6 +935,7 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
             model = match_name.groupdict()['model']
             if model in BROCADE_RESOURCE_DRIVERS_MAP:
                 result = BROCADE_RESOURCE_DRIVERS_MAP[model].lower().replace('_', '').capitalize()
+                self._apply_snmp_profile(BROCADE_RESOURCE_DRIVERS_MAP[model])
         if not result or result == '':
             self.snmp.load_mib(['BROCADE-PRODUCTS-MIB', 'BROCADE-ENTITY-VENDORTYPE-OID-MIB'])
             match_name = re.search(r'::(?P<model>\S+$)', self.snmp.get_property('SNMPv2-MIB', 'sysObjectID', '0'))
@@ -686,25 +943,57 @@ class BrocadeGenericSNMPAutoload(AutoloadOperationsInterface):
                 result = match_name.groupdict()['model'].capitalize()
         return result
 
-    def _get_mapping(self, port_index, port_descr):
-        """ Get mapping from entPhysicalTable to ifTable.
-        Build mapping based on ent_alias_mapping_table if exists else build manually based on
-        entPhysicalDescr <-> ifDescr mapping.
+    def _load_port_mapping(self):
+        """Build entPhysicalTable -> ifTable mapping with a single walk of entAliasMappingTable,
+        and a 'module/port' -> ifIndex index from ifDescr used by _get_mapping for devices without alias entries,
+        loaded on the first _get_mapping call, so discovery without optics doesn't walk the table
 
-        :return: simple mapping from entPhysicalTable index to ifTable index:
-        |        {entPhysicalTable index: ifTable index, ...}
         """
 
-        port_id = None
+        self.if_descr_mapping = {}
+        for index, interface in self.if_table.iteritems():
+            match_port = re.search(r'(\d+)/(\d+)$', interface.get('ifDescr', ''))
+            if match_port:
+                self.if_descr_mapping.setdefault('/'.join(match_port.groups()), int(index))
+
+        self.port_mapping = {}
         try:
-            ent_alias_mapping_identifier = self.snmp.get(('IF-MIB', 'entAliasMappingIdentifier', port_index, 0))
-            port_id = int(ent_alias_mapping_identifier['entAliasMappingIdentifier'].split('.')[-1])
+            alias_mapping_table = self.snmp.get_table('ENTITY-MIB', 'entAliasMappingTable')
         except Exception as e:
-            self.logger.error(e.message)
-            module_index, port_index = re.findall('\d+', port_descr)
-            if_table_re = '^.*' + module_index + '/' + port_index + '$'
-            for interface in self.if_table.values():
-                if re.search(if_table_re, interface['ifDescr']):
-                    port_id = int(interface['suffix'])
-                    break
-        return port_id
+            self.logger.error('Failed to load entAliasMappingTable: {0}'.format(e.message))
+            return
+        for key, value in alias_mapping_table.iteritems():
+            if_index = value.get('entAliasMappingIdentifier', '').split('.')[-1]
+            if not if_index.isdigit():
+                continue
+            entity_index = int(str(value.get('suffix', key)).split('.')[0])
+            self.port_mapping.setdefault(entity_index, int(if_index))
+        self.logger.info('Entity alias mapping loaded')
+
+    def _apply_snmp_profile(self, model):
+        """Tune SNMP pacing and GET PDU size for discovered model
+
+        :param model: model name from BROCADE_RESOURCE_DRIVERS_MAP
+        """
+
+        profile = BROCADE_SNMP_PROFILES.get(model, BROCADE_SNMP_PROFILES['default'])
+        self.snmp_max_var_binds = profile.get('max_var_binds', self.snmp_max_var_binds)
+        self.snmp.apply_profile(model)
+        self.logger.info('Applied SNMP profile for {0}: {1}'.format(model, profile))
+
+    def _get_mapping(self, port_index, port_descr=''):
+        """ Get mapping from entPhysicalTable to ifTable.
+        Use mapping from ent_alias_mapping_table, if device has no alias entries match
+        entPhysicalDescr ending with 'module/port' to ifDescr ending with the same 'module/port'.
+
+        :return: ifTable index for provided entPhysicalTable index or None
+        """
+
+        if self.port_mapping is None:
+            self._load_port_mapping()
+        if self.port_mapping:
+            return self.port_mapping.get(port_index)
+        match_port = re.search(r'(\d+)/(\d+)$', port_descr.strip())
+        if match_port:
+            return self.if_descr_mapping.get('/'.join(match_port.groups()))
+        return None
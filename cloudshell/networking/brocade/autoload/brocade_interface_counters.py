@@ -0,0 +1,208 @@
+import time
+from array import array
+from collections import OrderedDict
+
+import inject
+
+from cloudshell.networking.brocade.autoload.adaptive_snmp_handler import AdaptiveSnmpHandler
+
+# counter name: (column oid, counter size in bits)
+INTERFACE_COUNTERS = OrderedDict([
+    ('in_octets', ('1.3.6.1.2.1.31.1.1.1.6', 64)),
+    ('out_octets', ('1.3.6.1.2.1.31.1.1.1.10', 64)),
+    ('in_packets', ('1.3.6.1.2.1.31.1.1.1.7', 64)),
+    ('out_packets', ('1.3.6.1.2.1.31.1.1.1.11', 64)),
+    ('in_errors', ('1.3.6.1.2.1.2.2.1.14', 32)),
+    ('out_errors', ('1.3.6.1.2.1.2.2.1.20', 32)),
+    ('in_discards', ('1.3.6.1.2.1.2.2.1.13', 32)),
+    ('out_discards', ('1.3.6.1.2.1.2.2.1.19', 32)),
+])
+
+SYS_UP_TIME_WRAP = 2 ** 32
+LOW_WORD_MASK = 0xFFFFFFFF
+
+
+class BrocadeInterfaceCountersPoller(object):
+    def __init__(self, snmp_handler=None, logger=None, max_repetitions=25, history_size=60):
+        """Poll ifHC* octet, packet, error and discard counters of all interfaces with GETBULK
+        and calculate per second rates between polls
+
+        Raw counters are kept in flat arrays of 32 bit words (interface position * counter count + counter position),
+        rates history is a ring buffer of doubles, so memory doesn't depend on number of python objects per port.
+
+        :param snmp_handler: QualiSnmp object
+        :param logger: logger
+        :param max_repetitions: rows per GETBULK response
+        :param history_size: number of rate samples kept for every interface counter
+        """
+
+        self._snmp = snmp_handler
+        self._logger = logger
+        self.max_repetitions = max_repetitions
+        self.history_size = history_size
+        self._counter_names = list(INTERFACE_COUNTERS.keys())
+        self._column_oids = [tuple(int(part) for part in oid.split('.')) for oid, bits in INTERFACE_COUNTERS.values()]
+        self._column_positions = {column_oid: position for position, column_oid in enumerate(self._column_oids)}
+        self._counter_wraps = [2 ** bits for oid, bits in INTERFACE_COUNTERS.values()]
+        self._reset()
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            try:
+                self._logger = inject.instance('logger')
+            except:
+                raise Exception('BrocadeInterfaceCounters', 'Logger is none or empty')
+        return self._logger
+
+    @property
+    def snmp(self):
+        if self._snmp is None:
+            try:
+                self._snmp = inject.instance('snmp_handler')
+            except:
+                raise Exception('BrocadeInterfaceCounters', 'Snmp handler is none or empty')
+        if not isinstance(self._snmp, AdaptiveSnmpHandler):
+            self._snmp = AdaptiveSnmpHandler(self._snmp, self.logger)
+        return self._snmp
+
+    def _reset(self):
+        """Drop baseline and history, next poll only stores counters"""
+
+        self._positions = {}
+        self._high_words = array('I')
+        self._low_words = array('I')
+        self._valid = array('b')
+        self._sys_up_time = None
+        self._timestamp = None
+        self._history = array('d')
+        self._history_timestamps = array('d')
+        self._history_index = 0
+        self._history_positions = None
+
+    def _get_sys_up_time(self):
+        """sysUpTime in hundredths of a second"""
+
+        return int(self.snmp.get(('SNMPv2-MIB', 'sysUpTime', 0))['sysUpTime'])
+
+    def _load_counters(self):
+        """Bulk walk all counter columns
+
+        :return: tuple (ifIndex -> position dict, high words array, low words array, valid flags array)
+        """
+
+        counter_count = len(self._column_oids)
+        positions = OrderedDict()
+        high_words, low_words, valid = array('I'), array('I'), array('b')
+        rows = self.snmp.bulk_walk(['.'.join(str(part) for part in oid) for oid in self._column_oids],
+                                   max_repetitions=self.max_repetitions)
+        for row in rows:
+            for oid, value in row:
+                oid = tuple(oid)
+                counter_position = self._column_positions.get(oid[:-1])
+                if counter_position is None:
+                    continue
+                try:
+                    counter = int(value)
+                except (TypeError, ValueError):
+                    continue
+                if_index = oid[-1]
+                if if_index not in positions:
+                    positions[if_index] = len(positions)
+                    high_words.extend([0] * counter_count)
+                    low_words.extend([0] * counter_count)
+                    valid.extend([0] * counter_count)
+                offset = positions[if_index] * counter_count + counter_position
+                high_words[offset] = counter >> 32
+                low_words[offset] = counter & LOW_WORD_MASK
+                valid[offset] = 1
+        return positions, high_words, low_words, valid
+
+    def poll(self):
+        """Poll counters and calculate rates since previous poll
+
+        First poll, and poll after sysUpTime went back (device reload), only store new baseline.
+
+        :return: dict {ifIndex: {counter name: rate per second}}
+        """
+
+        sys_up_time = self._get_sys_up_time()
+        timestamp = time.time()
+        positions, high_words, low_words, valid = self._load_counters()
+
+        result = {}
+        if self._sys_up_time is not None:
+            up_time_delta = sys_up_time - self._sys_up_time
+            if up_time_delta < 0 and self._sys_up_time > SYS_UP_TIME_WRAP - 100 * (timestamp - self._timestamp) * 2:
+                up_time_delta += SYS_UP_TIME_WRAP
+            if up_time_delta < 0:
+                self.logger.info('sysUpTime went back, device was reloaded, counters baseline is reset')
+                self._reset()
+            elif up_time_delta > 0:
+                result = self._calculate_rates(positions, high_words, low_words, valid, up_time_delta / 100.0,
+                                               timestamp)
+
+        self._positions = positions
+        self._high_words, self._low_words, self._valid = high_words, low_words, valid
+        self._sys_up_time = sys_up_time
+        self._timestamp = timestamp
+        return result
+
+    def _calculate_rates(self, positions, high_words, low_words, valid, interval, timestamp):
+        counter_count = len(self._counter_names)
+        rates = array('d', [float('nan')]) * (len(positions) * counter_count)
+        result = {}
+        for if_index, position in positions.iteritems():
+            old_position = self._positions.get(if_index)
+            if old_position is None:
+                continue
+            interface_rates = {}
+            for counter_position, counter_name in enumerate(self._counter_names):
+                offset = position * counter_count + counter_position
+                old_offset = old_position * counter_count + counter_position
+                if not valid[offset] or not self._valid[old_offset]:
+                    continue
+                current = (high_words[offset] << 32) | low_words[offset]
+                previous = (self._high_words[old_offset] << 32) | self._low_words[old_offset]
+                delta = current - previous
+                if delta < 0:
+                    delta += self._counter_wraps[counter_position]
+                rates[offset] = delta / interval
+                interface_rates[counter_name] = rates[offset]
+            result[if_index] = interface_rates
+        self._add_history(positions, rates, timestamp)
+        return result
+
+    def _add_history(self, positions, rates, timestamp):
+        """Store rates in ring buffer, buffer is recreated if set of interfaces changed"""
+
+        if positions != self._history_positions:
+            self._history = array('d', [float('nan')]) * (len(rates) * self.history_size)
+            self._history_timestamps = array('d', [0.0]) * self.history_size
+            self._history_index = 0
+            self._history_positions = positions
+        start = (self._history_index % self.history_size) * len(rates)
+        self._history[start:start + len(rates)] = rates
+        self._history_timestamps[self._history_index % self.history_size] = timestamp
+        self._history_index += 1
+
+    def get_history(self, if_index, counter_name):
+        """Get stored rates of interface counter, oldest first
+
+        :return: list of tuples (timestamp, rate per second)
+        """
+
+        positions = self._history_positions
+        if not positions or if_index not in positions or not self._history_index:
+            return []
+        counter_count = len(self._counter_names)
+        row_size = len(positions) * counter_count
+        offset = positions[if_index] * counter_count + self._counter_names.index(counter_name)
+        count = min(self._history_index, self.history_size)
+        result = []
+        for sample in range(self._history_index - count, self._history_index):
+            slot = sample % self.history_size
+            rate = self._history[slot * row_size + offset]
+            if rate == rate:
+                result.append((self._history_timestamps[slot], rate))
+        return result
@@ -0,0 +1,138 @@
+import math
+import re
+
+SENSOR_SCALE_EXPONENT = {'yocto': -24, 'zepto': -21, 'atto': -18, 'femto': -15, 'pico': -12, 'nano': -9,
+                         'micro': -6, 'milli': -3, 'units': 0, 'kilo': 3, 'mega': 6, 'giga': 9, 'tera': 12,
+                         'exa': 18, 'peta': 15, 'zetta': 21, 'yotta': 24}
+
+# standard Port model has no transceiver attributes, details are mapped only to attributes added to the shell
+# datamodel, i.e. {'model': 'Transceiver Model', 'serial_number': 'Transceiver Serial Number'}
+OPTICS_DETAILS = ('model', 'serial_number', 'rx_power', 'tx_power', 'temperature')
+
+
+def _get_sensor_value(sensor):
+    """Convert entPhySensorValue to float using entPhySensorScale and entPhySensorPrecision
+
+    :param sensor: entPhySensorTable row
+    :rtype: float
+    """
+
+    value = float(sensor['entPhySensorValue'])
+    scale = re.sub(r'\W|\d', '', sensor.get('entPhySensorScale', 'units'))
+    precision = sensor.get('entPhySensorPrecision', '0')
+    precision = int(precision) if precision.lstrip('-').isdigit() else 0
+    return value * (10 ** SENSOR_SCALE_EXPONENT.get(scale, 0)) / (10 ** precision)
+
+
+class BrocadeOpticsAutoload(object):
+    def __init__(self, snmp, logger, transceiver_pattern='cevsfp|sfp|xfp|qsfp|transceiver|optic'):
+        """Collect transceiver inventory and DOM readings with column walks of ENTITY-MIB and ENTITY-SENSOR-MIB
+
+        :param snmp: QualiSnmp object
+        :param logger: logger
+        :param transceiver_pattern: regexp matched against entPhysicalVendorType and entPhysicalDescr
+        """
+
+        self.snmp = snmp
+        self.logger = logger
+        self.transceiver_pattern = transceiver_pattern
+
+    def _get_column(self, snmp_module_name, column_name):
+        """Walk single table column
+
+        :return: dict {entity index: value}
+        """
+
+        try:
+            table = self.snmp.get_table(snmp_module_name, column_name)
+        except Exception as e:
+            self.logger.error('Failed to load {0}::{1}: {2}'.format(snmp_module_name, column_name, e))
+            return {}
+        return {int(key): value[column_name] for key, value in table.iteritems() if column_name in value}
+
+    def discover(self, get_port_index):
+        """Collect transceiver details for every populated port
+
+        :param get_port_index: function(entity index, entity description) -> ifIndex or None, port is skipped
+            if neither transceiver nor any of its entPhysicalContainedIn parents is mapped
+        :return: dict {ifIndex: {'model': '', 'serial_number': '', 'rx_power': '', 'tx_power': '', 'temperature': ''}}
+        """
+
+        self.logger.info('Start loading transceivers')
+        contained_in = self._get_column('ENTITY-MIB', 'entPhysicalContainedIn')
+        vendor_types = self._get_column('ENTITY-MIB', 'entPhysicalVendorType')
+        descriptions = self._get_column('ENTITY-MIB', 'entPhysicalDescr')
+
+        transceivers = {}
+        for index, vendor_type in vendor_types.iteritems():
+            if re.search(self.transceiver_pattern, '{0} {1}'.format(vendor_type, descriptions.get(index, '')),
+                         re.IGNORECASE):
+                port_index = self._find_port_index(index, contained_in, descriptions, get_port_index)
+                if port_index is not None:
+                    transceivers[index] = port_index
+        if not transceivers:
+            self.logger.info('No transceivers found')
+            return {}
+
+        result = {}
+        models = self._get_column('ENTITY-MIB', 'entPhysicalModelName')
+        serials = self._get_column('ENTITY-MIB', 'entPhysicalSerialNum')
+        for index, port_index in transceivers.iteritems():
+            result[port_index] = {'model': models.get(index, '').strip(),
+                                  'serial_number': serials.get(index, '').strip(),
+                                  'rx_power': '', 'tx_power': '', 'temperature': ''}
+
+        self._add_sensor_readings(result, transceivers, contained_in, descriptions)
+        self.logger.info('Loaded {0} transceivers'.format(len(result)))
+        return result
+
+    @staticmethod
+    def _find_port_index(index, contained_in, descriptions, get_port_index):
+        """Find ifIndex of the port for transceiver entity, transceiver itself or any of its parents could be mapped"""
+
+        visited = set()
+        while index and index not in visited:
+            visited.add(index)
+            port_index = get_port_index(index, descriptions.get(index, ''))
+            if port_index is not None:
+                return port_index
+            parent = contained_in.get(index, '')
+            index = int(parent) if parent.isdigit() else None
+        return None
+
+    def _add_sensor_readings(self, result, transceivers, contained_in, descriptions):
+        """Join DOM sensors to transceivers by entPhysicalContainedIn, sensor is classified by type and description"""
+
+        try:
+            sensor_table = self.snmp.get_table('ENTITY-SENSOR-MIB', 'entPhySensorTable')
+        except Exception as e:
+            self.logger.error('Failed to load entPhySensorTable: {0}'.format(e))
+            return
+
+        for key, sensor in sensor_table.iteritems():
+            parent = contained_in.get(int(key), '')
+            if not parent.isdigit() or int(parent) not in transceivers or 'entPhySensorValue' not in sensor:
+                continue
+            try:
+                value = _get_sensor_value(sensor)
+            except ValueError:
+                continue
+            sensor_type = sensor.get('entPhySensorType', '').lower()
+            description = descriptions.get(int(key), '').lower()
+            details = result[transceivers[int(parent)]]
+            if 'celsius' in sensor_type or 'temp' in description:
+                details['temperature'] = '{0:.1f}'.format(value)
+            elif re.search(r'\brx\b|receive', description):
+                details['rx_power'] = self._format_power(value, sensor_type)
+            elif re.search(r'\btx\b|transmit', description):
+                details['tx_power'] = self._format_power(value, sensor_type)
+
+    @staticmethod
+    def _format_power(value, sensor_type):
+        """Optical power in dBm, sensors reporting watts are converted"""
+
+        if 'watts' in sensor_type:
+            if value <= 0:
+                return ''
+            value = 10 * math.log10(value * 1000)
+        return '{0:.2f}'.format(value)
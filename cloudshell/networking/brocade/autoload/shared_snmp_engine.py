@@ -0,0 +1,60 @@
+import copy
+import os
+import threading
+
+from pysnmp.entity.rfc3413.oneliner import cmdgen
+from pysnmp.smi import builder, view
+
+BROCADE_MIB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'mibs'))
+
+_shared_engine = threading.local()
+
+
+def get_shared_command_generator():
+    """Get SNMP engine and MIB builder shared by all discoveries of the worker thread,
+    engine and loaded MIB modules are created once, pysnmp engine itself is not thread safe
+
+    :return: tuple (CommandGenerator, MibViewController)
+    """
+
+    if getattr(_shared_engine, 'cmd_gen', None) is None:
+        cmd_gen = cmdgen.CommandGenerator()
+        mib_builder = cmd_gen.snmpEngine.msgAndPduDsp.mibInstrumController.mibBuilder
+        mib_sources = list(mib_builder.getMibSources()) + [builder.DirMibSource(BROCADE_MIB_PATH)]
+        mib_builder.setMibSources(*mib_sources)
+        _shared_engine.mib_viewer = view.MibViewController(mib_builder)
+        _shared_engine.cmd_gen = cmd_gen
+    return _shared_engine.cmd_gen, _shared_engine.mib_viewer
+
+
+def attach_shared_engine(snmp_handler, logger):
+    """Copy of QualiSnmp using engine and MIB builder shared by the current thread, provided handler is
+    not modified, so handler injected into several threads keeps its own engine
+
+    :param snmp_handler: QualiSnmp object
+    :return: QualiSnmp copy with shared engine or None if handler should keep its own engine
+    """
+
+    if not all(hasattr(snmp_handler, name) for name in ('cmd_gen', 'mib_builder', 'mib_viewer')):
+        return None
+    try:
+        cmd_gen, mib_viewer = get_shared_command_generator()
+    except Exception as e:
+        logger.error('Failed to initialize shared SNMP engine: {0}'.format(e))
+        return None
+    # keep MIB folders registered on the handler, i.e. QualiSnmp own MIBs
+    shared_sources = list(mib_viewer.mibBuilder.getMibSources())
+    shared_paths = set(source.fullPath() for source in shared_sources)
+    missing_sources = [source for source in snmp_handler.mib_builder.getMibSources()
+                       if source.fullPath() not in shared_paths]
+    if missing_sources:
+        mib_viewer.mibBuilder.setMibSources(*(shared_sources + missing_sources))
+
+    shared_handler = copy.copy(snmp_handler)
+    # target timeout and retries are tuned per request, so target is not shared either
+    if getattr(snmp_handler, 'target', None) is not None:
+        shared_handler.target = copy.copy(snmp_handler.target)
+    shared_handler.cmd_gen = cmd_gen
+    shared_handler.mib_builder = mib_viewer.mibBuilder
+    shared_handler.mib_viewer = mib_viewer
+    return shared_handler
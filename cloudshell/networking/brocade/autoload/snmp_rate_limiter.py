@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+# limiters of devices not polled recently are dropped above this number, a dropped limiter is recreated full
+MAX_DEVICE_RATE_LIMITERS = 1024
+
+
+class SnmpRateLimiter(object):
+    def __init__(self, pdu_rate=50.0, burst=20, max_outstanding=2):
+        """Token bucket on PDUs per second with bounded number of outstanding requests
+
+        :param pdu_rate: tokens (PDUs) added per second
+        :param burst: bucket size, max number of PDUs sent back to back
+        :param max_outstanding: max number of requests in flight at the same time
+        """
+
+        self._condition = threading.Condition()
+        self._outstanding = 0
+        self._tokens = float(burst)
+        self._last_refill = time.time()
+        self.pdu_rate = float(pdu_rate)
+        self.burst = float(burst)
+        self.max_outstanding = max_outstanding
+
+    def configure(self, pdu_rate=None, burst=None, max_outstanding=None):
+        with self._condition:
+            if pdu_rate:
+                self.pdu_rate = float(pdu_rate)
+            if burst:
+                self.burst = float(burst)
+                self._tokens = min(self._tokens, self.burst)
+            if max_outstanding:
+                self.max_outstanding = max_outstanding
+            self._condition.notify_all()
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.pdu_rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Block until request slot and one token are available, every PDU is acquired separately,
+        so multi PDU requests (walks) are paced PDU by PDU
+        """
+
+        with self._condition:
+            while True:
+                self._refill()
+                if self._outstanding < self.max_outstanding and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._outstanding += 1
+                    return
+                if self._outstanding >= self.max_outstanding:
+                    self._condition.wait()
+                else:
+                    self._condition.wait((1 - self._tokens) / self.pdu_rate)
+
+    def release(self):
+        """Free request slot"""
+
+        with self._condition:
+            self._outstanding -= 1
+            self._condition.notify_all()
+
+    @property
+    def is_idle(self):
+        return self._outstanding == 0
+
+
+_device_rate_limiters = OrderedDict()
+_device_rate_limiters_lock = threading.Lock()
+
+
+def get_device_rate_limiter(device_key, **profile):
+    """Get rate limiter shared by all SNMP traffic to the device inside this process,
+    number of kept limiters is bounded by MAX_DEVICE_RATE_LIMITERS, least recently used idle ones are dropped
+
+    :param device_key: device address
+    :param profile: SnmpRateLimiter parameters, used only when limiter is created
+    :rtype: SnmpRateLimiter
+    """
+
+    with _device_rate_limiters_lock:
+        rate_limiter = _device_rate_limiters.pop(device_key, None)
+        if rate_limiter is None:
+            rate_limiter = SnmpRateLimiter(**profile)
+            for key in [key for key, limiter in _device_rate_limiters.iteritems() if limiter.is_idle]:
+                if len(_device_rate_limiters) < MAX_DEVICE_RATE_LIMITERS:
+                    break
+                del _device_rate_limiters[key]
+        _device_rate_limiters[device_key] = rate_limiter
+        return rate_limiter
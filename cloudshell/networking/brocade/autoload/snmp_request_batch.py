@@ -0,0 +1,95 @@
+from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
+
+
+class SnmpPropertyRequest(object):
+    def __init__(self, snmp_module_name, property_name, index, return_type='str'):
+        """Single property queued in SnmpPropertyBatch, value is available after batch execution
+
+        :param snmp_module_name: MIB name, i.e. 'ENTITY-MIB'
+        :param property_name: MIB object name, i.e. 'entPhysicalSerialNum'
+        :param index: table index
+        :param return_type: 'str' or 'int', same as QualiSnmp.get_property
+        """
+
+        self.snmp_module_name = snmp_module_name
+        self.property_name = property_name
+        self.index = index
+        self.return_type = return_type
+        self.value = 0 if return_type == 'int' else ''
+
+    @property
+    def oid(self):
+        return self.snmp_module_name, self.property_name, self.index
+
+    def set_raw_value(self, raw_value):
+        if isinstance(raw_value, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+            return
+        value = raw_value.prettyPrint()
+        if self.return_type == 'int':
+            try:
+                self.value = int(value)
+            except ValueError:
+                pass
+        else:
+            self.value = value.strip(' \t\n\r')
+
+
+class SnmpPropertyBatch(object):
+    def __init__(self, snmp, logger, max_var_binds=20):
+        """Collect get_property requests and send them as multi-varbind GET PDUs
+
+        :param snmp: QualiSnmp object
+        :param logger: logger
+        :param max_var_binds: max number of varbinds in a single GET PDU
+        """
+
+        self._snmp = snmp
+        self._logger = logger
+        self.max_var_binds = max(1, max_var_binds)
+        self._pending = []
+
+    def get_property(self, snmp_module_name, property_name, index, return_type='str'):
+        """Queue property, same signature as QualiSnmp.get_property
+
+        :return: SnmpPropertyRequest, its value is resolved by execute()
+        :rtype: SnmpPropertyRequest
+        """
+
+        request = SnmpPropertyRequest(snmp_module_name, property_name, index, return_type)
+        self._pending.append(request)
+        return request
+
+    def execute(self):
+        """Send all pending requests, chunked to max_var_binds per PDU
+
+        :return: number of sent PDUs
+        """
+
+        pending, self._pending = self._pending, []
+        pdu_count = 0
+        for start in range(0, len(pending), self.max_var_binds):
+            pdu_count += self._send(pending[start:start + self.max_var_binds])
+        self._logger.debug('Resolved {0} properties with {1} GET requests'.format(len(pending), pdu_count))
+        return pdu_count
+
+    def _send(self, requests):
+        """Send GET for provided requests, split chunk in halves if device rejects it (i.e. tooBig),
+        properties which cannot be retrieved keep default value as QualiSnmp.get_property does
+
+        :return: number of sent PDUs
+        """
+
+        try:
+            self._snmp.get(*[request.oid for request in requests])
+            var_binds = self._snmp.var_binds
+        except Exception as e:
+            if len(requests) == 1:
+                self._logger.debug('Failed to get {0}: {1}'.format(requests[0].oid, e))
+                return 1
+            middle = len(requests) // 2
+            return 1 + self._send(requests[:middle]) + self._send(requests[middle:])
+
+        # GET response keeps request varbind order
+        for request, var_bind in zip(requests, var_binds):
+            request.set_raw_value(var_bind[1])
+        return 1
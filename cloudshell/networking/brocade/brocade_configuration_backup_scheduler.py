@@ -0,0 +1,132 @@
+import time
+import traceback
+
+import inject
+
+from cloudshell.networking.brocade.parallel_jobs import DestinationLimits, run_parallel
+
+
+class BackupJob(object):
+    def __init__(self, configuration_operations, destination_host, source_filename='running-config', vrf=None):
+        """Single resource backup for BrocadeConfigurationBackupScheduler
+
+        :param configuration_operations: BrocadeConfigurationOperations of the resource
+        :param destination_host: tftp/ftp server where file be saved
+        :param source_filename: what file to backup
+        :param vrf: vrf used for copy
+        """
+
+        self.configuration_operations = configuration_operations
+        self.destination_host = destination_host
+        self.source_filename = source_filename
+        self.vrf = vrf
+        self.resource_name = configuration_operations.resource_name
+        self.is_success = False
+        self.result = None
+        self.error = None
+        self.attempts = 0
+        self.duration = 0.0
+
+
+class BackupReport(object):
+    def __init__(self, jobs, duration):
+        self.jobs = jobs
+        self.duration = duration
+
+    @property
+    def succeeded(self):
+        return [job for job in self.jobs if job.is_success]
+
+    @property
+    def failed(self):
+        return [job for job in self.jobs if not job.is_success]
+
+    def summary(self):
+        """Human readable report of the backup run
+
+        :rtype: str
+        """
+
+        lines = ['Backup finished in {0:.0f}s: {1} succeeded, {2} failed'.format(
+            self.duration, len(self.succeeded), len(self.failed))]
+        for job in self.jobs:
+            if job.is_success:
+                lines.append('OK\t{0}\t{1}\tattempts {2}\t{3:.0f}s'.format(job.resource_name, job.result,
+                                                                          job.attempts, job.duration))
+            else:
+                lines.append('FAILED\t{0}\t{1}\tattempts {2}\t{3:.0f}s'.format(job.resource_name, job.error,
+                                                                              job.attempts, job.duration))
+        return '\n'.join(lines)
+
+
+class BrocadeConfigurationBackupScheduler(object):
+    def __init__(self, max_concurrency=10, max_per_destination=4, retries=2, retry_delay=30, timeout=600,
+                 skip_unchanged=False, logger=None):
+        """Run save_configuration for many resources in parallel
+
+        :param max_concurrency: global number of backups running at the same time
+        :param max_per_destination: number of backups running at the same time against one tftp/ftp server
+        :param retries: number of retries for failed backup
+        :param retry_delay: seconds to wait before retry, doubled on every retry
+        :param timeout: copy timeout per device
+        :param skip_unchanged: skip transfer for devices which config fingerprint matches the last backup
+        :param logger: logger
+        """
+
+        self.max_concurrency = max_concurrency
+        self.max_per_destination = max_per_destination
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.skip_unchanged = skip_unchanged
+        self._logger = logger
+        self._destination_limits = DestinationLimits(max_per_destination)
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            try:
+                self._logger = inject.instance('logger')
+            except:
+                raise Exception('Brocade OS', 'Logger is none or empty')
+        return self._logger
+
+    def run(self, jobs):
+        """Backup all provided resources
+
+        :param jobs: list of BackupJob
+        :return: report with result of every job
+        :rtype: BackupReport
+        """
+
+        start_time = time.time()
+        jobs = list(jobs)
+        run_parallel(jobs, self._run_job, self.max_concurrency, 'brocade-backup')
+
+        report = BackupReport(jobs, time.time() - start_time)
+        self.logger.info(report.summary())
+        return report
+
+    def _run_job(self, job):
+        start_time = time.time()
+        destination_limit = self._destination_limits.get(job.destination_host)
+        delay = self.retry_delay
+        while job.attempts <= self.retries:
+            job.attempts += 1
+            try:
+                with destination_limit:
+                    job.result = job.configuration_operations.save_configuration(
+                        job.destination_host, job.source_filename, vrf=job.vrf, timeout=self.timeout,
+                        skip_unchanged=self.skip_unchanged)
+                job.is_success = True
+                job.error = None
+                break
+            except Exception as e:
+                job.error = str(e)
+                self.logger.error('Backup of {0} failed, attempt {1} of {2}: {3}'.format(
+                    job.resource_name, job.attempts, self.retries + 1, job.error))
+                self.logger.debug(traceback.format_exc())
+                if job.attempts <= self.retries:
+                    time.sleep(delay)
+                    delay *= 2
+        job.duration = time.time() - start_time
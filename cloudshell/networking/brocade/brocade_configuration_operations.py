@@ -1,17 +1,42 @@
 from collections import OrderedDict
 import traceback
 import inject
+import json
+import os
+import math
 import re
 import time
 
+try:
+    from urllib2 import urlopen
+except ImportError:
+    from urllib.request import urlopen
+
+from cloudshell.cli.session.session_exceptions import SessionLoopLimitException
 from cloudshell.networking.networking_utils import validateIP
 from cloudshell.networking.brocade.firmware_data.brocade_firmware_data import BrocadeFirmwareData
+from cloudshell.networking.brocade.firmware_data.firmware_catalog import get_firmware_catalog
+from cloudshell.networking.brocade.configuration_archive import BrocadeConfigurationArchive, get_config_hash
+from cloudshell.networking.brocade.configuration_diff import parse_config, get_config_diff
+from cloudshell.networking.brocade.copy_progress import CopyProgress, PROGRESS_PATTERN
+from cloudshell.networking.brocade.device_capabilities import get_firmware_version, get_resource_capability_cache
+from cloudshell.networking.brocade.device_reachability import BrocadeReachabilityProbe, DEFAULT_CLI_PORTS, wait_for
+from cloudshell.networking.brocade.remote_file import get_remote_file_size, read_remote_file, write_remote_file, \
+    RemoteFileNotFound
 from cloudshell.networking.operations.interfaces.configuration_operations_interface import \
     ConfigurationOperationsInterface
 from cloudshell.networking.operations.interfaces.firmware_operations_interface import FirmwareOperationsInterface
 from cloudshell.shell.core.context_utils import get_resource_name
 
 
+ARCHIVE_SCHEME = 'archive://'
+INCREMENTAL_RESTORE_CHUNK_SIZE = 5
+COPY_READ_INTERVAL = 1
+# Network OS 'dir' entry: permissions, links, owner, group, size, month, day, time or year, name
+NOS_DIR_ENTRY_PATTERN = re.compile(r'^[-dl][-rwxsStT]{9}\S*\s+\d+\s+\S+\s+\S+\s+(\d+)'
+                                   r'\s+\w{3}\s+\d+\s+[\d:]+\s+(.+?)\s*$')
+
+
 def _get_time_stamp():
     return time.strftime("%d%m%y-%H%M%S", time.localtime())
 
@@ -20,10 +45,12 @@ def _get_time_stamp():
 
 
 class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareOperationsInterface):
-    def __init__(self, cli=None, logger=None, api=None, resource_name=None):
+    def __init__(self, cli=None, logger=None, api=None, resource_name=None, snmp_handler=None):
         self._cli = cli
         self._logger = logger
         self._api = api
+        self.snmp_handler = snmp_handler
+        self._firmware_version = None
         try:
             self.resource_name = resource_name or get_resource_name()
         except Exception:
@@ -56,10 +83,14 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
                 raise Exception('Brocade OS', 'Cli Service is none or empty')
         return self._cli
 
-    def copy(self, source_file='', destination_file='', vrf=None, timeout=600, retries=5):
+    def copy(self, source_file='', destination_file='', vrf=None, timeout=600, retries=5, progress_callback=None,
+             stall_timeout=None, expected_size=None):
         """Copy file from device to tftp or vice versa, as well as copying inside devices filesystem
         :param source_file: source file.
         :param destination_file: destination file.
+        :param progress_callback: called with CopyProgress every time device reports transfer progress
+        :param stall_timeout: abort copy if device reports no progress for this number of seconds
+        :param expected_size: size of transferred file in bytes, used for eta calculation
         :return tuple(True or False, 'Success or Error message')
         """
 
@@ -91,10 +122,66 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
         expected_map['\([Yy]es/[Nn]o\)'] = lambda session: session.send_line('yes')
         # expected_map['\(.*\)'] = lambda session: session.send_line('y')
 
-        output = self.cli.send_command(command=copy_command_str, expected_map=expected_map)
+        if progress_callback or stall_timeout:
+            return self._copy_with_progress(copy_command_str, expected_map, timeout, progress_callback,
+                                            stall_timeout, expected_size)
+
+        output = self.cli.send_command(command=copy_command_str, expected_map=expected_map, timeout=timeout)
+
+        return self._check_download_from_tftp(output)
+
+    def _copy_with_progress(self, copy_command_str, expected_map, timeout, progress_callback, stall_timeout,
+                            expected_size):
+        """Run copy command through cli service, progress printed by device is handled by action map,
+        so transfer progress is reported and stalled transfer is aborted without waiting for timeout.
+        Transfer is treated as stalled when device prints nothing for stall_timeout seconds.
+
+        :return tuple(True or False, 'Success or Error message')
+        """
+
+        progress = CopyProgress(expected_size=expected_size)
+        deadline = time.time() + timeout
+        state = {'is_timed_out': False}
+
+        def on_progress(session):
+            progress.mark_progress()
+            self.logger.info(str(progress))
+            if progress_callback:
+                progress_callback(progress)
+            if time.time() >= deadline:
+                state['is_timed_out'] = True
+                # passes through cli service without reconnect and command resend
+                raise SessionLoopLimitException('Brocade OS', 'Copy is not finished in {0} seconds'.format(timeout))
+
+        copy_expected_map = OrderedDict(expected_map)
+        copy_expected_map[PROGRESS_PATTERN] = on_progress
+        silence_timeout = min(stall_timeout or timeout, timeout)
+        try:
+            output = self.cli.send_command(command=copy_command_str, expected_str=r'(?<![#\n])[#>] *$',
+                                           expected_map=copy_expected_map, timeout=COPY_READ_INTERVAL,
+                                           retries=max(int(math.ceil(silence_timeout / float(COPY_READ_INTERVAL))), 1),
+                                           check_action_loop_detector=False, command_retries=1)
+        except SessionLoopLimitException as e:
+            self.logger.debug('Copy output is not finished: {0}'.format(e))
+            if state['is_timed_out'] or not stall_timeout:
+                message = 'Copy aborted, not finished in {0} seconds. {1}'.format(timeout, progress)
+            else:
+                message = 'Copy aborted, no output for {0} seconds. {1}'.format(stall_timeout, progress)
+            self.logger.error(message)
+            self._abort_session()
+            return False, message
 
+        progress.feed(output)
+        self.logger.info('Copy finished. {0}'.format(progress))
         return self._check_download_from_tftp(output)
 
+    def _abort_session(self):
+        """Drop current session, so running transfer doesn't block next commands"""
+
+        session_type = self.cli.get_session_type()
+        if not session_type == 'CONSOLE':
+            self.cli.destroy_threaded_session()
+
     def _check_download_from_tftp(self, output):
         """Verify if file was successfully uploaded
         :param output: output from cli
@@ -142,11 +229,17 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
             error_str = error_str[:error_str.find('\n')]
             raise Exception('Brocade IOS', 'Configure replace error: ' + error_str)
 
-    def reload(self, sleep_timeout=60, retries=15):
-        """Reload device
+    def reload(self, sleep_timeout=60, retries=15, deadline=None, max_probe_interval=30):
+        """Reload device and wait until it is back online
+
+        Device state is detected with cheap probes (tcp connect to cli port, snmp sysUpTime) using exponential
+        backoff with jitter, cli session is reopened only after device answers.
 
-        :param sleep_timeout: period of time, to wait for device to get back online
-        :param retries: amount of retires to get response from device after it will be rebooted
+        :param sleep_timeout: kept for compatibility, deadline defaults to sleep_timeout * retries seconds
+        :param retries: kept for compatibility, deadline defaults to sleep_timeout * retries seconds
+        :param deadline: max number of seconds to wait for device to get back online
+        :param max_probe_interval: max number of seconds between probes
+        :return: True if device is back online
         """
 
         expected_map = {'[\[\(][Yy]es/[Nn]o[\)\]]|\[confirm\]': lambda session: session.send_line('yes'),
@@ -154,6 +247,9 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
                         'reload': lambda session: session.send_line(''),
                         '[\[\(][Yy]/[Nn][\)\]]': lambda session: session.send_line('y')
                         }
+        probe = self._get_reachability_probe()
+        reload_started = time.time()
+        end_time = reload_started + (deadline or sleep_timeout * retries)
         try:
             self.cli.send_command(command='reload', expected_map=expected_map, timeout=3)
 
@@ -161,70 +257,211 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
             session_type = self.cli.get_session_type()
 
             if not session_type == 'CONSOLE':
-                self._logger.info('Session type {}, close session'.format(session_type))
+                self.logger.info('Session type {}, close session'.format(session_type))
                 self.cli.destroy_threaded_session()
 
-        self.logger.info('Wait 20 seconds for device to reload.....')
-        time.sleep(20)
-        # output = self.cli.send_command(command='', expected_str='.*', expected_map={})
+        if probe.port:
+            self.logger.info('Waiting for device to go down')
+            if not wait_for(probe.is_down, min(end_time, time.time() + 120), initial_interval=1, max_interval=5,
+                            logger=self.logger, description='device to go down'):
+                self.logger.info('Device still answers on port {0}, continue waiting for it'.format(probe.port))
+
+        def is_reloaded():
+            if not probe.is_up(reload_started):
+                return False
+            self.logger.debug('Device answers to probes, trying to send command to device ...')
+            output = self.cli.send_command(command='', expected_str='(?<![#\n])[#>] *$', expected_map={}, timeout=5,
+                                           is_need_default_prompt=False)
+            return len(output) != 0
+
+        self.logger.info('Waiting up to {0:.0f} seconds for device to get back online'.format(end_time - time.time()))
+        is_reloaded = wait_for(is_reloaded, end_time, initial_interval=2, max_interval=max_probe_interval,
+                               logger=self.logger, description='device to get back online')
+        if is_reloaded:
+            self.logger.info('Device is back online after {0:.0f} seconds'.format(time.time() - reload_started))
+        else:
+            self.logger.error('Device did not get back online after {0:.0f} seconds'.format(
+                time.time() - reload_started))
+        return is_reloaded
 
-        retry = 0
-        is_reloaded = False
-        while retry < retries:
-            retry += 1
+    def _get_reachability_probe(self):
+        """Build probe of device management address, tcp probe is disabled for console sessions
+        and snmp probe is disabled when snmp handler of this resource is not available
 
-            time.sleep(sleep_timeout)
-            try:
-                self.logger.debug('Trying to send command to device ... (retry {} of {}'.format(retry, retries))
-                output = self.cli.send_command(command='', expected_str='(?<![#\n])[#>] *$', expected_map={}, timeout=5,
-                                               is_need_default_prompt=False)
-                if len(output) == 0:
-                    continue
-
-                is_reloaded = True
-                break
-            except Exception as e:
-                self.logger.error('BrocadeHandlerBase', 'Reload receives error: {0}'.format(e.message))
-                self.logger.debug('Wait {} seconds and retry ...'.format(sleep_timeout/2))
-                time.sleep(sleep_timeout/2)
-                pass
+        :rtype: BrocadeReachabilityProbe
+        """
 
-        return is_reloaded
+        host = port = address = None
+        try:
+            address = self.api.GetResourceDetails(self.resource_name).Address
+            session_type = self.cli.get_session_type()
+            if session_type != 'CONSOLE':
+                host = address
+                try:
+                    port = int(self._get_resource_attribute(self.resource_name, 'CLI TCP Port'))
+                except Exception:
+                    port = None
+                port = port or DEFAULT_CLI_PORTS.get(str(session_type).upper())
+        except Exception as e:
+            self.logger.debug('Tcp probe is disabled: {0}'.format(e))
+        return BrocadeReachabilityProbe(host, port, snmp_handler=self._get_probe_snmp_handler(address),
+                                        logger=self.logger)
 
-    def update_firmware(self, remote_host, file_path, size_of_firmware=200000000):
+    def _get_probe_snmp_handler(self, address):
+        """Snmp handler of this resource: provided on init, or injected one if its target is resource address,
+        injected handler is global and could belong to another device when many devices are handled in parallel
+
+        :param address: resource management address
+        :return: QualiSnmp object or None
+        """
+
+        if self.snmp_handler is not None:
+            return self.snmp_handler
+        try:
+            snmp_handler = inject.instance('snmp_handler')
+        except Exception:
+            return None
+        transport_address = getattr(getattr(snmp_handler, 'target', None), 'transportAddr', None)
+        if address and transport_address and transport_address[0] == address:
+            return snmp_handler
+        self.logger.debug('Injected snmp handler does not belong to {0}, snmp probe is disabled'.format(
+            self.resource_name))
+        return None
+
+    def update_firmware(self, remote_host, file_path, size_of_firmware=None):
         """Update firmware version on device by loading provided image, performs following steps:
 
-            1. Copy bin file from remote tftp server.
-            2. Clear in run config boot system section.
-            3. Set downloaded bin file as boot file and then reboot device.
-            4. Check if firmware was successfully installed.
+            1. Check image name, presence and size on remote server and free space on device.
+            2. Copy bin file from remote tftp server.
+            3. Clear in run config boot system section.
+            4. Set downloaded bin file as boot file and then reboot device.
+            5. Check if firmware was successfully installed.
 
         :param remote_host: host with firmware
         :param file_path: relative path on remote host
-        :param size_of_firmware: size in bytes
+        :param size_of_firmware: size in bytes, used for free space check if remote host doesn't report file size
         :return: status / exception
         """
 
-        firmware_obj = BrocadeFirmwareData(file_path)
-        if firmware_obj.get_name() is None:
-            raise Exception('Brocade IOS', "Invalid firmware name!\n \
-                                Firmware file must have: title, extension.\n \
-                                Example: isr4400-universalk9.03.10.00.S.153-3.S-ext.SPA.bin\n\n \
-                                Current path: " + file_path)
+        firmware_obj = self.download_firmware(remote_host, file_path, size_of_firmware)
+        return self.activate_firmware(firmware_obj)
 
-            # if not validateIP(remote_host):
-            #     raise Exception('Brocade IOS', "Not valid remote host IP address!")
-        free_memory_size = self._get_free_memory_size('bootflash')
+    def update_firmware_from_catalog(self, remote_host, catalog_root, version=None, model=None):
+        """Update firmware with image picked from local firmware catalog
 
-        # if size_of_firmware > free_memory_size:
-        #    raise Exception('Brocade ISR 4K', "Not enough memory for firmware!")
+        :param remote_host: url of tftp/ftp server folder which publishes catalog_root
+        :param catalog_root: local firmware repository folder
+        :param version: image version, the newest image for device model is used if not provided
+        :param model: device model, resource 'Model' attribute is used if not provided
+        :return: status / exception
+        """
+
+        entry = self.get_firmware_image(catalog_root, version=version, model=model)
+        firmware_url = '{0}/{1}'.format(remote_host.rstrip('/'), entry['path'])
+        firmware_obj = self.download_firmware(firmware_url, entry['file_name'], size_of_firmware=entry['size'],
+                                              expected_md5=entry['md5'])
+        return self.activate_firmware(firmware_obj)
+
+    def get_firmware_image(self, catalog_root, version=None, model=None):
+        """Find firmware image for device in local firmware catalog
+
+        :return: catalog entry dict {'path', 'file_name', 'size', 'mtime', 'sha256', 'md5', 'model', 'version'}
+        """
+
+        if model is None:
+            model = self._get_resource_attribute(self.resource_name, 'Model')
+        entry = get_firmware_catalog(catalog_root).find(model, version)
+        if entry is None:
+            raise Exception('Brocade OS', 'Firmware image for model {0}{1} is not found in {2}'.format(
+                model, ', version {0}'.format(version) if version else '', catalog_root))
+        self.logger.info('Firmware image {0} (sha256 {1}) is selected for {2}'.format(entry['path'], entry['sha256'],
+                                                                                      model))
+        return entry
+
+    def download_firmware(self, remote_host, file_path, size_of_firmware=None, expected_md5=None,
+                          download_retries=1, progress_callback=None, stall_timeout=None):
+        """Run pre-flight checks, copy firmware to bootflash and verify copied image,
+        device keeps running current firmware
+
+        :param remote_host: host with firmware
+        :param file_path: relative path on remote host
+        :param size_of_firmware: size in bytes, used for free space check if remote host doesn't report file size
+        :param expected_md5: md5 of the image, i.e. from firmware catalog, Network OS cannot calculate file
+            checksums, so image size is verified
+        :param download_retries: number of downloads repeated after failed verification
+        :param progress_callback: called with CopyProgress every time device reports transfer progress
+        :param stall_timeout: abort download if device reports no progress for this number of seconds
+        :return: downloaded firmware data
+        :rtype: BrocadeFirmwareData
+        """
+
+        firmware_obj, image_size = self._check_firmware_preflight(remote_host, file_path, size_of_firmware)
+        device_file = 'bootflash:/' + file_path
+
+        for attempt in range(download_retries + 1):
+            is_downloaded = self.copy(source_file=remote_host, destination_file=device_file, timeout=600, retries=2,
+                                      progress_callback=progress_callback, stall_timeout=stall_timeout,
+                                      expected_size=image_size)
+
+            if not is_downloaded[0]:
+                raise Exception('Brocade IOS', "Failed to download firmware from " + remote_host +
+                                file_path + "!\n" + is_downloaded[1])
+
+            is_verified, message = self._verify_device_file(device_file, expected_md5, image_size)
+            if is_verified:
+                self.logger.info(message)
+                return firmware_obj
+            if is_verified is None:
+                raise Exception('Brocade OS', 'Firmware image on device cannot be verified: {0}'.format(message))
+            self.logger.error('Firmware verification failed, attempt {0} of {1}: {2}'.format(
+                attempt + 1, download_retries + 1, message))
+        raise Exception('Brocade OS', 'Firmware image on device is corrupted: {0}'.format(message))
+
+    def _verify_device_file(self, device_file, expected_md5=None, expected_size=None):
+        """Compare file size reported by device with expected size. Network OS CLI has no file checksum
+        command ('verify md5' is IOS syntax), checksum of the image package is validated by 'firmware download'
+        during activation, so expected md5 is only logged
+
+        :return: tuple(True, False or None, 'Success or Error message'), None if size was expected
+            but device didn't report it, True if neither checksum nor size was expected
+        """
+
+        if expected_md5:
+            self.logger.debug('Device cannot calculate checksum of {0}, expected md5 {1}, verifying file size'.format(
+                device_file, expected_md5))
+        if expected_size:
+            device_size = self._get_device_file_size(device_file)
+            if device_size is None:
+                return None, 'device did not report size of {0}'.format(device_file)
+            if device_size == expected_size:
+                return True, '{0} size {1} bytes is verified'.format(device_file, device_size)
+            return False, '{0} size is {1} bytes, expected {2}'.format(device_file, device_size, expected_size)
+        if expected_md5:
+            return None, 'size of {0} is not known, md5 cannot be verified on device'.format(device_file)
+        self.logger.warning('Size of {0} is not known, image is not verified'.format(device_file))
+        return True, '{0} is not verified'.format(device_file)
+
+    def _get_device_file_size(self, device_file):
+        """Get file size from Network OS directory listing, size is taken from its column
+
+        :return: size in bytes or None if file is not listed
+        """
+
+        partition, file_name = device_file.split(':', 1)
+        file_name = file_name.strip('/').split('/')[-1]
+        output = self.cli.send_command(command='dir {0}:'.format(partition))
+        for line in output.splitlines():
+            match_entry = NOS_DIR_ENTRY_PATTERN.match(line.strip())
+            if match_entry and match_entry.group(2) == file_name:
+                return int(match_entry.group(1))
+        return None
 
-        is_downloaded = self.copy(source_file=remote_host,
-                                  destination_file='bootflash:/' + file_path, timeout=600, retries=2)
+    def activate_firmware(self, firmware_obj):
+        """Set downloaded firmware as boot image, save configuration, reload device and check running version
 
-        if not is_downloaded[0]:
-            raise Exception('Brocade IOS', "Failed to download firmware from " + remote_host +
-                            file_path + "!\n" + is_downloaded[1])
+        :param firmware_obj: firmware data returned by download_firmware
+        :return: status / exception
+        """
 
         self.cli.send_command(command='configure terminal', expected_str='(config)#')
         self._remove_old_boot_system_config()
@@ -251,6 +488,10 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
         output = self.cli.send_command(command='copy run start',
                                        expected_map={'\?': lambda session: session.send_line('')})
         is_reloaded = self.reload()
+        # capabilities are cached per firmware version, version is read from device again on next probe
+        self._firmware_version = None
+        if not is_reloaded:
+            raise Exception('Brocade IOS', 'Device did not get back online after reload!')
         output_version = self.cli.send_command(command='show version | include image file')
 
         is_firmware_installed = output_version.find(firmware_full_name)
@@ -259,6 +500,53 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
         else:
             raise Exception('Brocade IOS', 'Firmware update was unsuccessful!')
 
+    def _check_firmware_preflight(self, remote_host, file_path, size_of_firmware=None, partition='bootflash'):
+        """Validate firmware before download: image name and extension, presence and size of the file on remote
+        host and free space on device partition, all problems are reported at once
+
+        :param remote_host: firmware url
+        :param file_path: relative path on remote host
+        :param size_of_firmware: size in bytes, used if remote host doesn't report file size
+        :param partition: device file system firmware is copied to
+        :return: tuple (firmware data, image size in bytes or None)
+        """
+
+        errors = []
+        firmware_obj = BrocadeFirmwareData(file_path)
+        if not firmware_obj.get_name():
+            errors.append('Invalid firmware name, firmware file must have title and extension, '
+                          'example: ICX64S08030.bin, current path: {0}'.format(file_path))
+        elif not firmware_obj.is_valid_extension():
+            errors.append('Invalid firmware extension "{0}", expected: bin'.format(firmware_obj.get_extension()))
+
+        firmware_url = remote_host
+        file_name = file_path.split('/')[-1]
+        if file_name and not remote_host.rstrip('/').endswith(file_name):
+            firmware_url = '{0}/{1}'.format(remote_host.rstrip('/'), file_path.lstrip('/'))
+        try:
+            remote_size = get_remote_file_size(firmware_url)
+        except RemoteFileNotFound as e:
+            errors.append('Firmware file is not found on remote host: {0}'.format(e))
+            remote_size = None
+        except Exception as e:
+            self.logger.warning('Cannot check firmware file {0} on remote host: {1}'.format(firmware_url, e))
+            remote_size = None
+        if remote_size is not None:
+            self.logger.info('Firmware {0} size is {1} bytes'.format(firmware_url, remote_size))
+            size_of_firmware = remote_size
+
+        if not errors and size_of_firmware:
+            free_memory_size = self._get_free_memory_size(partition)
+            if free_memory_size < 0:
+                self.logger.warning('Cannot get free space of {0}, size check is skipped'.format(partition))
+            elif size_of_firmware > free_memory_size:
+                errors.append('Not enough space on {0} for firmware: {1} bytes required, {2} bytes free'.format(
+                    partition, size_of_firmware, free_memory_size))
+
+        if errors:
+            raise Exception('Brocade OS', 'Firmware pre-flight check failed:\n' + '\n'.join(errors))
+        return firmware_obj, remote_size or size_of_firmware
+
     def _get_resource_attribute(self, resource_full_path, attribute_name):
         """Get resource attribute by provided attribute_name
 
@@ -274,11 +562,18 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
             raise Exception(e.message)
         return result
 
-    def save_configuration(self, destination_host, source_filename, vrf=None):
+    def save_configuration(self, destination_host, source_filename, vrf=None, timeout=600, skip_unchanged=False,
+                           use_deltas=False):
         """Backup 'startup-config' or 'running-config' from device to provided file_system [ftp|tftp]
         Also possible to backup config to localhost
-        :param destination_host:  tftp/ftp server where file be saved
+        :param destination_host:  tftp/ftp server where file be saved,
+            'archive://[folder]' to store config in local deduplicated archive, see _get_archive_root
         :param source_filename: what file to backup
+        :param timeout: period of time to wait for copy to finish
+        :param skip_unchanged: skip transfer if config fingerprint matches the last backup to the same destination,
+            fingerprint is kept in '<system name>-<source>.fingerprint' file next to backups on ftp server
+            or local folder, archive compares with the last archived configuration
+        :param use_deltas: archive only, store new configuration as delta against previous one
         :return: status message / exception
         """
 
@@ -290,6 +585,11 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
             raise Exception('Brocade OS', "Source filename must be 'startup' or 'running'!")
         if destination_host == '':
             raise Exception('Brocade OS', "Destination host is empty")
+        if destination_host.startswith(ARCHIVE_SCHEME):
+            config_hash = self.archive_configuration(source_filename,
+                                                     archive_root=destination_host[len(ARCHIVE_SCHEME):] or None,
+                                                     use_deltas=use_deltas, skip_unchanged=skip_unchanged)
+            return '{0},'.format(config_hash)
 
         system_name = re.sub('\s+', '_', self.resource_name)
         if len(system_name) > 23:
@@ -303,29 +603,143 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
             destination_host = self._get_resource_attribute(self.resource_name, 'Backup Location')
             if len(destination_host) <= 0:
                 raise Exception('Folder path and Backup Location is empty')
-        if destination_host.endswith('/'):
-            destination_file = destination_host + destination_filename
-        else:
-            destination_file = destination_host + '/' + destination_filename
-
-        is_uploaded = self.copy(destination_file=destination_file, source_file=source_filename, vrf=vrf)
+        destination_folder = destination_host.rstrip('/') + '/'
+        destination_file = destination_folder + destination_filename
+
+        fingerprint = None
+        fingerprint_file = '{0}{1}-{2}.fingerprint'.format(destination_folder, system_name,
+                                                             source_filename.replace('-config', ''))
+        if skip_unchanged:
+            fingerprint = get_config_hash(self._get_configuration_content(source_filename))
+            last_backup = self._get_last_backup(fingerprint_file)
+            if last_backup and last_backup['fingerprint'] == fingerprint:
+                self.logger.info('{0} is unchanged since backup {1}, transfer skipped'.format(
+                    source_filename, last_backup['file']))
+                return '{0},'.format(last_backup['file'])
+
+        is_uploaded = self.copy(destination_file=destination_file, source_file=source_filename, vrf=vrf,
+                                timeout=timeout)
         if is_uploaded[0] is True:
             self.logger.info('Save complete')
+            if fingerprint:
+                self._set_last_backup(fingerprint_file, fingerprint, destination_filename)
             return '{0},'.format(destination_filename)
         else:
             self.logger.info('Save failed with an error: {0}'.format(is_uploaded[1]))
             raise Exception(is_uploaded[1])
 
-    def restore_configuration(self, source_file, config_type, restore_method='override', vrf=None):
+    def _get_last_backup(self, fingerprint_file):
+        """Get fingerprint and file name of the last backup from fingerprint file stored next to backups
+
+        :return: dict {'fingerprint': '', 'file': ''} or None if fingerprint is not available
+        """
+
+        try:
+            last_backup = json.loads(read_remote_file(fingerprint_file))
+        except RemoteFileNotFound:
+            return None
+        except Exception as e:
+            self.logger.debug('Failed to read backup fingerprint {0}: {1}'.format(fingerprint_file, e))
+            return None
+        if not isinstance(last_backup, dict) or 'fingerprint' not in last_backup or 'file' not in last_backup:
+            return None
+        return last_backup
+
+    def _set_last_backup(self, fingerprint_file, fingerprint, destination_filename):
+        try:
+            write_remote_file(fingerprint_file, json.dumps({'fingerprint': fingerprint,
+                                                            'file': destination_filename}))
+        except Exception as e:
+            self.logger.warning('Failed to save backup fingerprint {0}, next backup will not be skipped: {1}'.format(
+                fingerprint_file, e))
+
+    def _get_configuration_content(self, source_filename):
+        """Read configuration text from device over cli
+
+        :param source_filename: 'running-config' or 'startup-config'
+        :return: configuration without command echo and prompt
+        :rtype: str
+        """
+
+        command = 'show {0}'.format(source_filename)
+        output = self.cli.send_command(command=command, timeout=120)
+        lines = output.splitlines()
+        if lines and lines[0].strip() == command:
+            lines = lines[1:]
+        if lines and re.search(r'[#>]\s*$', lines[-1]):
+            lines = lines[:-1]
+        return '\n'.join(line.rstrip() for line in lines).strip('\n') + '\n'
+
+    def archive_configuration(self, source_filename='running-config', archive_root=None, use_deltas=False,
+                              skip_unchanged=False):
+        """Store 'startup-config' or 'running-config' in local content addressed archive,
+        unchanged configuration is stored only as a reference in device history
+
+        :param source_filename: what file to backup
+        :param archive_root: archive folder, see _get_archive_root
+        :param use_deltas: store new configuration as delta against previous one
+        :param skip_unchanged: don't add history entry if configuration matches the last archived one
+        :return: configuration hash
+        :rtype: str
+        """
+
+        archive = BrocadeConfigurationArchive(self._get_archive_root(archive_root), use_deltas=use_deltas)
+        content = self._get_configuration_content(source_filename)
+        if skip_unchanged:
+            config_hash = get_config_hash(content)
+            if archive.get_last_hash(self.resource_name, source_filename) == config_hash:
+                self.logger.info('{0} is unchanged since last archived {1}, skipped'.format(source_filename,
+                                                                                           config_hash))
+                return config_hash
+        config_hash, is_new = archive.store(self.resource_name, source_filename, content)
+        if is_new:
+            self.logger.info('Archived new {0} {1}'.format(source_filename, config_hash))
+        else:
+            self.logger.info('{0} is unchanged, archived as reference to {1}'.format(source_filename, config_hash))
+        return config_hash
+
+    def _get_archive_root(self, folder=None):
+        """Archive folder: absolute folder is used as is, relative one is resolved against archive root taken
+        from resource 'Configuration Archive Path' attribute or CONFIGURATION_ARCHIVE_PATH config setting
+
+        :raise Exception: archive root is needed but not configured
+        :rtype: str
+        """
+
+        if folder and os.path.isabs(folder):
+            return folder
+        archive_root = None
+        try:
+            archive_root = self._get_resource_attribute(self.resource_name, 'Configuration Archive Path')
+        except Exception as e:
+            self.logger.debug('Configuration Archive Path attribute is not available: {0}'.format(e))
+        if not archive_root:
+            try:
+                archive_root = getattr(inject.instance('config'), 'CONFIGURATION_ARCHIVE_PATH', None)
+            except Exception:
+                archive_root = None
+        if not archive_root:
+            raise Exception('Brocade OS', "Configuration archive folder is not set, use 'archive:///<absolute path>', "
+                                          "'Configuration Archive Path' attribute or CONFIGURATION_ARCHIVE_PATH config")
+        if folder:
+            return os.path.join(archive_root, folder)
+        return archive_root
+
+    def restore_configuration(self, source_file, config_type, restore_method='override', vrf=None,
+                              paste_max_size=None):
         """Restore configuration on device from provided configuration file
         Restore configuration from local file system or ftp/tftp server into 'running-config' or 'startup-config'.
         :param source_file: relative path to the file on the remote host tftp://server/sourcefile
-        :param restore_method: override current config or not
+        :param restore_method: override current config or not, 'incremental' pushes only difference between
+            running-config and source file, source should be readable locally: ftp://, file://, local path or
+            archive://[folder/]<hash>
+        :param paste_max_size: append configs up to this size (bytes) to running-config by pasting them over cli
+            session instead of copy from file server, bigger or not locally readable files are copied
         :return:
         """
 
-        if not re.search('append|override', restore_method.lower()):
-            raise Exception('Brocade OS', "Restore method is wrong! Should be Append or Override")
+        if not re.search('append|override|incremental', restore_method.lower()):
+            raise Exception('Brocade OS', "Restore method is wrong! Should be Append, Override or Incremental")
 
         if '-config' not in config_type:
             config_type = config_type.lower() + '-config'
@@ -348,6 +762,13 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
                                   expected_map={'\?|[confirm]': lambda session: session.send_line('')})
 
             is_uploaded = self.copy(source_file=source_file, destination_file=destination_filename, vrf=vrf)
+        elif restore_method.lower() == 'incremental':
+            if destination_filename != 'running-config':
+                raise Exception('Brocade OS', 'Incremental restore is supported for running-config only')
+            is_uploaded = self._restore_incremental(source_file)
+        elif paste_max_size and restore_method.lower() == 'append' and destination_filename == 'running-config' \
+                and self._is_pasted(source_file, paste_max_size):
+            is_uploaded = (True, '')
         elif (restore_method.lower() == 'override') and (destination_filename == 'running-config'):
 
             if not self._check_replace_command():
@@ -367,10 +788,129 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
         else:
             raise Exception('Brocade OS', is_downloaded[1])
 
+    def _read_source_config(self, source_file):
+        """Read configuration file content locally
+
+        :param source_file: archive://[folder/]<hash>, local path or url supported by urlopen (ftp://, file://)
+        :rtype: str
+        """
+
+        if source_file.startswith(ARCHIVE_SCHEME):
+            archive_path = source_file[len(ARCHIVE_SCHEME):]
+            archive = BrocadeConfigurationArchive(self._get_archive_root(os.path.dirname(archive_path) or None))
+            return archive.get_config(os.path.basename(archive_path))
+        if os.path.isfile(source_file):
+            with open(source_file, 'r') as source:
+                return source.read()
+        if source_file.lower().startswith('tftp://'):
+            raise Exception('Brocade OS', 'Incremental restore cannot read configuration from tftp server')
+        response = urlopen(source_file, timeout=60)
+        try:
+            return response.read()
+        finally:
+            response.close()
+
+    def _restore_incremental(self, source_file):
+        """Push only commands which turn running-config into provided configuration
+
+        :return: tuple(True or False, 'Success or Error message')
+        """
+
+        target_config = parse_config(self._read_source_config(source_file))
+        running_config = parse_config(self._get_configuration_content('running-config'))
+        commands = get_config_diff(running_config, target_config)
+        if not commands:
+            self.logger.info('Running-config already matches {0}'.format(source_file))
+            return True, ''
+
+        self.logger.info('Incremental restore, sending {0} commands:\n{1}'.format(len(commands), '\n'.join(commands)))
+        return self._send_config_chunks(commands, chunk_size=INCREMENTAL_RESTORE_CHUNK_SIZE)
+
+    @staticmethod
+    def _get_cli_error(output):
+        """Find error reported by device in config mode output
+
+        :return: error line or None
+        """
+
+        match_error = re.search(r'^\s*(%\s*)?([Ee]rror|[Ii]nvalid input|[Ss]yntax error|[Cc]ommand rejected).*',
+                                output, re.MULTILINE)
+        if match_error:
+            return match_error.group().strip()
+        return None
+
+    def _send_config_chunks(self, commands, chunk_size=20):
+        """Send config commands in chunks within one config session, every chunk waits for device prompt
+        and is checked for errors before the next one is sent, nothing is sent after the first failed chunk
+
+        :return: tuple(True or False, 'Success or Error message')
+        """
+
+        expected_map = {'[\[\(][Yy]es/[Nn]o[\)\]]|\[confirm\]': lambda session: session.send_line('yes'),
+                        '[\[\(][Yy]/[Nn][\)\]]': lambda session: session.send_line('y')}
+        try:
+            for start in range(0, len(commands), chunk_size):
+                output = self.cli.send_command_list(commands[start:start + chunk_size], expected_map=expected_map)
+                error = self._get_cli_error(output)
+                if error:
+                    return False, 'Configuration failed in lines {0}-{1}, {2} lines were not sent: {3}'.format(
+                        start + 1, min(start + chunk_size, len(commands)), max(len(commands) - start - chunk_size, 0),
+                        error)
+        finally:
+            self.cli.exit_configuration_mode()
+        return True, ''
+
+    def _is_pasted(self, source_file, paste_max_size, chunk_size=20):
+        """Paste small configuration file over cli config session
+
+        :return: True if configuration was pasted, False if it should be copied from file server
+        """
+
+        try:
+            content = self._read_source_config(source_file)
+        except Exception as e:
+            self.logger.info('Cannot read {0} locally, copy will be used: {1}'.format(source_file, e))
+            return False
+        if len(content) > paste_max_size:
+            self.logger.info('{0} is {1} bytes, above paste limit, copy will be used'.format(source_file, len(content)))
+            return False
+
+        commands = get_config_diff(OrderedDict(), parse_config(content))
+        self.logger.info('Pasting {0} commands from {1}'.format(len(commands), source_file))
+        is_pasted, message = self._send_config_chunks(commands, chunk_size=chunk_size)
+        if not is_pasted:
+            raise Exception('Brocade OS', message)
+        return True
+
+    def _get_device_firmware_version(self):
+        """Running firmware version read from device once per firmware activation
+
+        :return: version, i.e. '7.2.0a', or None if it is not reported
+        """
+
+        if self._firmware_version is None:
+            self._firmware_version = get_firmware_version(self.cli.send_command(command='show version'))
+        return self._firmware_version
+
+    def _get_capability(self, name, probe):
+        """Get cli capability from model and firmware capability cache, probe device if cache is not available,
+        cache is keyed on firmware version running on device, so it is not reused after firmware change"""
+
+        try:
+            capability_cache = get_resource_capability_cache(self.api, self.resource_name,
+                                                             firmware_version=self._get_device_firmware_version())
+        except Exception as e:
+            self.logger.debug('Capability cache is not available: {0}'.format(e))
+            return probe()
+        return capability_cache.get(name, probe)
+
     def _check_replace_command(self):
-        """Checks whether replace command exist on device or not
+        """Checks whether replace command exist on device or not, result is cached per model and firmware
         """
 
+        return self._get_capability('configure_replace', self._probe_replace_command)
+
+    def _probe_replace_command(self):
         output = self.cli.send_command('configure replace')
         if re.search('invalid (input|command)', output.lower()):
             return False
@@ -402,7 +942,11 @@ class BrocadeConfigurationOperations(ConfigurationOperationsInterface, FirmwareO
         """
 
         cmd = 'dir {0}:'.format(partition)
-        output = self.cli.send_command(command=cmd, retries=100)
+        output = self.cli.send_command(command=cmd)
+
+        match_free = re.search(r'(\d+)\s+bytes\s+free', output, re.IGNORECASE)
+        if match_free:
+            return int(match_free.group(1))
 
         find_str = 'bytes total ('
         position = output.find(find_str)
@@ -1,15 +1,38 @@
 import inject
 from collections import OrderedDict
 import re
+import threading
+import time
 
 from cloudshell.networking.networking_utils import *
 from cloudshell.networking.operations.connectivity_operations import ConnectivityOperations
 from cloudshell.networking.brocade.command_templates.ethernet import ETHERNET_COMMANDS_TEMPLATES
 from cloudshell.networking.brocade.command_templates.vlan import VLAN_COMMANDS_TEMPLATES
 from cloudshell.networking.brocade.command_templates.brocade_interface import ENTER_INTERFACE_CONF_MODE
+from cloudshell.networking.brocade.device_capabilities import get_interface_type, get_firmware_version, \
+    get_resource_capability_cache
+from cloudshell.networking.brocade.running_config_model import BrocadeRunningConfig
+from cloudshell.networking.brocade.vlan_ranges import VlanSet
 from cloudshell.cli.command_template.command_template_service import add_templates, get_commands_list
 from cloudshell.shell.core.context_utils import get_resource_name
 
+PORT_NAME_INDEX_TTL = 300
+RUNNING_CONFIG_TTL = 60
+CLI_MAX_LINE_LENGTH = 250
+
+_port_name_indexes = {}
+_port_name_indexes_lock = threading.Lock()
+
+
+def invalidate_port_name_index(resource_name=None):
+    """Drop cached port address -> name index of the resource, or of all resources"""
+
+    with _port_name_indexes_lock:
+        if resource_name is None:
+            _port_name_indexes.clear()
+        else:
+            _port_name_indexes.pop(resource_name, None)
+
 
 class BrocadeConnectivityOperations(ConnectivityOperations):
     def __init__(self, cli=None, logger=None, api=None, resource_name=None):
@@ -17,6 +40,9 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
         self._cli = cli
         self._logger = logger
         self._api = api
+        self._running_config = None
+        self._running_config_time = None
+        self._firmware_version = None
         try:
             self.resource_name = get_resource_name()
         except Exception:
@@ -80,11 +106,101 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
                 return result
         return result
 
+    def _get_device_firmware_version(self):
+        """Running firmware version read from device once per operations object
+
+        :return: version, i.e. '7.2.0a', or None if it is not reported
+        """
+
+        if self._firmware_version is None:
+            self._firmware_version = get_firmware_version(self.cli.send_command('show version'))
+        return self._firmware_version
+
+    def _get_capability(self, name, probe):
+        """Get cli capability from model and firmware capability cache, probe device if cache is not available,
+        cache is keyed on firmware version running on device, so it is not reused after firmware change"""
+
+        try:
+            capability_cache = get_resource_capability_cache(self.api, self.resource_name,
+                                                             firmware_version=self._get_device_firmware_version())
+        except Exception as e:
+            self.logger.debug('Capability cache is not available: {0}'.format(e))
+            return probe()
+        return capability_cache.get(name, probe)
+
+    def _get_running_config(self, refresh=False):
+        """Running configuration model loaded with one 'show running-config' and updated in memory
+        with applied commands, reloaded after RUNNING_CONFIG_TTL seconds
+
+        :rtype: BrocadeRunningConfig
+        """
+
+        if refresh or self._running_config is None or time.time() - self._running_config_time > RUNNING_CONFIG_TTL:
+            self._running_config = BrocadeRunningConfig(self.cli.send_command('show running-config'))
+            self._running_config_time = time.time()
+        return self._running_config
+
+    def invalidate_running_config(self):
+        """Drop running configuration model, next operation loads it from device"""
+
+        self._running_config = None
+
+    def _send_tracked_config_command_list(self, commands_list, expected_map=None):
+        """Send config commands and apply them to running configuration model,
+        model is dropped if commands failed, as device state is unknown
+
+        :return output from cli
+        """
+
+        try:
+            output = self.send_config_command_list(commands_list, expected_map=expected_map)
+            self._check_vlan_config_output(output)
+        except Exception:
+            self.invalidate_running_config()
+            raise
+        if self._running_config is not None:
+            self._running_config.apply(commands_list + ['exit'])
+        return output
+
+    def _build_port_name_index(self, resource_details_map, index=None):
+        """Map FullAddress of every sub resource to its name
+
+        :param resource_details_map: full device resource structure
+        :return: dict {FullAddress: Name}
+        """
+
+        if index is None:
+            index = {}
+        for child in resource_details_map.ChildResources:
+            index.setdefault(child.FullAddress, child.Name)
+            self._build_port_name_index(child, index)
+        return index
+
+    def _get_port_name_index(self, refresh=False):
+        """Port address -> name index built from one GetResourceDetails call, cached for PORT_NAME_INDEX_TTL seconds
+
+        :return: dict {FullAddress: Name}
+        """
+
+        with _port_name_indexes_lock:
+            cached = _port_name_indexes.get(self.resource_name)
+            if not refresh and cached and time.time() - cached[0] < PORT_NAME_INDEX_TTL:
+                return cached[1]
+        index = self._build_port_name_index(self.api.GetResourceDetails(self.resource_name))
+        with _port_name_indexes_lock:
+            _port_name_indexes[self.resource_name] = (time.time(), index)
+        return index
+
     def _does_interface_support_qnq(self, interface_name):
-        """Validate whether qnq is supported for certain port
+        """Validate whether qnq is supported for certain port, result is cached per interface type,
+        device model and firmware
 
         """
 
+        return self._get_capability('qnq:{0}'.format(get_interface_type(interface_name)),
+                                    lambda: self._probe_interface_qnq(interface_name))
+
+    def _probe_interface_qnq(self, interface_name):
         result = False
         self.cli.send_config_command('interface {0}'.format(interface_name))
         output = self.cli.send_config_command('switchport mode ?')
@@ -116,46 +232,153 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
         :rtype: string
         """
 
-        config = inject.instance('config')
-        supported_os = config.SUPPORTED_OS
         self._load_vlan_command_templates()
-        self.validate_vlan_methods_incoming_parameters(vlan_range, port, port_mode)
+        vlan_set = self.validate_vlan_methods_incoming_parameters(vlan_range, port, port_mode)
         port_name = self.get_port_name(port)
-        self.logger.info('Start vlan configuration: vlan {0}; interface {1}.'.format(vlan_range, port_name))
-        vlan_config_actions = OrderedDict()
-        interface_config_actions = OrderedDict()
-        vlan_config_actions['configure_vlan'] = vlan_range
-        #vlan_config_actions['state_active'] = []
-        #vlan_config_actions['no_shutdown'] = []
+        self.logger.info('Start vlan configuration: vlan {0}; interface {1}.'.format(vlan_set, port_name))
 
-        self.configure_vlan(vlan_config_actions)
-        self.cli.exit_configuration_mode()
+        new_vlans = vlan_set - VlanSet.from_ids(self._get_running_config().vlans)
+        if new_vlans:
+            self._send_tracked_config_command_list(self._get_vlan_creation_commands(new_vlans))
+
+        interface_commands = self._get_interface_vlan_commands(port_name, vlan_set, port_mode, qnq)
+        self._configure_interface(port_name, interface_commands)
+        result = self._get_running_config().get_interface_config(port_name)
+        self.logger.info('Vlan configuration completed: \n{0}'.format(result))
+
+        return 'Vlan Configuration Completed'
+
+    @staticmethod
+    def _get_vlan_range_commands(template_name, vlan_set):
+        """Render vlan set with command template as few commands as possible, every command fits
+        into CLI_MAX_LINE_LENGTH
+
+        :param template_name: command template with single vlan range parameter
+        :param vlan_set: VlanSet
+        :return: list of commands
+        """
+
+        prefix_length = len(get_commands_list(OrderedDict([(template_name, ['1'])]))[0]) - 1
+        commands_list = []
+        for vlan_range in vlan_set.split(CLI_MAX_LINE_LENGTH - prefix_length):
+            commands_list.extend(get_commands_list(OrderedDict([(template_name, [vlan_range])])))
+        return commands_list
+
+    def _get_vlan_creation_commands(self, vlan_set):
+        commands_list = []
+        for command in self._get_vlan_range_commands('configure_vlan', vlan_set):
+            commands_list.extend([command, 'exit'])
+        return commands_list
+
+    def _get_interface_vlan_commands(self, port_name, vlan_set, port_mode, qnq):
+        """Build interface commands for add_vlan, trunk vlans are split into line length bounded commands
+
+        :param vlan_set: VlanSet
+        :return: list of commands, starting with interface command
+        """
 
+        config = inject.instance('config')
+        supported_os = config.SUPPORTED_OS
+        interface_config_actions = OrderedDict()
         interface_config_actions['configure_interface'] = port_name
         interface_config_actions['no_shutdown'] = []
         if supported_os and 'NOS' in supported_os:
             interface_config_actions['switchport'] = []
-        if 'trunk' in port_mode and vlan_range == '':
+        trunk_vlans = None
+        if 'trunk' in port_mode:
             interface_config_actions['switchport_mode_trunk'] = []
-        elif 'trunk' in port_mode and vlan_range != '':
-            interface_config_actions['switchport_mode_trunk'] = []
-            interface_config_actions['trunk_allow_vlan'] = [vlan_range]
-        elif 'access' in port_mode and vlan_range != '':
+            trunk_vlans = vlan_set
+        elif 'access' in port_mode and vlan_set:
             if not qnq or qnq is False:
                 self.logger.info('qnq is {0}'.format(qnq))
                 interface_config_actions['switchport_mode_access'] = []
-            interface_config_actions['access_allow_vlan'] = [vlan_range]
+            interface_config_actions['access_allow_vlan'] = [str(vlan_set)]
+        commands_list = get_commands_list(interface_config_actions)
+        if trunk_vlans:
+            commands_list.extend(self._get_vlan_range_commands('trunk_allow_vlan', trunk_vlans))
         if qnq and qnq is True:
             if not self._does_interface_support_qnq(port_name):
                 raise Exception('interface does not support QnQ')
-            interface_config_actions['qnq'] = []
+            commands_list.extend(get_commands_list(OrderedDict([('qnq', [])])))
+        return commands_list
 
-        self.configure_vlan_on_interface(interface_config_actions)
-        result = self.cli.send_command('show running-config interface {0}'.format(port_name))
-        self.logger.info('Vlan configuration completed: \n{0}'.format(result))
+    def add_vlan_batch(self, vlan_actions):
+        """Configure vlans on many ports in one cli session: every vlan is created once, all interfaces are
+        configured in a single config mode session and verified with one show command,
+        vlans of several actions for the same trunk port are merged
+
+        :param vlan_actions: list of tuples (vlan_range, port, port_mode, qnq), arguments of add_vlan
+        :return: success message
+        :rtype: string
+        """
+
+        self._load_vlan_command_templates()
+        requests = OrderedDict()
+        all_vlans = VlanSet()
+        for vlan_range, port, port_mode, qnq in vlan_actions:
+            vlan_set = self.validate_vlan_methods_incoming_parameters(vlan_range, port, port_mode)
+            port_name = self.get_port_name(port)
+            if port_name in requests:
+                requested_mode, requested_vlans, requested_qnq = requests[port_name]
+                if requested_mode != port_mode or requested_qnq != qnq:
+                    raise Exception('Brocade OS', 'Interface {0} is requested in different modes'.format(port_name))
+                if 'trunk' not in port_mode and requested_vlans != vlan_set:
+                    raise Exception('Brocade OS', 'Interface {0} is requested with different access vlans'.format(
+                        port_name))
+                vlan_set = requested_vlans | vlan_set
+            requests[port_name] = (port_mode, vlan_set, qnq)
+            all_vlans = all_vlans | vlan_set
+        self.logger.info('Start vlan configuration: vlans {0}; interfaces {1}.'.format(
+            all_vlans, ', '.join(requests)))
+
+        running_config = self._get_running_config()
+        commands_list = self._get_vlan_creation_commands(all_vlans - VlanSet.from_ids(running_config.vlans))
+        for port_name, (port_mode, vlan_set, qnq) in requests.iteritems():
+            interface_commands = self._get_interface_vlan_commands(port_name, vlan_set, port_mode, qnq)
+            if running_config.has_switchport(port_name):
+                interface_commands.insert(1, 'no switchport')
+            commands_list.extend(interface_commands)
+            commands_list.append('exit')
+
+        expected_map = {'[\[\(][Yy]es/[Nn]o[\)\]]|\[confirm\]': lambda session: session.send_line('yes'),
+                        '[\[\(][Yy]/[Nn][\)\]]': lambda session: session.send_line('y')}
+        self._send_tracked_config_command_list(commands_list, expected_map=expected_map)
+
+        running_config = self._get_running_config(refresh=True)
+        not_configured = [port_name for port_name, request in requests.iteritems()
+                          if not self._is_vlan_configured(running_config, port_name, *request)]
+        if not_configured:
+            raise Exception('Brocade OS', 'Vlan configuration is not applied to {0}'.format(', '.join(not_configured)))
+        self.logger.info('Vlan configuration completed on {0} interfaces'.format(len(requests)))
 
         return 'Vlan Configuration Completed'
 
+    @staticmethod
+    def _is_vlan_configured(running_config, port_name, port_mode, vlan_set, qnq):
+        """Check that interface in running config has requested switchport mode and vlans
+
+        :type running_config: BrocadeRunningConfig
+        """
+
+        mode = running_config.get_switchport_mode(port_name)
+        if 'trunk' in port_mode:
+            return mode == 'trunk' and not vlan_set - running_config.get_trunk_vlans(port_name)
+        if qnq is True:
+            if mode != 'dot1q-tunnel':
+                return False
+        elif mode not in (None, 'access'):
+            return False
+        return not vlan_set or running_config.get_access_vlan(port_name) in vlan_set
+
+    @staticmethod
+    def _check_vlan_config_output(output):
+        if re.search('[Cc]ommand rejected.*', output):
+            error = 'Command rejected'
+            for line in output.splitlines():
+                if line.lower().startswith('command rejected'):
+                    error = line.strip(' \t\n\r')
+            raise Exception('Brocade OS', 'Failed to assign Vlan, {0}'.format(error))
+
     def remove_vlan(self, vlan_range, port, port_mode):
         """
         Remove vlan from port
@@ -185,6 +408,8 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
         :param vlan_range: vlan range (10,20,30-40)
         :param port_list: list of port resource addresses ([192.168.1.1/0/34, 192.168.1.1/0/42])
         :param port_mode: switchport mode (access or trunk)
+        :return: normalized vlan range
+        :rtype: VlanSet
         """
 
         self.logger.info('Vlan Configuration Started')
@@ -192,8 +417,10 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
             raise Exception('BrocadeHandlerBase', 'Port list is empty')
         if vlan_range == '' and port_mode == 'access':
             raise Exception('BrocadeHandlerBase', 'Switchport type is Access, but vlan id/range is empty')
-        if (',' in vlan_range or '-' in vlan_range) and port_mode == 'access':
+        vlan_set = VlanSet.parse(vlan_range)
+        if len(vlan_set) > 1 and port_mode == 'access':
             raise Exception('BrocadeHandlerBase', 'Only one vlan could be assigned to the interface in Access mode')
+        return vlan_set
 
     def get_port_name(self, port):
         """Get port name from port resource full address
@@ -203,8 +430,10 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
         :rtype: string
         """
 
-        port_resource_map = self.api.GetResourceDetails(self.resource_name)
-        temp_port_full_name = self._get_resource_full_name(port, port_resource_map)
+        temp_port_full_name = self._get_port_name_index().get(port)
+        if not temp_port_full_name:
+            # port could be added after index was built
+            temp_port_full_name = self._get_port_name_index(refresh=True).get(port)
         if not temp_port_full_name:
             self.logger.error('Interface was not found')
             raise Exception('Brocade OS', 'Interface name was not found')
@@ -224,28 +453,21 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
         :rtype: string
         """
 
-        commands_list = get_commands_list(commands_dict)
+        return self._configure_interface(commands_dict['configure_interface'], get_commands_list(commands_dict))
+
+    def _configure_interface(self, port_name, commands_list):
+        """Send interface commands, existing switchport configuration is removed first
 
-        current_config = self.cli.send_command(
-            'show running-config interface {0}'.format(commands_dict['configure_interface']))
+        :param commands_list: list of commands, starting with interface command
+        """
 
         # Brocade only require to nullify the "switchport" command
-        for line in current_config.splitlines():
-            if re.search('switchport', line):
-                line_to_remove = 'switchport'
-                commands_list.insert(1, 'no {0}'.format(line_to_remove.strip(' ')))
-                break
+        if self._get_running_config().has_switchport(port_name):
+            commands_list.insert(1, 'no switchport')
 
         expected_map = {'[\[\(][Yy]es/[Nn]o[\)\]]|\[confirm\]': lambda session: session.send_line('yes'),
                         '[\[\(][Yy]/[Nn][\)\]]': lambda session: session.send_line('y')}
-        output = self.send_config_command_list(commands_list, expected_map=expected_map)
-
-        if re.search('[Cc]ommand rejected.*', output):
-            error = 'Command rejected'
-            for line in output.splitlines():
-                if line.lower().startswith('command rejected'):
-                    error = line.strip(' \t\n\r')
-            raise Exception('Brocade OS', 'Failed to assign Vlan, {0}'.format(error))
+        self._send_tracked_config_command_list(commands_list, expected_map=expected_map)
 
         return 'Finished configuration of ethernet interface!'
 
@@ -259,5 +481,5 @@ class BrocadeConnectivityOperations(ConnectivityOperations):
 
         commands_list = get_commands_list(ordered_parameters_dict)
 
-        self.send_config_command_list(commands_list)
+        self._send_tracked_config_command_list(commands_list)
         return 'Finished configuration of ethernet interface!'
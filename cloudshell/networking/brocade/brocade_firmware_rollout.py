@@ -0,0 +1,225 @@
+import time
+import traceback
+
+import inject
+
+from cloudshell.networking.brocade.parallel_jobs import DestinationLimits, run_parallel
+
+
+class FirmwareJob(object):
+    def __init__(self, configuration_operations, remote_host, file_path, size_of_firmware=None, pair_group=None,
+                 snmp_handler=None):
+        """Single resource firmware upgrade for BrocadeFirmwareRolloutScheduler
+
+        :param configuration_operations: BrocadeConfigurationOperations of the resource
+        :param remote_host: host with firmware
+        :param file_path: relative path on remote host
+        :param size_of_firmware: size in bytes, used if remote host doesn't report file size
+        :param pair_group: redundancy group (i.e. vLAG or MCT pair name), members of one group are never
+            reloaded in the same wave
+        :param snmp_handler: QualiSnmp object of the resource, used to detect end of reload by sysUpTime,
+            overrides handler of configuration_operations
+        """
+
+        self.configuration_operations = configuration_operations
+        self.remote_host = remote_host
+        self.file_path = file_path
+        self.size_of_firmware = size_of_firmware
+        self.pair_group = pair_group
+        if snmp_handler is not None:
+            configuration_operations.snmp_handler = snmp_handler
+        self.resource_name = configuration_operations.resource_name
+        self.firmware_obj = None
+        self.stage = 'pending'
+        self.is_success = False
+        self.result = None
+        self.error = None
+        self.wave = None
+        self.download_duration = 0.0
+        self.activate_duration = 0.0
+
+
+class FirmwareRolloutReport(object):
+    def __init__(self, jobs, waves, duration, abort_reason=None):
+        self.jobs = jobs
+        self.waves = waves
+        self.duration = duration
+        self.abort_reason = abort_reason
+
+    @property
+    def succeeded(self):
+        return [job for job in self.jobs if job.is_success]
+
+    @property
+    def failed(self):
+        return [job for job in self.jobs if job.error]
+
+    @property
+    def skipped(self):
+        return [job for job in self.jobs if not job.is_success and not job.error]
+
+    def summary(self):
+        """Human readable report of the rollout
+
+        :rtype: str
+        """
+
+        lines = ['Firmware rollout finished in {0:.0f}s, {1} waves: {2} succeeded, {3} failed, {4} skipped'.format(
+            self.duration, len(self.waves), len(self.succeeded), len(self.failed), len(self.skipped))]
+        if self.abort_reason:
+            lines.append('Rollout aborted: {0}'.format(self.abort_reason))
+        for job in self.jobs:
+            status = 'OK' if job.is_success else 'FAILED' if job.error else 'SKIPPED'
+            lines.append('{0}\t{1}\t{2}\twave {3}\tdownload {4:.0f}s\tactivate {5:.0f}s\t{6}'.format(
+                status, job.resource_name, job.stage, job.wave, job.download_duration, job.activate_duration,
+                job.error or job.result or ''))
+        return '\n'.join(lines)
+
+
+class BrocadeFirmwareRolloutScheduler(object):
+    def __init__(self, max_download_concurrency=10, max_per_destination=4, canary_count=1, wave_size=4,
+                 max_failed_per_wave=0, health_check=None, wave_delay=0, logger=None):
+        """Upgrade firmware of many resources: all images are downloaded in parallel while devices keep running,
+        then devices are reloaded in waves, canary wave first, next wave starts only if health gate passed
+
+        :param max_download_concurrency: global number of downloads running at the same time
+        :param max_per_destination: number of downloads running at the same time from one tftp/ftp server
+        :param canary_count: number of devices in the first wave
+        :param wave_size: number of devices in every next wave
+        :param max_failed_per_wave: rollout is stopped if more devices failed in a wave
+        :param health_check: callable(job) -> bool called for every upgraded device after wave,
+            rollout is stopped if it returns False
+        :param wave_delay: seconds to wait after wave before health gate, lets routing protocols converge
+        :param logger: logger
+        """
+
+        if wave_size <= 0:
+            raise Exception('Brocade OS', 'Wave size should be positive, got {0}'.format(wave_size))
+        if canary_count < 0:
+            raise Exception('Brocade OS', 'Canary count should not be negative, got {0}'.format(canary_count))
+        self.max_download_concurrency = max_download_concurrency
+        self.max_per_destination = max_per_destination
+        self.canary_count = canary_count
+        self.wave_size = wave_size
+        self.max_failed_per_wave = max_failed_per_wave
+        self.health_check = health_check
+        self.wave_delay = wave_delay
+        self._logger = logger
+        self._destination_limits = DestinationLimits(max_per_destination)
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            try:
+                self._logger = inject.instance('logger')
+            except:
+                raise Exception('Brocade OS', 'Logger is none or empty')
+        return self._logger
+
+    def run(self, jobs):
+        """Download firmware to all resources, then activate it wave by wave
+
+        :param jobs: list of FirmwareJob
+        :rtype: FirmwareRolloutReport
+        """
+
+        start_time = time.time()
+        jobs = list(jobs)
+        self.logger.info('Downloading firmware to {0} devices'.format(len(jobs)))
+        run_parallel(jobs, self._download, self.max_download_concurrency, 'brocade-firmware-download')
+
+        waves = self.plan_waves([job for job in jobs if job.firmware_obj is not None])
+        abort_reason = None
+        for index, wave in enumerate(waves):
+            for job in wave:
+                job.wave = index
+            self.logger.info('Activating firmware, wave {0} of {1}: {2}'.format(
+                index + 1, len(waves), ', '.join(job.resource_name for job in wave)))
+            run_parallel(wave, self._activate, len(wave), 'brocade-firmware-wave')
+            abort_reason = self._check_wave(wave)
+            if abort_reason:
+                self.logger.error('Wave {0} failed health gate: {1}'.format(index + 1, abort_reason))
+                break
+
+        report = FirmwareRolloutReport(jobs, [[job.resource_name for job in wave] for wave in waves],
+                                       time.time() - start_time, abort_reason)
+        self.logger.info(report.summary())
+        return report
+
+    def plan_waves(self, jobs):
+        """Split jobs into waves: canary wave first, then waves of wave_size,
+        members of the same pair group are always placed in different waves
+
+        :return: list of lists of FirmwareJob
+        """
+
+        pending = list(jobs)
+        waves = []
+        size = self.canary_count or self.wave_size
+        while pending:
+            wave = []
+            groups = set()
+            for job in list(pending):
+                if len(wave) >= size:
+                    break
+                if job.pair_group is not None and job.pair_group in groups:
+                    continue
+                wave.append(job)
+                groups.add(job.pair_group)
+                pending.remove(job)
+            waves.append(wave)
+            size = self.wave_size
+        return waves
+
+    def _download(self, job):
+        start_time = time.time()
+        job.stage = 'download'
+        try:
+            with self._destination_limits.get(job.remote_host):
+                job.firmware_obj = job.configuration_operations.download_firmware(job.remote_host, job.file_path,
+                                                                                  job.size_of_firmware)
+            job.stage = 'downloaded'
+        except Exception as e:
+            job.error = str(e)
+            self.logger.error('Firmware download to {0} failed: {1}'.format(job.resource_name, job.error))
+            self.logger.debug(traceback.format_exc())
+        job.download_duration = time.time() - start_time
+
+    def _activate(self, job):
+        start_time = time.time()
+        job.stage = 'activate'
+        try:
+            job.result = job.configuration_operations.activate_firmware(job.firmware_obj)
+            job.stage = 'activated'
+            job.is_success = True
+        except Exception as e:
+            job.error = str(e)
+            self.logger.error('Firmware activation on {0} failed: {1}'.format(job.resource_name, job.error))
+            self.logger.debug(traceback.format_exc())
+        job.activate_duration = time.time() - start_time
+
+    def _check_wave(self, wave):
+        """Health gate between waves
+
+        :return: abort reason or None if next wave can start
+        """
+
+        failed = [job.resource_name for job in wave if not job.is_success]
+        if len(failed) > self.max_failed_per_wave:
+            return 'firmware activation failed on {0}'.format(', '.join(failed))
+        if self.wave_delay:
+            time.sleep(self.wave_delay)
+        if self.health_check:
+            for job in wave:
+                if not job.is_success:
+                    continue
+                try:
+                    is_healthy = self.health_check(job)
+                except Exception as e:
+                    self.logger.error('Health check of {0} failed: {1}'.format(job.resource_name, e))
+                    is_healthy = False
+                if not is_healthy:
+                    job.is_success = False
+                    job.error = 'Health check failed'
+                    return 'health check failed on {0}'.format(job.resource_name)
+        return None
@@ -0,0 +1,205 @@
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from cloudshell.networking.brocade.local_storage import make_folder, get_safe_file_name, load_json, save_json
+
+_archive_locks = {}
+_archive_locks_lock = threading.Lock()
+
+
+def _get_archive_lock(root):
+    with _archive_locks_lock:
+        if root not in _archive_locks:
+            _archive_locks[root] = threading.Lock()
+        return _archive_locks[root]
+
+
+def get_config_hash(content):
+    """sha256 of configuration text
+
+    :rtype: str
+    """
+
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _to_text(data):
+    if isinstance(data, bytes):
+        return data.decode('utf-8')
+    return data
+
+
+def _to_bytes(data):
+    if isinstance(data, bytes):
+        return data
+    return data.encode('utf-8')
+
+
+class BrocadeConfigurationArchive(object):
+    def __init__(self, root, use_deltas=False, max_delta_chain=10):
+        """Content addressed configuration archive, every unique configuration is stored once, gzip compressed,
+        every device keeps history of references to stored configurations
+
+        Layout: <root>/objects/<hash>.gz - full config, <root>/objects/<hash>.delta.gz - delta against
+        another object, <root>/devices/<device>.json - device history
+
+        :param root: archive folder, must be durable storage, temporary local storage is never used
+        :param use_deltas: store new configuration as delta against previous configuration of the device
+        :param max_delta_chain: max number of deltas applied to restore configuration, full copy is stored above it
+        """
+
+        if not root:
+            raise Exception('Brocade OS', 'Configuration archive folder is not set')
+        self.root = make_folder(os.path.abspath(root))
+        self.objects_folder = make_folder(os.path.join(self.root, 'objects'))
+        self.devices_folder = make_folder(os.path.join(self.root, 'devices'))
+        self.use_deltas = use_deltas
+        self.max_delta_chain = max_delta_chain
+        self._lock = _get_archive_lock(self.root)
+
+    def _get_object_path(self, config_hash, is_delta=False):
+        return os.path.join(self.objects_folder, config_hash + ('.delta.gz' if is_delta else '.gz'))
+
+    def _get_history_path(self, device_name):
+        return os.path.join(self.devices_folder, get_safe_file_name(device_name) + '.json')
+
+    def has_config(self, config_hash):
+        return os.path.isfile(self._get_object_path(config_hash)) or \
+            os.path.isfile(self._get_object_path(config_hash, is_delta=True))
+
+    @staticmethod
+    def _write_gzip(path, data):
+        temp_path = path + '.tmp'
+        gzip_file = gzip.open(temp_path, 'wb')
+        try:
+            gzip_file.write(data)
+        finally:
+            gzip_file.close()
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+
+    @staticmethod
+    def _read_gzip(path):
+        gzip_file = gzip.open(path, 'rb')
+        try:
+            return gzip_file.read()
+        finally:
+            gzip_file.close()
+
+    def _get_delta_chain_length(self, config_hash):
+        length = 0
+        while os.path.isfile(self._get_object_path(config_hash, is_delta=True)):
+            delta = json.loads(self._read_gzip(self._get_object_path(config_hash, is_delta=True)))
+            config_hash = delta['base']
+            length += 1
+        return length
+
+    @staticmethod
+    def _build_delta(base_content, content):
+        """Line based delta: ['c', start, end] copies base lines, ['i', lines] inserts new lines,
+        both contents are compared as unicode, same as inserted lines loaded from json"""
+
+        base_lines = _to_text(base_content).splitlines(True)
+        lines = _to_text(content).splitlines(True)
+        operations = []
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, base_lines, lines, autojunk=False).get_opcodes():
+            if tag == 'equal':
+                operations.append(['c', i1, i2])
+            elif j2 > j1:
+                operations.append(['i', lines[j1:j2]])
+        return operations
+
+    @staticmethod
+    def _apply_delta(base_content, operations):
+        """Restore content from base content and delta operations
+
+        :return: utf-8 encoded content
+        """
+
+        base_lines = _to_text(base_content).splitlines(True)
+        lines = []
+        for operation in operations:
+            if operation[0] == 'c':
+                lines.extend(base_lines[operation[1]:operation[2]])
+            else:
+                lines.extend(operation[1])
+        return u''.join(lines).encode('utf-8')
+
+    def _store_object(self, config_hash, content, base_hash=None):
+        content = _to_bytes(content)
+        if base_hash and self._get_delta_chain_length(base_hash) < self.max_delta_chain:
+            try:
+                operations = self._build_delta(self.get_config(base_hash), content)
+            except UnicodeDecodeError:
+                # configuration which is not valid utf-8 is stored as is
+                operations = None
+            if operations is not None:
+                delta = json.dumps({'base': base_hash, 'ops': operations})
+                if len(delta) < len(content):
+                    self._write_gzip(self._get_object_path(config_hash, is_delta=True), delta)
+                    return
+        self._write_gzip(self._get_object_path(config_hash), content)
+
+    def store(self, device_name, config_type, content):
+        """Store configuration and add reference to device history
+
+        :param device_name: resource name
+        :param config_type: 'running-config' or 'startup-config'
+        :param content: configuration text
+        :return: tuple (configuration hash, True if configuration content was not archived before)
+        """
+
+        config_hash = get_config_hash(content)
+        with self._lock:
+            history = self.get_history(device_name)
+            is_new = not self.has_config(config_hash)
+            if is_new:
+                base_hash = None
+                if self.use_deltas:
+                    previous = [entry for entry in history if entry['config_type'] == config_type]
+                    base_hash = previous[-1]['hash'] if previous else None
+                self._store_object(config_hash, content, base_hash)
+            history.append({'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+                            'config_type': config_type, 'hash': config_hash})
+            save_json(self._get_history_path(device_name), history)
+        return config_hash, is_new
+
+    def get_config(self, config_hash):
+        """Restore configuration text by hash, deltas are applied recursively
+
+        :return: utf-8 encoded configuration
+        :rtype: str
+        """
+
+        full_path = self._get_object_path(config_hash)
+        if os.path.isfile(full_path):
+            return self._read_gzip(full_path)
+        delta_path = self._get_object_path(config_hash, is_delta=True)
+        if not os.path.isfile(delta_path):
+            raise Exception('Brocade OS', 'Configuration {0} is not found in archive'.format(config_hash))
+        delta = json.loads(self._read_gzip(delta_path))
+        return self._apply_delta(self.get_config(delta['base']), delta['ops'])
+
+    def get_history(self, device_name):
+        """Get device history, oldest first
+
+        :return: list of dicts {'timestamp': '', 'config_type': '', 'hash': ''}
+        """
+
+        return load_json(self._get_history_path(device_name), default=[])
+
+    def get_last_hash(self, device_name, config_type):
+        """Get hash of the last archived configuration of provided type or None"""
+
+        history = [entry for entry in self.get_history(device_name) if entry['config_type'] == config_type]
+        if history:
+            return history[-1]['hash']
+        return None
@@ -0,0 +1,106 @@
+import re
+from collections import OrderedDict
+
+IGNORED_LINE_PATTERN = re.compile(r'^\s*(!.*)?$')
+PHYSICAL_INTERFACE_PATTERN = re.compile(
+    r'^interface\s+(ethernet|management|(ten|forty|hundred|twentyfive|fifty)?gigabitethernet)\s', re.IGNORECASE)
+
+# top level sections which are never removed when missing in target configuration, removing them drops
+# fabric membership, management access or accounts, lines inside them are negated only if target has the section
+PROTECTED_SECTIONS = ('rbridge-id', 'username', 'aaa', 'role', 'rule', 'password-attributes', 'vcs', 'fabric',
+                      'license', 'ssh', 'telnet')
+
+# commands which are not removed by simple 'no <line>', checked in order, first match wins
+NEGATION_RULES = [
+    (re.compile(r'^(switchport trunk allowed vlan) add (.+)$'), r'\1 remove \2'),
+    (re.compile(r'^(switchport trunk allowed vlan) remove (.+)$'), r'\1 add \2'),
+    (re.compile(r'^(switchport trunk allowed vlan) all$'), r'\1 none'),
+    (re.compile(r'^(switchport access vlan) \S+$'), r'no \1'),
+    (re.compile(r'^(switchport trunk native-vlan) \S+$'), r'no \1'),
+    (re.compile(r'^(switchport mode) \S+$'), r'no \1'),
+    (re.compile(r'^(description|hostname|port-name|banner \S+) .+$'), r'no \1'),
+]
+
+
+def parse_config(text):
+    """Parse configuration into hierarchical sections by indentation
+
+    :param text: configuration text
+    :return: OrderedDict {line: OrderedDict of child lines}
+    """
+
+    root = OrderedDict()
+    stack = [(-1, root)]
+    for raw_line in text.splitlines():
+        if IGNORED_LINE_PATTERN.match(raw_line):
+            continue
+        line = raw_line.rstrip()
+        indent = len(line) - len(line.lstrip(' '))
+        while stack[-1][0] >= indent:
+            stack.pop()
+        children = stack[-1][1].setdefault(line.strip(), OrderedDict())
+        stack.append((indent, children))
+    return root
+
+
+def _negate(line):
+    for pattern, replacement in NEGATION_RULES:
+        if pattern.match(line):
+            return pattern.sub(replacement, line)
+    if line.startswith('no '):
+        return line[3:]
+    return 'no ' + line
+
+
+def _remove_section(commands, line, children):
+    """Physical interfaces cannot be deleted, their config lines are negated instead"""
+
+    if not PHYSICAL_INTERFACE_PATTERN.match(line):
+        commands.append(_negate(line))
+    elif children:
+        commands.append(line)
+        commands.extend(_negate(child) for child in children)
+        commands.append('exit')
+
+
+def _add_section(commands, line, children):
+    commands.append(line)
+    if children:
+        for child, grandchildren in children.iteritems():
+            _add_section(commands, child, grandchildren)
+        commands.append('exit')
+
+
+def _is_protected(line, protected_sections):
+    return line.split(' ', 1)[0] in protected_sections
+
+
+def get_config_diff(current, target, protected_sections=PROTECTED_SECTIONS):
+    """Calculate commands which turn current configuration into target one
+
+    Removed lines are negated inside their section before new lines are added, commands without plain
+    'no <line>' form are negated with NEGATION_RULES, physical interfaces missing in target configuration
+    are cleared instead of removed, protected top level sections missing in target configuration are kept,
+    sections which exist in both configurations are entered only if something changed inside them.
+
+    :param current: parsed running configuration from parse_config
+    :param target: parsed target configuration from parse_config
+    :param protected_sections: first words of top level sections which are never removed
+    :return: list of commands, sections are closed with 'exit'
+    :rtype: list
+    """
+
+    commands = []
+    for line, children in current.iteritems():
+        if line not in target and not _is_protected(line, protected_sections):
+            _remove_section(commands, line, children)
+    for line, children in target.iteritems():
+        if line not in current:
+            _add_section(commands, line, children)
+        elif children or current[line]:
+            child_commands = get_config_diff(current[line], children, protected_sections=())
+            if child_commands:
+                commands.append(line)
+                commands.extend(child_commands)
+                commands.append('exit')
+    return commands
@@ -0,0 +1,116 @@
+import re
+import time
+
+BYTES_PER_MARK_PATTERN = re.compile(r'(\d+)\s+bytes\s+per\s+(?:dot|mark|!)', re.IGNORECASE)
+BYTES_PATTERN = re.compile(r'(\d+)\s+bytes(?!\s+per)', re.IGNORECASE)
+PERCENT_PATTERN = re.compile(r'(\d{1,3})\s*%')
+MARKS_PATTERN = re.compile(r'(?<![\w.!])[.!]+(?![\w!])')
+PROGRESS_PATTERN = r'[.!]{2,}|\d+\s*%|\d+\s+bytes'
+
+
+class CopyProgress(object):
+    def __init__(self, expected_size=None, bytes_per_mark=None):
+        """Incremental parser of copy command output
+
+        Understands progress marks ('.' or '!' with optional 'N bytes per dot' header), percentage and
+        'N bytes' counters printed by device while file is transferred.
+
+        :param expected_size: size of transferred file in bytes, used for percentage and eta calculation
+        :param bytes_per_mark: bytes transferred per progress mark, if device doesn't report it
+        """
+
+        self.expected_size = expected_size
+        self.bytes_per_mark = bytes_per_mark
+        self.marks = 0
+        self.reported_bytes = None
+        self.reported_percent = None
+        self.started = time.time()
+        self.last_progress = None
+
+    def feed(self, text):
+        """Parse next chunk of output
+
+        :return: True if progress was made
+        :rtype: bool
+        """
+
+        previous = (self.marks, self.reported_bytes, self.reported_percent)
+        match_bytes_per_mark = BYTES_PER_MARK_PATTERN.search(text)
+        if match_bytes_per_mark:
+            self.bytes_per_mark = int(match_bytes_per_mark.group(1))
+        self.marks += sum(len(marks) for marks in MARKS_PATTERN.findall(text))
+        reported_bytes = [int(value) for value in BYTES_PATTERN.findall(text)]
+        if reported_bytes:
+            self.reported_bytes = max(reported_bytes + [self.reported_bytes or 0])
+        percents = [int(value) for value in PERCENT_PATTERN.findall(text) if int(value) <= 100]
+        if percents:
+            self.reported_percent = max(percents + [self.reported_percent or 0])
+
+        is_progress = previous != (self.marks, self.reported_bytes, self.reported_percent)
+        if is_progress:
+            self.last_progress = time.time()
+        return is_progress
+
+    def mark_progress(self):
+        """Record progress which text is not available, i.e. reported by cli action map"""
+
+        self.last_progress = time.time()
+
+    @property
+    def bytes_transferred(self):
+        """Best known number of transferred bytes or None"""
+
+        candidates = []
+        if self.reported_bytes is not None:
+            candidates.append(self.reported_bytes)
+        if self.bytes_per_mark and self.marks:
+            candidates.append(self.marks * self.bytes_per_mark)
+        if self.reported_percent is not None and self.expected_size:
+            candidates.append(self.expected_size * self.reported_percent // 100)
+        if candidates:
+            return max(candidates)
+        return None
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    @property
+    def stalled_for(self):
+        """Seconds since last progress, None until the first progress is reported,
+        so slow transfer start (i.e. server lookup, file open) is not treated as a stall
+        """
+
+        if self.last_progress is None:
+            return None
+        return time.time() - self.last_progress
+
+    @property
+    def throughput(self):
+        """Bytes per second or None"""
+
+        transferred = self.bytes_transferred
+        if transferred is None or self.elapsed <= 0:
+            return None
+        return transferred / self.elapsed
+
+    @property
+    def eta(self):
+        """Seconds left or None if expected size or throughput is unknown"""
+
+        transferred = self.bytes_transferred
+        throughput = self.throughput
+        if not self.expected_size or not throughput or transferred is None:
+            return None
+        return max(self.expected_size - transferred, 0) / throughput
+
+    def __str__(self):
+        transferred = self.bytes_transferred
+        if transferred is None:
+            return 'Copy in progress, {0} progress marks, {1:.0f}s elapsed'.format(self.marks, self.elapsed)
+        message = 'Copied {0} bytes in {1:.0f}s'.format(transferred, self.elapsed)
+        if self.throughput:
+            message += ', {0:.1f} KB/s'.format(self.throughput / 1024)
+        if self.eta is not None:
+            message += ', eta {0:.0f}s'.format(self.eta)
+        return message
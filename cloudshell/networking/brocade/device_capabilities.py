@@ -0,0 +1,104 @@
+import re
+import threading
+
+from cloudshell.networking.brocade.local_storage import get_storage_path, load_json, save_json
+
+# 'Network Operating System Version: 7.2.0a' line of 'show version' output
+FIRMWARE_VERSION_PATTERN = re.compile(r'[Vv]ersion\s*:?\s*([\w.()-]+)')
+
+_capability_caches = {}
+_capability_caches_lock = threading.Lock()
+
+
+def get_interface_type(interface_name):
+    """Interface name without numbers, i.e. 'TenGigabitEthernet 1/0/1' -> 'tengigabitethernet'"""
+
+    return re.sub(r'[\d/:.\s]+', '', interface_name).lower()
+
+
+def get_firmware_version(show_version_output):
+    """Running firmware version from 'show version' output, i.e. '7.2.0a', None if it is not reported"""
+
+    match_version = FIRMWARE_VERSION_PATTERN.search(show_version_output)
+    if match_version:
+        return match_version.group(1)
+    return None
+
+
+class BrocadeCapabilityCache(object):
+    def __init__(self, model, firmware_version):
+        """Results of cli feature probes (command support, interface modes, etc.) shared by all devices
+        of the same model and firmware version, persisted in local storage, so a firmware upgrade starts
+        with empty cache
+
+        :param model: device model
+        :param firmware_version: device firmware version
+        """
+
+        self.model = model
+        self.firmware_version = firmware_version
+        self._path = get_storage_path('cli_capabilities', '{0}_{1}'.format(model, firmware_version))
+        self._lock = threading.Lock()
+        data = load_json(self._path, default={})
+        if data.get('firmware_version') == firmware_version:
+            self._capabilities = data.get('capabilities', {})
+        else:
+            self._capabilities = {}
+
+    def get(self, name, probe):
+        """Get cached capability, probe is called only if capability is unknown for model and firmware
+
+        :param name: capability name, i.e. 'configure_replace'
+        :param probe: callable without arguments returning capability value
+        """
+
+        with self._lock:
+            if name in self._capabilities:
+                return self._capabilities[name]
+        value = probe()
+        with self._lock:
+            self._capabilities[name] = value
+            save_json(self._path, {'model': self.model, 'firmware_version': self.firmware_version,
+                                   'capabilities': self._capabilities})
+        return value
+
+    def invalidate(self, name=None):
+        """Drop one or all cached capabilities"""
+
+        with self._lock:
+            if name is None:
+                self._capabilities = {}
+            else:
+                self._capabilities.pop(name, None)
+            save_json(self._path, {'model': self.model, 'firmware_version': self.firmware_version,
+                                   'capabilities': self._capabilities})
+
+
+def get_capability_cache(model, firmware_version):
+    """Capability cache shared in the process by model and firmware version
+
+    :rtype: BrocadeCapabilityCache
+    """
+
+    with _capability_caches_lock:
+        key = (model, firmware_version)
+        if key not in _capability_caches:
+            _capability_caches[key] = BrocadeCapabilityCache(model, firmware_version)
+        return _capability_caches[key]
+
+
+def get_resource_capability_cache(api, resource_name, firmware_version=None):
+    """Capability cache for resource model taken from resource 'Model' attribute and firmware version,
+    'OS Version' attribute is used if firmware version is not provided
+
+    :param firmware_version: firmware version read from device, 'OS Version' attribute is stale
+        after firmware change until next autoload
+    :rtype: BrocadeCapabilityCache
+    """
+
+    model = api.GetAttributeValue(resource_name, 'Model').Value
+    if not firmware_version:
+        firmware_version = api.GetAttributeValue(resource_name, 'OS Version').Value
+    if not model or not firmware_version:
+        raise Exception('Brocade OS', 'Model or OS Version of {0} is unknown'.format(resource_name))
+    return get_capability_cache(model, firmware_version)
@@ -0,0 +1,106 @@
+import random
+import socket
+import time
+
+DEFAULT_CLI_PORTS = {'SSH': 22, 'TELNET': 23}
+
+
+def is_tcp_port_open(host, port, timeout=2):
+    """Check if tcp connection to host:port can be established
+
+    :rtype: bool
+    """
+
+    try:
+        connection = socket.create_connection((host, int(port)), timeout)
+    except (socket.error, socket.timeout, ValueError):
+        return False
+    connection.close()
+    return True
+
+
+def get_backoff_intervals(initial_interval=2, max_interval=30, jitter=0.5):
+    """Endless generator of exponentially growing wait intervals, every interval is randomized
+    in range [interval * (1 - jitter), interval] so probes of many devices don't synchronize
+    """
+
+    interval = initial_interval
+    while True:
+        yield interval * (1 - jitter * random.random())
+        interval = min(interval * 2, max_interval)
+
+
+def wait_for(check, deadline, initial_interval=2, max_interval=30, logger=None, description='device'):
+    """Call check with exponential backoff until it returns True or deadline is reached
+
+    :param check: callable without arguments returning True on success, exceptions are treated as failure
+    :param deadline: absolute time (time.time()) to give up at
+    :return: True if check succeeded before deadline
+    :rtype: bool
+    """
+
+    for interval in get_backoff_intervals(initial_interval, max_interval):
+        try:
+            if check():
+                return True
+        except Exception as e:
+            if logger:
+                logger.debug('Waiting for {0}: {1}'.format(description, e))
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        if logger:
+            logger.debug('Waiting for {0}, next probe in {1:.1f} seconds'.format(description, interval))
+        time.sleep(min(interval, remaining))
+
+
+class BrocadeReachabilityProbe(object):
+    def __init__(self, host, port=None, snmp_handler=None, logger=None, connect_timeout=2):
+        """Cheap probes of device management plane used while device reloads
+
+        :param host: management address
+        :param port: cli tcp port, tcp probe is skipped if None
+        :param snmp_handler: QualiSnmp object, snmp probe is skipped if None
+        :param logger: logger
+        :param connect_timeout: tcp connect timeout
+        """
+
+        self.host = host
+        self.port = port
+        self.snmp_handler = snmp_handler
+        self.logger = logger
+        self.connect_timeout = connect_timeout
+
+    def is_tcp_reachable(self):
+        if not self.host or not self.port:
+            return None
+        return is_tcp_port_open(self.host, self.port, self.connect_timeout)
+
+    def get_sys_up_time(self):
+        """sysUpTime in hundredths of a second or None if snmp is not available"""
+
+        if self.snmp_handler is None:
+            return None
+        try:
+            return int(self.snmp_handler.get(('SNMPv2-MIB', 'sysUpTime', 0))['sysUpTime'])
+        except Exception:
+            return None
+
+    def is_down(self):
+        """Device stopped answering on cli port"""
+
+        return self.is_tcp_reachable() is False
+
+    def is_up(self, reload_started=None):
+        """Device answers on cli port and, if snmp is available, its uptime started after reload
+
+        :param reload_started: time.time() when reload command was sent
+        """
+
+        if self.is_tcp_reachable() is False:
+            return False
+        if reload_started is not None:
+            sys_up_time = self.get_sys_up_time()
+            if sys_up_time is not None and sys_up_time / 100.0 > time.time() - reload_started:
+                return False
+        return True
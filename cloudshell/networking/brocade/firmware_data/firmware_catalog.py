@@ -0,0 +1,177 @@
+import hashlib
+import mmap
+import os
+import re
+import threading
+import time
+
+from cloudshell.networking.brocade.local_storage import get_storage_path, load_json, save_json
+from cloudshell.networking.brocade.resource_drivers_map import BROCADE_FIRMWARE_IMAGE_PREFIXES
+
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+IMAGE_EXTENSIONS = ('tar.gz', 'tgz', 'bin')
+IMAGE_NAME_PATTERNS = [
+    # Network OS: nos7.2.0a, nos_v6.0.2b1
+    re.compile(r'^(?P<model>nos)[_-]?v?(?P<version>\d+(\.\d+)+[A-Za-z]?\d*)$', re.IGNORECASE),
+    # single number version: SPS08030b
+    re.compile(r'^(?P<model>.*?[A-Za-z_-])(?P<version>\d{4,}[A-Za-z]?\d*)$'),
+]
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_file_hashes(path, algorithms=('sha256', 'md5'), chunk_size=HASH_CHUNK_SIZE):
+    """Hash file content through read only memory map in one pass, file is never loaded into memory at once
+
+    :return: dict {algorithm: hex digest}
+    """
+
+    file_hashes = [hashlib.new(algorithm) for algorithm in algorithms]
+    with open(path, 'rb') as image_file:
+        size = os.fstat(image_file.fileno()).st_size
+        if size:
+            image_map = mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for offset in range(0, size, chunk_size):
+                    chunk = image_map[offset:offset + chunk_size]
+                    for file_hash in file_hashes:
+                        file_hash.update(chunk)
+            finally:
+                image_map.close()
+    return dict(zip(algorithms, [file_hash.hexdigest() for file_hash in file_hashes]))
+
+
+def get_file_hash(path, algorithm='sha256', chunk_size=HASH_CHUNK_SIZE):
+    """Hash file content through read only memory map
+
+    :rtype: str
+    """
+
+    return get_file_hashes(path, (algorithm,), chunk_size)[algorithm]
+
+
+def _strip_extension(file_name, extensions=IMAGE_EXTENSIONS):
+    for extension in extensions:
+        if file_name.lower().endswith('.' + extension):
+            return file_name[:-len(extension) - 1]
+    return None
+
+
+def parse_image_name(file_name):
+    """Split image file name into model prefix and version, i.e. 'nos7.2.0a.tar.gz' -> ('nos', '7.2.0a')
+
+    :return: tuple (model, version), version is None if name doesn't contain it
+    """
+
+    name = _strip_extension(file_name) or file_name.rsplit('.', 1)[0]
+    for pattern in IMAGE_NAME_PATTERNS:
+        match_name = pattern.match(name)
+        if match_name:
+            return match_name.group('model').rstrip('_-'), match_name.group('version')
+    return name, None
+
+
+def _get_version_key(version):
+    return [int(part) if part.isdigit() else part for part in re.findall(r'\d+|[A-Za-z]+', version or '')]
+
+
+class BrocadeFirmwareCatalog(object):
+    def __init__(self, root, extensions=IMAGE_EXTENSIONS, refresh_interval=300):
+        """Index of firmware images in local repository by model, version and checksum
+
+        Checksums (sha256, and md5 which devices can calculate) are cached in local storage by file path, size
+        and mtime, so only new or changed images are hashed, repository folder is rescanned not more often
+        than refresh_interval.
+
+        :param root: firmware repository folder
+        :param extensions: image file extensions
+        :param refresh_interval: seconds between repository rescans
+        """
+
+        self.root = os.path.abspath(root)
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.refresh_interval = refresh_interval
+        self._cache_path = get_storage_path('firmware_catalog', self.root)
+        self._entries = {}
+        self._refreshed = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Rescan repository, hash new and changed images
+
+        :return: list of image entries
+        """
+
+        with self._lock:
+            if not force and self._refreshed is not None and time.time() - self._refreshed < self.refresh_interval:
+                return self._entries.values()
+            cache = self._entries or load_json(self._cache_path, default={})
+            entries = {}
+            for folder, sub_folders, file_names in os.walk(self.root):
+                for file_name in file_names:
+                    if _strip_extension(file_name, self.extensions) is None:
+                        continue
+                    path = os.path.join(folder, file_name)
+                    relative_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    stat = os.stat(path)
+                    entry = cache.get(relative_path)
+                    if not entry or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime \
+                            or 'md5' not in entry:
+                        model, version = parse_image_name(file_name)
+                        entry = {'path': relative_path, 'file_name': file_name, 'size': stat.st_size,
+                                 'mtime': stat.st_mtime, 'model': model, 'version': version}
+                        entry.update(get_file_hashes(path))
+                    entries[relative_path] = entry
+            if entries != cache:
+                save_json(self._cache_path, entries)
+            self._entries = entries
+            self._refreshed = time.time()
+            return entries.values()
+
+    def get_image_prefixes(self, model):
+        """Image name prefixes used by resource model, i.e. 'Vdx6740' -> ['nos']"""
+
+        for model_pattern, prefixes in BROCADE_FIRMWARE_IMAGE_PREFIXES.items():
+            if re.match(model_pattern, model, re.IGNORECASE):
+                return list(prefixes)
+        return [model]
+
+    def find(self, model, version=None):
+        """Find the newest image for model, or image with provided version
+
+        :param model: resource model or image prefix
+        :param version: image version, i.e. '7.2.0a'
+        :return: entry dict {'path', 'file_name', 'size', 'mtime', 'sha256', 'md5', 'model', 'version'} or None
+        """
+
+        prefixes = [prefix.upper() for prefix in self.get_image_prefixes(model)]
+        candidates = [entry for entry in self.refresh()
+                      if entry['model'].upper() in prefixes and (version is None or entry['version'] == version)]
+        if not candidates:
+            return None
+        candidates.sort(key=lambda entry: (prefixes.index(entry['model'].upper()) * -1,
+                                           _get_version_key(entry['version'])))
+        return candidates[-1]
+
+    def get_by_hash(self, sha256):
+        for entry in self.refresh():
+            if entry['sha256'] == sha256:
+                return entry
+        return None
+
+    def get_full_path(self, entry):
+        return os.path.join(self.root, *entry['path'].split('/'))
+
+
+def get_firmware_catalog(root, **kwargs):
+    """Catalog instance shared by all operations in the process, so repository is not rescanned on every call
+
+    :rtype: BrocadeFirmwareCatalog
+    """
+
+    root = os.path.abspath(root)
+    with _catalogs_lock:
+        if root not in _catalogs:
+            _catalogs[root] = BrocadeFirmwareCatalog(root, **kwargs)
+        return _catalogs[root]
@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import tempfile
+
+import inject
+
+DEFAULT_STORAGE_ROOT = os.path.join(tempfile.gettempdir(), 'cloudshell_networking_brocade')
+# overrides LOCAL_STORAGE_PATH driver config when set
+STORAGE_ROOT = None
+
+
+def get_storage_root():
+    """Get local storage root: STORAGE_ROOT if set, LOCAL_STORAGE_PATH driver config,
+    folder inside system temp folder by default
+
+    :rtype: str
+    """
+
+    if STORAGE_ROOT:
+        return STORAGE_ROOT
+    try:
+        storage_root = getattr(inject.instance('config'), 'LOCAL_STORAGE_PATH', None)
+    except Exception:
+        storage_root = None
+    return storage_root or DEFAULT_STORAGE_ROOT
+
+
+def get_storage_folder(*parts):
+    """Get local storage folder, folder is created if missing
+
+    :param parts: path parts relative to storage root, i.e. 'snmp_rtt'
+    :rtype: str
+    """
+
+    return make_folder(os.path.join(get_storage_root(), *parts))
+
+
+def make_folder(folder):
+    """Create folder with parents if missing, safe for concurrent calls
+
+    :rtype: str
+    """
+
+    if not os.path.isdir(folder):
+        try:
+            os.makedirs(folder)
+        except OSError:
+            if not os.path.isdir(folder):
+                raise
+    return folder
+
+
+def get_safe_file_name(key):
+    return re.sub(r'[^\w.-]+', '_', str(key))
+
+
+def get_storage_path(category, key, extension='json'):
+    """Build path to the local storage file for provided category and key (device address, model, etc.)
+
+    :param category: storage sub folder, i.e. 'snmp_rtt'
+    :param key: item key, will be converted to a safe file name
+    :param extension: file extension
+    :return: full file path, folder is created if missing
+    :rtype: str
+    """
+
+    folder = get_storage_folder(category)
+    file_name = get_safe_file_name(key)
+    if extension:
+        file_name = '{0}.{1}'.format(file_name, extension)
+    return os.path.join(folder, file_name)
+
+
+def load_json(path, default=None):
+    """Read json file, return default if file doesn't exist or is corrupted"""
+
+    if not os.path.isfile(path):
+        return default
+    try:
+        with open(path, 'r') as data_file:
+            return json.load(data_file)
+    except (IOError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    """Write json file through unique temporary file in the same folder and single rename,
+    so readers never see partially written data and concurrent writers don't share temporary file"""
+
+    folder, file_name = os.path.split(path)
+    temp_file, temp_path = tempfile.mkstemp(prefix=file_name + '.', suffix='.tmp', dir=folder or '.')
+    try:
+        with os.fdopen(temp_file, 'w') as data_file:
+            json.dump(data, data_file, indent=1, sort_keys=True)
+        try:
+            os.rename(temp_path, path)
+        except OSError:
+            # rename doesn't replace existing file on Windows
+            if os.name != 'nt' or not os.path.exists(path):
+                raise
+            os.remove(path)
+            os.rename(temp_path, path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,66 @@
+import re
+import threading
+
+
+def get_destination_key(destination_host):
+    """Get file server address from destination url, i.e. 'tftp://10.0.0.1/backups' -> '10.0.0.1'"""
+
+    match_host = re.search(r'://(?:[^@/]*@)?([^/:]+)', destination_host)
+    if match_host:
+        return match_host.group(1)
+    return destination_host
+
+
+def run_parallel(items, function, concurrency, name):
+    """Call function for every item using up to concurrency threads, wait for all of them
+
+    :param items: list of items, processed in provided order
+    :param function: callable(item), exceptions should be handled inside
+    :param concurrency: max number of threads
+    :param name: prefix of thread names
+    """
+
+    pending = list(items)
+    pending.reverse()
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                item = pending.pop()
+            function(item)
+
+    workers = [threading.Thread(target=worker, name='{0}-{1}'.format(name, index))
+               for index in range(min(concurrency, len(pending)))]
+    for thread in workers:
+        thread.daemon = True
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+
+class DestinationLimits(object):
+    def __init__(self, max_per_destination):
+        """Bound number of transfers running at the same time against one tftp/ftp server
+
+        :param max_per_destination: number of transfers per file server
+        """
+
+        self.max_per_destination = max_per_destination
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def get(self, destination_host):
+        """Get semaphore of the file server
+
+        :param destination_host: url, i.e. 'tftp://10.0.0.1/backups'
+        :rtype: threading.BoundedSemaphore
+        """
+
+        key = get_destination_key(destination_host)
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = threading.BoundedSemaphore(self.max_per_destination)
+            return self._limits[key]
@@ -1,6 +1,21 @@
+from collections import OrderedDict
+
 __author__ = 'CoYe'
 
 BROCADE_RESOURCE_DRIVERS_MAP = \
         {
         '131': 'VDX_6740',
         }
+
+# SNMP budget per model: PDUs per second, burst size, requests in flight and varbinds per GET PDU
+BROCADE_SNMP_PROFILES = \
+        {
+        'default': {'pdu_rate': 50, 'burst': 20, 'max_outstanding': 2, 'max_var_binds': 20},
+        'VDX_6740': {'pdu_rate': 100, 'burst': 40, 'max_outstanding': 4, 'max_var_binds': 30},
+        }
+
+# Firmware image name prefixes per resource model pattern (image name without version),
+# checked in order, first matching pattern wins, Network OS images are named nos<version>, i.e. nos7.2.0a.tar.gz
+BROCADE_FIRMWARE_IMAGE_PREFIXES = OrderedDict([
+        (r'VDX', ('nos',)),
+        ])
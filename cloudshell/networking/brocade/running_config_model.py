@@ -0,0 +1,151 @@
+import re
+from collections import OrderedDict
+
+from cloudshell.networking.brocade.configuration_diff import parse_config
+from cloudshell.networking.brocade.vlan_ranges import VlanSet, MIN_VLAN_ID, MAX_VLAN_ID
+
+VLAN_SECTION_PATTERN = re.compile(r'^(?:interface\s+)?vlan\s+(\d+)\b', re.IGNORECASE)
+VLAN_RANGE_SECTION_PATTERN = re.compile(r'^(?:interface\s+)?vlan\s+([\d,\s-]+)$')
+
+
+def _get_key(line):
+    """Normalized section key: lower case with single spaces"""
+
+    return ' '.join(line.lower().split())
+
+
+class BrocadeRunningConfig(object):
+    def __init__(self, text):
+        """Indexed model of 'show running-config' output: interface sections, vlans and switchport state,
+        kept in sync with applied config commands, so no per interface show command is needed
+
+        :param text: output of 'show running-config'
+        """
+
+        self._sections = OrderedDict()
+        self.vlans = set()
+        for line, children in parse_config(text).iteritems():
+            self._add_section(line, children)
+
+    def _add_section(self, line, children=None):
+        key = _get_key(line)
+        if key not in self._sections:
+            self._sections[key] = (line, OrderedDict() if children is None else children)
+        match_vlan = VLAN_SECTION_PATTERN.match(key)
+        if match_vlan:
+            self.vlans.add(int(match_vlan.group(1)))
+        return self._sections[key][1]
+
+    def get_interface(self, interface_name):
+        """Interface config lines
+
+        :return: OrderedDict {line: child lines} or None if interface is not in configuration
+        """
+
+        section = self._sections.get(_get_key('interface {0}'.format(interface_name)))
+        if section is None:
+            return None
+        return section[1]
+
+    def has_switchport(self, interface_name):
+        section = self.get_interface(interface_name)
+        return bool(section) and any('switchport' in line for line in section)
+
+    def get_switchport_mode(self, interface_name):
+        """Switchport mode of interface, i.e. 'trunk', 'access', 'dot1q-tunnel' or None"""
+
+        for line in self.get_interface(interface_name) or []:
+            match_mode = re.match(r'^switchport\s+mode\s+(\S+)', _get_key(line))
+            if match_mode:
+                return match_mode.group(1)
+        return None
+
+    def get_trunk_vlans(self, interface_name):
+        """Vlans allowed on trunk interface by 'switchport trunk allowed vlan' lines
+
+        :rtype: VlanSet
+        """
+
+        vlan_set = VlanSet()
+        for line in self.get_interface(interface_name) or []:
+            match_vlan = re.match(r'^switchport\s+trunk\s+allowed\s+vlan\s+(add|remove|all|none)\s*(\S*)',
+                                  _get_key(line))
+            if not match_vlan:
+                continue
+            action, vlan_range = match_vlan.groups()
+            if action == 'all':
+                vlan_set = VlanSet([(MIN_VLAN_ID, MAX_VLAN_ID)])
+            elif action == 'none':
+                vlan_set = VlanSet()
+            elif action == 'add':
+                vlan_set = vlan_set | VlanSet.parse(vlan_range)
+            else:
+                vlan_set = vlan_set - VlanSet.parse(vlan_range)
+        return vlan_set
+
+    def get_access_vlan(self, interface_name):
+        """Access vlan id of interface or None"""
+
+        for line in self.get_interface(interface_name) or []:
+            match_vlan = re.match(r'^switchport\s+access\s+vlan\s+(\d+)$', _get_key(line))
+            if match_vlan:
+                return int(match_vlan.group(1))
+        return None
+
+    def has_vlan(self, vlan_id):
+        return int(vlan_id) in self.vlans
+
+    def get_interface_config(self, interface_name):
+        """Interface section as configuration text"""
+
+        section = self.get_interface(interface_name)
+        if section is None:
+            return ''
+        line = self._sections[_get_key('interface {0}'.format(interface_name))][0]
+        return '\n'.join([line] + [' {0}'.format(child) for child in section])
+
+    def apply(self, commands):
+        """Update model with config commands sent to device, 'exit' closes current section, 'interface' command
+        opens new one, 'no <line>' removes matching lines of current section, top level 'no <section>'
+        removes the section and vlans it defines
+
+        :param commands: list of config mode commands
+        """
+
+        section = None
+        for command in commands:
+            command = command.strip()
+            key = _get_key(command)
+            if not key:
+                continue
+            if key in ('exit', 'end'):
+                section = None
+            elif section is None and key.startswith('no '):
+                self._sections.pop(key[3:], None)
+                match_vlan = VLAN_RANGE_SECTION_PATTERN.match(key[3:])
+                if match_vlan:
+                    self.vlans.difference_update(self._expand_vlan_range(match_vlan.group(1)))
+            elif section is None or key.startswith('interface '):
+                # interface command switches context even from inside another section
+                section = self._add_section(command)
+                match_vlan = VLAN_RANGE_SECTION_PATTERN.match(key)
+                if match_vlan:
+                    for vlan_id in self._expand_vlan_range(match_vlan.group(1)):
+                        self.vlans.add(vlan_id)
+            elif key.startswith('no '):
+                for line in list(section):
+                    if _get_key(line).startswith(key[3:]):
+                        del section[line]
+            else:
+                section.setdefault(command, OrderedDict())
+
+    @staticmethod
+    def _expand_vlan_range(vlan_range):
+        vlans = []
+        for part in vlan_range.replace(' ', '').split(','):
+            if '-' in part:
+                start, end = part.split('-', 1)
+                vlans.extend(range(int(start), int(end) + 1))
+            elif part:
+                vlans.append(int(part))
+        return vlans
@@ -0,0 +1,139 @@
+import re
+
+MIN_VLAN_ID = 1
+MAX_VLAN_ID = 4094
+
+
+class VlanSet(object):
+    def __init__(self, intervals=()):
+        """Set of vlan ids stored as sorted, non overlapping, non adjacent intervals
+
+        :param intervals: iterable of tuples (first vlan, last vlan)
+        """
+
+        self.intervals = self._normalize(intervals)
+
+    @classmethod
+    def parse(cls, vlan_range):
+        """Parse vlan range string, i.e. '10,20-30, 25-40'
+
+        :raise Exception: vlan range is malformed or vlan id is out of range
+        :rtype: VlanSet
+        """
+
+        intervals = []
+        for part in str(vlan_range).replace(' ', '').split(','):
+            if not part:
+                continue
+            match_part = re.match(r'^(\d+)(?:-(\d+))?$', part)
+            if not match_part:
+                raise Exception('Brocade OS', 'Wrong vlan range "{0}"'.format(vlan_range))
+            start = int(match_part.group(1))
+            end = int(match_part.group(2) or start)
+            if start > end:
+                start, end = end, start
+            if start < MIN_VLAN_ID or end > MAX_VLAN_ID:
+                raise Exception('Brocade OS', 'Vlan id should be in range {0}-{1}, "{2}" is provided'.format(
+                    MIN_VLAN_ID, MAX_VLAN_ID, part))
+            intervals.append((start, end))
+        return cls(intervals)
+
+    @classmethod
+    def from_ids(cls, vlan_ids):
+        return cls((vlan_id, vlan_id) for vlan_id in vlan_ids)
+
+    @staticmethod
+    def _normalize(intervals):
+        result = []
+        for start, end in sorted(intervals):
+            if result and start <= result[-1][1] + 1:
+                if end > result[-1][1]:
+                    result[-1] = (result[-1][0], end)
+            else:
+                result.append((start, end))
+        return result
+
+    def union(self, other):
+        return VlanSet(self.intervals + other.intervals)
+
+    def difference(self, other):
+        result = []
+        other_intervals = other.intervals
+        index = 0
+        for start, end in self.intervals:
+            while index < len(other_intervals) and other_intervals[index][1] < start:
+                index += 1
+            position = index
+            while start <= end:
+                if position >= len(other_intervals) or other_intervals[position][0] > end:
+                    result.append((start, end))
+                    break
+                other_start, other_end = other_intervals[position]
+                if other_start > start:
+                    result.append((start, other_start - 1))
+                start = other_end + 1
+                position += 1
+        return VlanSet(result)
+
+    def intersection(self, other):
+        result = []
+        index = other_index = 0
+        while index < len(self.intervals) and other_index < len(other.intervals):
+            start = max(self.intervals[index][0], other.intervals[other_index][0])
+            end = min(self.intervals[index][1], other.intervals[other_index][1])
+            if start <= end:
+                result.append((start, end))
+            if self.intervals[index][1] < other.intervals[other_index][1]:
+                index += 1
+            else:
+                other_index += 1
+        return VlanSet(result)
+
+    __or__ = union
+    __sub__ = difference
+    __and__ = intersection
+
+    def __contains__(self, vlan_id):
+        return any(start <= int(vlan_id) <= end for start, end in self.intervals)
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self.intervals)
+
+    def __nonzero__(self):
+        return bool(self.intervals)
+
+    __bool__ = __nonzero__
+
+    def __eq__(self, other):
+        return isinstance(other, VlanSet) and self.intervals == other.intervals
+
+    def __ne__(self, other):
+        return not self == other
+
+    def get_range_expressions(self):
+        """Fewest range expressions, i.e. ['10', '20-40']"""
+
+        return [str(start) if start == end else '{0}-{1}'.format(start, end) for start, end in self.intervals]
+
+    def split(self, max_length):
+        """Render set as comma separated range strings, every string is not longer than max_length
+
+        :return: list of range strings, i.e. ['10,20-40', '100-200']
+        """
+
+        result = []
+        current = ''
+        for expression in self.get_range_expressions():
+            if current and len(current) + 1 + len(expression) > max_length:
+                result.append(current)
+                current = ''
+            current = '{0},{1}'.format(current, expression) if current else expression
+        if current:
+            result.append(current)
+        return result
+
+    def __str__(self):
+        return ','.join(self.get_range_expressions())
+
+    def __repr__(self):
+        return 'VlanSet({0!r})'.format(str(self))
@@ -15,7 +15,7 @@ setup(
     url='http://www.qualisystems.com/',
     author='QualiSystems',
     author_email='info@qualisystems.com',
-    packages=find_packages(),
+    packages=find_packages(exclude=['tests', 'tests.*']),
     install_requires=required,
     tests_require=required_for_tests,
     version=version_from_file,
@@ -0,0 +1,109 @@
+from unittest import TestCase
+
+from pysnmp.error import PySnmpError
+from pysnmp.proto import errind
+from pysnmp.proto.rfc1902 import Integer, ObjectName
+from pysnmp.proto.rfc1905 import endOfMibView
+
+from cloudshell.networking.brocade.autoload.adaptive_snmp_handler import AdaptiveSnmpHandler, SnmpRttEstimator
+
+
+class TestSnmpRttEstimator(TestCase):
+    def test_default_timeout_without_samples(self):
+        self.assertEqual(SnmpRttEstimator(default_timeout=1.5).timeout, 1.5)
+
+    def test_first_sample(self):
+        estimator = SnmpRttEstimator(min_timeout=0.01)
+        estimator.add_sample(0.1)
+        self.assertAlmostEqual(estimator.srtt, 0.1)
+        self.assertAlmostEqual(estimator.rttvar, 0.05)
+        self.assertAlmostEqual(estimator.timeout, 0.1 + 4 * 0.05)
+
+    def test_next_samples_are_smoothed(self):
+        estimator = SnmpRttEstimator(min_timeout=0.01)
+        estimator.add_sample(0.1)
+        estimator.add_sample(0.2)
+        self.assertAlmostEqual(estimator.rttvar, 0.75 * 0.05 + 0.25 * 0.1)
+        self.assertAlmostEqual(estimator.srtt, 0.875 * 0.1 + 0.125 * 0.2)
+
+    def test_timeout_bounds(self):
+        estimator = SnmpRttEstimator(min_timeout=0.2, max_timeout=2.0)
+        estimator.add_sample(0.001)
+        self.assertEqual(estimator.timeout, 0.2)
+        estimator = SnmpRttEstimator(min_timeout=0.2, max_timeout=2.0)
+        estimator.add_sample(5.0)
+        self.assertEqual(estimator.timeout, 2.0)
+
+    def test_backoff_doubles_timeout_up_to_max(self):
+        estimator = SnmpRttEstimator(max_timeout=3.0, default_timeout=0.5)
+        self.assertEqual([estimator.backoff_timeout(attempt) for attempt in range(4)], [0.5, 1.0, 2.0, 3.0])
+
+
+class TestIsTimeout(TestCase):
+    def test_request_timed_out(self):
+        self.assertTrue(AdaptiveSnmpHandler._is_timeout(PySnmpError(errind.requestTimedOut)))
+
+    def test_other_errors(self):
+        self.assertFalse(AdaptiveSnmpHandler._is_timeout(PySnmpError(errind.unsupportedSecurityLevel)))
+        self.assertFalse(AdaptiveSnmpHandler._is_timeout(Exception('Brocade OS', 'Command timeout')))
+
+
+class FakeCommandGenerator(object):
+    def __init__(self, table, responses=None):
+        self.values = dict(table)
+        self.names = sorted(self.values)
+        self.responses = responses or []
+        self.calls = []
+
+    def bulkCmd(self, security, target, non_repeaters, max_repetitions, *oids, **kwargs):
+        self.calls.append((max_repetitions, kwargs.get('maxCalls')))
+        if self.responses:
+            return self.responses.pop(0)
+        rows = []
+        start = [tuple(oid) for oid in oids]
+        for _ in range(max_repetitions):
+            row = []
+            for index, oid in enumerate(start):
+                next_names = [name for name in self.names if name > oid]
+                if next_names:
+                    row.append((ObjectName(next_names[0]), Integer(self.values[next_names[0]])))
+                else:
+                    row.append((ObjectName(oid), endOfMibView))
+                start[index] = tuple(row[-1][0])
+            rows.append(row)
+        return None, 0, 0, rows
+
+
+class FakeSnmp(object):
+    def __init__(self, cmd_gen):
+        self.cmd_gen = cmd_gen
+        self.security = object()
+        self.target = None
+
+
+class FakeLogger(object):
+    def debug(self, message):
+        pass
+
+
+class TestBulkWalk(TestCase):
+    TABLE = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10, index), index * 100) for index in range(1, 6)] + \
+            [((1, 3, 6, 1, 2, 1, 2, 2, 1, 16, index), index * 10) for index in range(1, 6)] + \
+            [((1, 3, 6, 1, 2, 1, 2, 2, 1, 17, 1), 1)]
+
+    def setUp(self):
+        self.cmd_gen = FakeCommandGenerator(self.TABLE)
+        self.handler = AdaptiveSnmpHandler(FakeSnmp(self.cmd_gen), FakeLogger(), retries=1)
+
+    def test_columns_are_walked_pdu_by_pdu(self):
+        rows = self.handler.bulk_walk(['1.3.6.1.2.1.2.2.1.10', '1.3.6.1.2.1.2.2.1.16'], max_repetitions=2)
+        self.assertEqual([[(tuple(oid)[-1], int(value)) for oid, value in row] for row in rows],
+                         [[(index, index * 100), (index, index * 10)] for index in range(1, 6)])
+        self.assertEqual(self.cmd_gen.calls, [(2, 1)] * 3)
+        self.assertTrue(self.handler.rate_limiter.is_idle)
+
+    def test_timed_out_pdu_is_retried(self):
+        self.cmd_gen.responses = [(errind.requestTimedOut, 0, 0, [])]
+        rows = self.handler.bulk_walk(['1.3.6.1.2.1.2.2.1.17'])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(self.cmd_gen.calls), 2)
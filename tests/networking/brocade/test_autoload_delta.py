@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from cloudshell.networking.brocade.autoload.autoload_delta import autoload_details_to_dict, get_autoload_delta
+
+
+class FakeResource(object):
+    def __init__(self, relative_address, model, name, unique_identifier):
+        self.relative_address = relative_address
+        self.model = model
+        self.name = name
+        self.unique_identifier = unique_identifier
+
+
+class FakeAttribute(object):
+    def __init__(self, relative_address, attribute_name, attribute_value):
+        self.relative_address = relative_address
+        self.attribute_name = attribute_name
+        self.attribute_value = attribute_value
+
+
+class FakeAutoloadDetails(object):
+    def __init__(self, resources, attributes):
+        self.resources = resources
+        self.attributes = attributes
+
+
+def get_details(port_names, port_descriptions):
+    resources = [FakeResource('0', 'Generic Chassis', 'Chassis 0', 'sw.0')]
+    resources += [FakeResource('0/{0}'.format(index), 'Generic Port', name, 'sw.0.{0}'.format(index))
+                  for index, name in port_names]
+    attributes = [FakeAttribute('0/{0}'.format(index), 'Port Description', description)
+                  for index, description in port_descriptions]
+    return FakeAutoloadDetails(resources, attributes)
+
+
+class TestAutoloadDelta(TestCase):
+    def test_first_discovery(self):
+        delta = get_autoload_delta(None, get_details([(1, 'Te 0/1')], [(1, 'uplink')]))
+        self.assertTrue(delta.is_first_discovery)
+        self.assertEqual(len(delta.added_resources), 2)
+        self.assertEqual(len(delta.added_attributes), 1)
+
+    def test_unchanged_device_has_empty_delta(self):
+        details = get_details([(1, 'Te 0/1')], [(1, 'uplink')])
+        delta = get_autoload_delta(autoload_details_to_dict(details), details)
+        self.assertFalse(delta.is_first_discovery)
+        self.assertTrue(delta.is_empty)
+
+    def test_changes(self):
+        previous = autoload_details_to_dict(get_details([(1, 'Te 0/1'), (2, 'Te 0/2')], [(1, 'uplink'), (2, 'db')]))
+        delta = get_autoload_delta(previous, get_details([(1, 'Te 0/1'), (3, 'Te 0/3')], [(1, 'core'), (3, 'web')]),
+                                   return_full_result=True)
+        self.assertEqual([resource.relative_address for resource in delta.added_resources], ['0/3'])
+        self.assertEqual(delta.changed_resources, [])
+        self.assertEqual(delta.removed_resources, ['0/2'])
+        self.assertEqual([attribute.relative_address for attribute in delta.added_attributes], ['0/3'])
+        self.assertEqual([attribute.attribute_value for attribute in delta.changed_attributes], ['core'])
+        self.assertEqual(delta.removed_attributes, [('0/2', 'Port Description')])
+        self.assertEqual(str(delta), 'resources +1 ~0 -1, attributes +1 ~1 -1')
+        self.assertIsNotNone(delta.full_result)
+
+    def test_renamed_resource_is_changed(self):
+        previous = autoload_details_to_dict(get_details([(1, 'Te 0/1')], []))
+        delta = get_autoload_delta(previous, get_details([(1, 'Te 0/1 renamed')], []))
+        self.assertEqual([resource.name for resource in delta.changed_resources], ['Te 0/1 renamed'])
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from cloudshell.networking.brocade.configuration_archive import BrocadeConfigurationArchive, get_config_hash
+
+
+def _get_config(index):
+    return ''.join('interface ethernet 1/1/{0}\n port-name port {0}\n'.format(port) for port in range(1, 50)) + \
+           'hostname sw{0}\n'.format(index)
+
+
+class TestConfigurationArchive(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _get_object_names(self):
+        return sorted(os.listdir(os.path.join(self.root, 'objects')))
+
+    def test_root_is_required(self):
+        self.assertRaises(Exception, BrocadeConfigurationArchive, None)
+        self.assertRaises(Exception, BrocadeConfigurationArchive, '')
+
+    def test_round_trip(self):
+        archive = BrocadeConfigurationArchive(self.root)
+        config_hash, is_new = archive.store('sw', 'running-config', _get_config(1))
+        self.assertTrue(is_new)
+        self.assertEqual(config_hash, get_config_hash(_get_config(1)))
+        self.assertEqual(archive.get_config(config_hash), _get_config(1))
+        self.assertEqual(archive.get_last_hash('sw', 'running-config'), config_hash)
+        self.assertIsNone(archive.get_last_hash('sw', 'startup-config'))
+
+    def test_unchanged_config_is_stored_once(self):
+        archive = BrocadeConfigurationArchive(self.root)
+        archive.store('sw1', 'running-config', _get_config(1))
+        config_hash, is_new = archive.store('sw2', 'running-config', _get_config(1))
+        self.assertFalse(is_new)
+        self.assertEqual(self._get_object_names(), [config_hash + '.gz'])
+        self.assertEqual(len(archive.get_history('sw2')), 1)
+
+    def test_missing_config(self):
+        archive = BrocadeConfigurationArchive(self.root)
+        self.assertRaises(Exception, archive.get_config, get_config_hash('missing'))
+
+    def test_delta_chain(self):
+        archive = BrocadeConfigurationArchive(self.root, use_deltas=True, max_delta_chain=2)
+        hashes = [archive.store('sw', 'running-config', _get_config(index))[0] for index in range(4)]
+        self.assertEqual(self._get_object_names(), sorted([hashes[0] + '.gz', hashes[1] + '.delta.gz',
+                                                           hashes[2] + '.delta.gz', hashes[3] + '.gz']))
+        reopened = BrocadeConfigurationArchive(self.root)
+        for index, config_hash in enumerate(hashes):
+            self.assertEqual(reopened.get_config(config_hash), _get_config(index))
+
+    def test_non_ascii_delta_round_trip(self):
+        archive = BrocadeConfigurationArchive(self.root, use_deltas=True)
+        base = _get_config(1) + u'banner motd \u0417\u0434\u0440\u0430\u0432\u0441\u0442\u0432\u0443\u0439\n'
+        contents = [base.encode('utf-8'), base + u'snmp-server location M\xfcnchen\n',
+                    (base + u'snmp-server contact \u5f20\u4f1f\n').encode('utf-8')]
+        hashes = [archive.store('sw', 'running-config', content)[0] for content in contents]
+        self.assertTrue(self._get_object_names()[0].endswith('.delta.gz'))
+        for content, config_hash in zip(contents, hashes):
+            expected = content if isinstance(content, bytes) else content.encode('utf-8')
+            self.assertEqual(archive.get_config(config_hash), expected)
+            self.assertEqual(config_hash, get_config_hash(expected))
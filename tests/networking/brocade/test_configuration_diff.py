@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from cloudshell.networking.brocade.configuration_diff import parse_config, get_config_diff
+
+
+class TestConfigurationDiff(TestCase):
+    def _get_diff(self, current, target):
+        return get_config_diff(parse_config(current), parse_config(target))
+
+    def test_equal_configurations(self):
+        config = 'hostname sw\ninterface ve 10\n ip address 10.0.0.1/24\n'
+        self.assertEqual(self._get_diff(config, config), [])
+
+    def test_added_section(self):
+        self.assertEqual(self._get_diff('hostname sw\n', 'hostname sw\nvlan 10\n name users\n'),
+                         ['vlan 10', 'name users', 'exit'])
+
+    def test_removed_line_is_negated(self):
+        self.assertEqual(self._get_diff('ip route 0.0.0.0/0 10.0.0.1\n', ''), ['no ip route 0.0.0.0/0 10.0.0.1'])
+        self.assertEqual(self._get_diff('no ip source-route\n', ''), ['ip source-route'])
+
+    def test_negation_table(self):
+        current = 'interface ve 10\n description old\n switchport trunk allowed vlan add 10-20\n' \
+                  ' switchport trunk allowed vlan remove 30\n switchport access vlan 5\n'
+        self.assertEqual(self._get_diff(current, 'interface ve 10\n'),
+                         ['interface ve 10', 'no description', 'switchport trunk allowed vlan remove 10-20',
+                          'switchport trunk allowed vlan add 30', 'no switchport access vlan', 'exit'])
+
+    def test_removed_logical_interface(self):
+        self.assertEqual(self._get_diff('interface ve 10\n ip address 10.0.0.1/24\n', ''), ['no interface ve 10'])
+
+    def test_removed_physical_interface_is_cleared(self):
+        current = 'interface ethernet 1/1/1\n port-name uplink\n switchport mode trunk\n'
+        self.assertEqual(self._get_diff(current, ''),
+                         ['interface ethernet 1/1/1', 'no port-name', 'no switchport mode', 'exit'])
+        self.assertEqual(self._get_diff('interface TenGigabitEthernet 1/0/1\n', ''), [])
+
+    def test_changed_line_inside_section(self):
+        current = 'interface ve 10\n ip address 10.0.0.1/24\n ip mtu 1500\n'
+        target = 'interface ve 10\n ip address 10.0.0.2/24\n ip mtu 1500\n'
+        self.assertEqual(self._get_diff(current, target),
+                         ['interface ve 10', 'no ip address 10.0.0.1/24', 'ip address 10.0.0.2/24', 'exit'])
+
+    def test_protected_sections_missing_in_target_are_kept(self):
+        current = 'rbridge-id 1\n interface ve 10\n  ip address 10.0.0.1/24\nusername admin password x role admin\n' \
+                  'aaa authentication login local\nip route 0.0.0.0/0 10.0.0.254\n'
+        self.assertEqual(self._get_diff(current, ''), ['no ip route 0.0.0.0/0 10.0.0.254'])
+
+    def test_protected_section_present_in_target_is_diffed(self):
+        current = 'rbridge-id 1\n interface ve 10\n  ip address 10.0.0.1/24\n ip route 0.0.0.0/0 10.0.0.254\n'
+        target = 'rbridge-id 1\n interface ve 10\n  ip address 10.0.0.1/24\n'
+        self.assertEqual(self._get_diff(current, target),
+                         ['rbridge-id 1', 'no ip route 0.0.0.0/0 10.0.0.254', 'exit'])
+
+    def test_protected_sections_can_be_overridden(self):
+        self.assertEqual(get_config_diff(parse_config('username guest password x\n'), parse_config(''),
+                                         protected_sections=()), ['no username guest password x'])
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import re
+from unittest import TestCase
+
+from cloudshell.cli.session.session_exceptions import SessionLoopLimitException
+from cloudshell.networking.brocade import copy_progress
+from cloudshell.networking.brocade.brocade_configuration_operations import BrocadeConfigurationOperations
+from cloudshell.networking.brocade.copy_progress import CopyProgress
+
+
+class FakeTime(object):
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class TestCopyProgress(TestCase):
+    def setUp(self):
+        self.fake_time = FakeTime()
+        self.original_time = copy_progress.time
+        copy_progress.time = self.fake_time
+
+    def tearDown(self):
+        copy_progress.time = self.original_time
+    def test_marks_with_bytes_per_mark(self):
+        progress = CopyProgress(expected_size=4096)
+        self.assertTrue(progress.feed('Transferring, 512 bytes per dot\n....'))
+        self.assertEqual(progress.marks, 4)
+        self.assertEqual(progress.bytes_transferred, 2048)
+
+    def test_bytes_counter(self):
+        progress = CopyProgress()
+        progress.feed('1024 bytes copied')
+        progress.feed('4096 bytes copied')
+        self.assertEqual(progress.bytes_transferred, 4096)
+
+    def test_percent_uses_expected_size(self):
+        progress = CopyProgress(expected_size=1000)
+        progress.feed('Copying 25%')
+        self.assertEqual(progress.bytes_transferred, 250)
+        self.assertFalse(progress.feed('Copying 25%'))
+
+    def test_prompt_and_file_names_are_not_progress(self):
+        progress = CopyProgress()
+        self.assertFalse(progress.feed('copy tftp://10.0.0.1/SPS08030.bin flash:primary\nsw#'))
+        self.assertEqual(progress.marks, 0)
+        self.assertIsNone(progress.bytes_transferred)
+
+    def test_stall_clock_starts_with_first_progress(self):
+        self.fake_time.now = 100.0
+        progress = CopyProgress()
+        self.fake_time.now = 200.0
+        self.assertIsNone(progress.stalled_for)
+        progress.feed('!!')
+        self.fake_time.now = 230.0
+        self.assertEqual(progress.stalled_for, 30.0)
+        progress.mark_progress()
+        self.assertEqual(progress.stalled_for, 0.0)
+
+    def test_throughput_and_eta(self):
+        progress = CopyProgress(expected_size=3000)
+        self.fake_time.now = 10.0
+        progress.feed('1000 bytes copied')
+        self.assertEqual(progress.throughput, 100.0)
+        self.assertEqual(progress.eta, 20.0)
+
+
+class FakeCli(object):
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.commands = []
+        self.is_session_destroyed = False
+
+    def send_command(self, command, expected_str=None, expected_map=None, retries=None, **kwargs):
+        """Feed chunks through action map like session.hardware_expect, None chunk is an empty read"""
+
+        self.commands.append(command)
+        output = ''
+        empty_reads = 0
+        for chunk in self.chunks:
+            if chunk is None:
+                empty_reads += 1
+                if empty_reads >= retries:
+                    raise SessionLoopLimitException('ExpectSession', 'Session Loop limit exceeded')
+                continue
+            empty_reads = 0
+            output += chunk
+            for expect_string in expected_map:
+                if re.search(expect_string, chunk):
+                    expected_map[expect_string](None)
+                    break
+        return output
+
+    def get_session_type(self):
+        return 'SSH'
+
+    def destroy_threaded_session(self):
+        self.is_session_destroyed = True
+
+
+class FakeLogger(object):
+    def __getattr__(self, item):
+        return lambda message: None
+
+
+class TestCopyWithProgress(TestCase):
+    def _copy(self, chunks, stall_timeout=None):
+        cli = FakeCli(chunks)
+        operations = BrocadeConfigurationOperations(cli=cli, logger=FakeLogger(), resource_name='sw')
+        reports = []
+        result = operations._copy_with_progress('copy flash://nos.tar.gz tftp://10.0.0.1/nos.tar.gz', OrderedDict(),
+                                                600, reports.append, stall_timeout, None)
+        return cli, reports, result
+
+    def test_progress_is_reported_through_cli_service(self):
+        cli, reports, result = self._copy(['Copying', '!!!!', None, '!!!!', '\n2048 bytes copied\nCopy complete\nsw#'])
+        self.assertEqual(result[0], True)
+        self.assertEqual(len(reports), 3)
+        self.assertEqual(reports[-1].bytes_transferred, 2048)
+        self.assertEqual(cli.commands, ['copy flash://nos.tar.gz tftp://10.0.0.1/nos.tar.gz'])
+
+    def test_stalled_copy_is_aborted(self):
+        cli, reports, result = self._copy(['!!!!'] + [None] * 10, stall_timeout=5)
+        self.assertEqual(result[0], False)
+        self.assertIn('no output for 5 seconds', result[1])
+        self.assertTrue(cli.is_session_destroyed)
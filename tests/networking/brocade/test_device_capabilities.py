@@ -0,0 +1,53 @@
+import shutil
+import tempfile
+from unittest import TestCase
+
+from cloudshell.networking.brocade import device_capabilities, local_storage
+from cloudshell.networking.brocade.device_capabilities import get_firmware_version, get_resource_capability_cache
+
+SHOW_VERSION = '''Network Operating System Software
+Network Operating System Version: 7.2.0a
+Copyright (c) 1995-2017 Brocade Communications Systems, Inc.
+Firmware name:      7.2.0a
+'''
+
+
+class FakeAttribute(object):
+    def __init__(self, value):
+        self.Value = value
+
+
+class FakeApi(object):
+    def __init__(self, attributes):
+        self.attributes = attributes
+
+    def GetAttributeValue(self, resource_name, attribute_name):
+        return FakeAttribute(self.attributes[attribute_name])
+
+
+class TestCapabilityCache(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.original_root = local_storage.STORAGE_ROOT
+        local_storage.STORAGE_ROOT = self.folder
+        device_capabilities._capability_caches.clear()
+        self.api = FakeApi({'Model': 'VDX_6740', 'OS Version': '7.1.0'})
+
+    def tearDown(self):
+        local_storage.STORAGE_ROOT = self.original_root
+        device_capabilities._capability_caches.clear()
+        shutil.rmtree(self.folder)
+
+    def test_firmware_version_from_show_version(self):
+        self.assertEqual(get_firmware_version(SHOW_VERSION), '7.2.0a')
+        self.assertIsNone(get_firmware_version('sw0#'))
+
+    def test_cache_is_keyed_on_device_firmware_version(self):
+        old_cache = get_resource_capability_cache(self.api, 'sw')
+        self.assertEqual(old_cache.firmware_version, '7.1.0')
+        self.assertFalse(old_cache.get('configure_replace', lambda: False))
+
+        new_cache = get_resource_capability_cache(self.api, 'sw', firmware_version='7.2.0a')
+        self.assertEqual(new_cache.firmware_version, '7.2.0a')
+        self.assertTrue(new_cache.get('configure_replace', lambda: True))
+        self.assertFalse(get_resource_capability_cache(self.api, 'sw').get('configure_replace', lambda: True))
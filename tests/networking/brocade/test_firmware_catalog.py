@@ -0,0 +1,55 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from cloudshell.networking.brocade import local_storage
+from cloudshell.networking.brocade.firmware_data.firmware_catalog import BrocadeFirmwareCatalog, parse_image_name
+
+
+class TestParseImageName(TestCase):
+    def test_network_os_names(self):
+        self.assertEqual(parse_image_name('nos7.2.0a.tar.gz'), ('nos', '7.2.0a'))
+        self.assertEqual(parse_image_name('NOS_v6.0.2b1.tgz'), ('NOS', '6.0.2b1'))
+        self.assertEqual(parse_image_name('nos-5.0.1.bin'), ('nos', '5.0.1'))
+
+    def test_single_number_version(self):
+        self.assertEqual(parse_image_name('SPS08030b.bin'), ('SPS', '08030b'))
+
+    def test_name_without_version(self):
+        self.assertEqual(parse_image_name('readme.txt'), ('readme', None))
+
+
+class TestFirmwareCatalog(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.storage = tempfile.mkdtemp()
+        self.original_storage_root = local_storage.STORAGE_ROOT
+        local_storage.STORAGE_ROOT = self.storage
+        for file_name in ('nos7.1.0b.tar.gz', 'nos7.2.0a.tar.gz', 'nos7.2.0.tar.gz', 'notes.txt'):
+            with open(os.path.join(self.root, file_name), 'wb') as image:
+                image.write(file_name.encode('utf-8'))
+        self.catalog = BrocadeFirmwareCatalog(self.root)
+
+    def tearDown(self):
+        local_storage.STORAGE_ROOT = self.original_storage_root
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.storage)
+
+    def test_newest_image_for_vdx_model(self):
+        entry = self.catalog.find('VDX_6740')
+        self.assertEqual(entry['file_name'], 'nos7.2.0a.tar.gz')
+        self.assertEqual(entry['md5'], hashlib.md5(b'nos7.2.0a.tar.gz').hexdigest())
+        self.assertEqual(entry['size'], len('nos7.2.0a.tar.gz'))
+
+    def test_image_by_version(self):
+        self.assertEqual(self.catalog.find('Vdx6740', '7.1.0b')['file_name'], 'nos7.1.0b.tar.gz')
+        self.assertIsNone(self.catalog.find('Vdx6740', '9.0.0'))
+
+    def test_unknown_model(self):
+        self.assertIsNone(self.catalog.find('ICX6450'))
+
+    def test_other_files_are_ignored(self):
+        self.assertEqual(sorted(entry['file_name'] for entry in self.catalog.refresh()),
+                         ['nos7.1.0b.tar.gz', 'nos7.2.0.tar.gz', 'nos7.2.0a.tar.gz'])
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from cloudshell.networking.brocade.brocade_firmware_rollout import BrocadeFirmwareRolloutScheduler, FirmwareJob
+
+
+class FakeConfigurationOperations(object):
+    def __init__(self, resource_name):
+        self.resource_name = resource_name
+
+
+def make_job(resource_name, pair_group=None):
+    return FirmwareJob(FakeConfigurationOperations(resource_name), 'tftp://10.0.0.1', 'nos7.2.0a.tar.gz',
+                       pair_group=pair_group)
+
+
+def get_names(waves):
+    return [[job.resource_name for job in wave] for wave in waves]
+
+
+class TestPlanWaves(TestCase):
+    def test_canary_wave_first(self):
+        scheduler = BrocadeFirmwareRolloutScheduler(canary_count=1, wave_size=2)
+        jobs = [make_job('sw{0}'.format(index)) for index in range(5)]
+        self.assertEqual(get_names(scheduler.plan_waves(jobs)), [['sw0'], ['sw1', 'sw2'], ['sw3', 'sw4']])
+
+    def test_pair_members_are_in_different_waves(self):
+        scheduler = BrocadeFirmwareRolloutScheduler(canary_count=0, wave_size=4)
+        jobs = [make_job('a1', 'vlag-a'), make_job('a2', 'vlag-a'), make_job('b1', 'vlag-b'),
+                make_job('b2', 'vlag-b'), make_job('c1')]
+        waves = scheduler.plan_waves(jobs)
+        self.assertEqual(get_names(waves), [['a1', 'b1', 'c1'], ['a2', 'b2']])
+        for wave in waves:
+            groups = [job.pair_group for job in wave if job.pair_group is not None]
+            self.assertEqual(len(groups), len(set(groups)))
+
+    def test_wrong_wave_size(self):
+        self.assertRaises(Exception, BrocadeFirmwareRolloutScheduler, wave_size=0)
+        self.assertRaises(Exception, BrocadeFirmwareRolloutScheduler, canary_count=-1)
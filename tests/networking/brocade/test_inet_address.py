@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from cloudshell.networking.brocade.autoload.brocade_generic_snmp_autoload import _parse_inet_address
+
+
+class TestParseInetAddress(TestCase):
+    def test_ipv4_with_length_prefix(self):
+        self.assertEqual(_parse_inet_address('1.4.10.0.0.1'), ('ipv4', '10.0.0.1'))
+
+    def test_ipv4_first_octet_equal_to_length(self):
+        self.assertEqual(_parse_inet_address('1.4.3.0.0.1'), ('ipv4', '3.0.0.1'))
+        self.assertEqual(_parse_inet_address('1.3.0.0.1'), ('ipv4', '3.0.0.1'))
+
+    def test_ipv6(self):
+        self.assertEqual(_parse_inet_address('2.16.254.128.0.0.0.0.0.0.2.0.0.0.0.0.0.1'),
+                         ('ipv6', 'fe80::200:0:0:1'))
+
+    def test_zoned_addresses(self):
+        self.assertEqual(_parse_inet_address('3.8.10.0.0.1.0.0.0.3'), ('ipv4', '10.0.0.1'))
+        self.assertEqual(_parse_inet_address('4.20.254.128.0.0.0.0.0.0.0.0.0.0.0.0.0.1.0.0.0.5'), ('ipv6', 'fe80::1'))
+
+    def test_wrong_length(self):
+        self.assertIsNone(_parse_inet_address('1.5.10.0.0.1.2'))
+        self.assertIsNone(_parse_inet_address('1.4.4.10.0.0.1'))
+        self.assertIsNone(_parse_inet_address('16.4.10.0.0.1'))
@@ -0,0 +1,86 @@
+from unittest import TestCase
+
+from cloudshell.networking.brocade.autoload import brocade_interface_counters
+from cloudshell.networking.brocade.autoload.adaptive_snmp_handler import AdaptiveSnmpHandler
+from cloudshell.networking.brocade.autoload.brocade_interface_counters import BrocadeInterfaceCountersPoller, \
+    INTERFACE_COUNTERS
+
+
+class FakeTime(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeSnmp(AdaptiveSnmpHandler):
+    def __init__(self):
+        self.sys_up_time = 0
+        self.counters = {}
+
+    def get(self, *oids):
+        return {'sysUpTime': str(self.sys_up_time)}
+
+    def bulk_walk(self, oids, max_repetitions=25):
+        rows = []
+        for if_index in sorted(self.counters):
+            rows.append([(tuple(int(part) for part in oid.split('.')) + (if_index,),
+                          self.counters[if_index].get(name, 0)) for name, (oid, bits) in INTERFACE_COUNTERS.items()])
+        return rows
+
+
+class FakeLogger(object):
+    def __getattr__(self, item):
+        return lambda message: None
+
+
+class TestInterfaceCountersPoller(TestCase):
+    def setUp(self):
+        self.fake_time = FakeTime()
+        self.original_time = brocade_interface_counters.time
+        brocade_interface_counters.time = self.fake_time
+        self.snmp = FakeSnmp()
+        self.poller = BrocadeInterfaceCountersPoller(self.snmp, FakeLogger())
+
+    def tearDown(self):
+        brocade_interface_counters.time = self.original_time
+
+    def _poll(self, sys_up_time, counters, elapsed=10):
+        self.fake_time.now += elapsed
+        self.snmp.sys_up_time = sys_up_time
+        self.snmp.counters = counters
+        return self.poller.poll()
+
+    def test_first_poll_stores_baseline(self):
+        self.assertEqual(self._poll(1000, {1: {'in_octets': 100}}), {})
+
+    def test_rates(self):
+        self._poll(1000, {1: {'in_octets': 1000, 'out_packets': 10}})
+        rates = self._poll(2000, {1: {'in_octets': 6000, 'out_packets': 110}})
+        self.assertEqual(rates[1]['in_octets'], 500.0)
+        self.assertEqual(rates[1]['out_packets'], 10.0)
+        self.assertEqual(self.poller.get_history(1, 'in_octets'), [(self.fake_time.now, 500.0)])
+
+    def test_64_bit_counter_wrap(self):
+        self._poll(1000, {1: {'in_octets': 2 ** 64 - 100}})
+        self.assertEqual(self._poll(2000, {1: {'in_octets': 100}})[1]['in_octets'], 20.0)
+
+    def test_32_bit_counter_wrap(self):
+        self._poll(1000, {1: {'in_errors': 2 ** 32 - 5}})
+        self.assertEqual(self._poll(2000, {1: {'in_errors': 5}})[1]['in_errors'], 1.0)
+
+    def test_sys_up_time_wrap(self):
+        self._poll(2 ** 32 - 500, {1: {'in_octets': 0}})
+        self.assertEqual(self._poll(500, {1: {'in_octets': 1000}})[1]['in_octets'], 100.0)
+
+    def test_reload_resets_baseline(self):
+        self._poll(100000, {1: {'in_octets': 5000}})
+        self.assertEqual(self._poll(1000, {1: {'in_octets': 100}}), {})
+        self.assertEqual(self.poller.get_history(1, 'in_octets'), [])
+        self.assertEqual(self._poll(2000, {1: {'in_octets': 1100}})[1]['in_octets'], 100.0)
+
+    def test_new_interface_has_no_rates_until_next_poll(self):
+        self._poll(1000, {1: {'in_octets': 0}})
+        rates = self._poll(2000, {1: {'in_octets': 10}, 2: {'in_octets': 10}})
+        self.assertEqual(sorted(rates), [1])
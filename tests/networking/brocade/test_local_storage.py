@@ -0,0 +1,32 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from cloudshell.networking.brocade import local_storage
+from cloudshell.networking.brocade.local_storage import get_storage_path, load_json, save_json
+
+
+class TestLocalStorage(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.original_root = local_storage.STORAGE_ROOT
+        local_storage.STORAGE_ROOT = self.folder
+
+    def tearDown(self):
+        local_storage.STORAGE_ROOT = self.original_root
+        shutil.rmtree(self.folder)
+
+    def test_storage_root_is_configurable(self):
+        path = get_storage_path('snmp_rtt', '10.0.0.1:161')
+        self.assertEqual(path, os.path.join(self.folder, 'snmp_rtt', '10.0.0.1_161.json'))
+
+    def test_save_json_replaces_file_without_temporary_files(self):
+        path = get_storage_path('snmp_rtt', 'device')
+        save_json(path, {'srtt': 1})
+        save_json(path, {'srtt': 2})
+        self.assertEqual(load_json(path), {'srtt': 2})
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['device.json'])
+
+    def test_load_json_default(self):
+        self.assertEqual(load_json(os.path.join(self.folder, 'missing.json'), default={}), {})
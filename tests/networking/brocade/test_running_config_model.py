@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+from cloudshell.networking.brocade.running_config_model import BrocadeRunningConfig
+from cloudshell.networking.brocade.vlan_ranges import VlanSet
+
+RUNNING_CONFIG = '''interface Vlan 10
+!
+interface Vlan 20
+!
+interface Vlan 30
+!
+interface TenGigabitEthernet 1/0/1
+ switchport
+ switchport mode trunk
+ switchport trunk allowed vlan add 10,20
+ no shutdown
+!
+interface TenGigabitEthernet 1/0/2
+ no shutdown
+!
+'''
+
+
+class TestBrocadeRunningConfig(TestCase):
+    def setUp(self):
+        self.config = BrocadeRunningConfig(RUNNING_CONFIG)
+
+    def test_parsed_state(self):
+        self.assertEqual(self.config.vlans, {10, 20, 30})
+        self.assertEqual(self.config.get_switchport_mode('TenGigabitEthernet 1/0/1'), 'trunk')
+        self.assertEqual(self.config.get_trunk_vlans('TenGigabitEthernet 1/0/1'), VlanSet.parse('10,20'))
+        self.assertFalse(self.config.has_switchport('TenGigabitEthernet 1/0/2'))
+
+    def test_negated_vlans_are_removed(self):
+        self.config.apply(['no interface Vlan 20', 'no interface vlan 30'])
+        self.assertEqual(self.config.vlans, {10})
+        self.assertIsNone(self.config.get_interface('Vlan 20'))
+
+    def test_created_vlan_range(self):
+        self.config.apply(['interface vlan 40-42,45', 'exit'])
+        self.assertEqual(self.config.vlans, {10, 20, 30, 40, 41, 42, 45})
+        self.assertTrue(self.config.has_vlan('41'))
+
+    def test_trunk_vlan_add_and_remove(self):
+        self.config.apply(['interface TenGigabitEthernet 1/0/1',
+                           'switchport trunk allowed vlan add 30',
+                           'switchport trunk allowed vlan remove 10',
+                           'exit'])
+        self.assertEqual(self.config.get_trunk_vlans('TenGigabitEthernet 1/0/1'), VlanSet.parse('20,30'))
+
+    def test_access_vlan_and_switchport_mode(self):
+        self.config.apply(['interface TenGigabitEthernet 1/0/2',
+                           'switchport',
+                           'switchport mode access',
+                           'switchport access vlan 10',
+                           'exit'])
+        self.assertTrue(self.config.has_switchport('TenGigabitEthernet 1/0/2'))
+        self.assertEqual(self.config.get_switchport_mode('TenGigabitEthernet 1/0/2'), 'access')
+        self.assertEqual(self.config.get_access_vlan('TenGigabitEthernet 1/0/2'), 10)
+
+    def test_negated_interface_lines(self):
+        self.config.apply(['interface TenGigabitEthernet 1/0/1',
+                           'no switchport',
+                           'exit'])
+        self.assertFalse(self.config.has_switchport('TenGigabitEthernet 1/0/1'))
+        self.assertIsNone(self.config.get_switchport_mode('TenGigabitEthernet 1/0/1'))
+        self.assertEqual(self.config.get_interface_config('TenGigabitEthernet 1/0/1'),
+                         'interface TenGigabitEthernet 1/0/1\n no shutdown')
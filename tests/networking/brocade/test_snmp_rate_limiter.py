@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from cloudshell.networking.brocade.autoload import snmp_rate_limiter
+from cloudshell.networking.brocade.autoload.snmp_rate_limiter import SnmpRateLimiter, get_device_rate_limiter
+
+
+class FakeTime(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class TestSnmpRateLimiter(TestCase):
+    def setUp(self):
+        self.fake_time = FakeTime()
+        self.original_time = snmp_rate_limiter.time
+        snmp_rate_limiter.time = self.fake_time
+
+    def tearDown(self):
+        snmp_rate_limiter.time = self.original_time
+
+    def test_acquire_takes_one_token_per_pdu(self):
+        rate_limiter = SnmpRateLimiter(pdu_rate=10, burst=3, max_outstanding=5)
+        for _ in range(3):
+            rate_limiter.acquire()
+            rate_limiter.release()
+        self.assertEqual(rate_limiter._tokens, 0)
+
+        self.fake_time.now += 0.2
+        rate_limiter.acquire()
+        self.assertAlmostEqual(rate_limiter._tokens, 1)
+
+    def test_release_does_not_charge_tokens(self):
+        rate_limiter = SnmpRateLimiter(pdu_rate=10, burst=2, max_outstanding=5)
+        rate_limiter.acquire()
+        rate_limiter.release()
+        self.assertEqual(rate_limiter._tokens, 1)
+        self.assertTrue(rate_limiter.is_idle)
+
+    def test_refill_is_bounded_by_burst(self):
+        rate_limiter = SnmpRateLimiter(pdu_rate=10, burst=2, max_outstanding=5)
+        rate_limiter.acquire()
+        self.fake_time.now += 100
+        rate_limiter.acquire()
+        self.assertEqual(rate_limiter._tokens, 1)
+        self.assertFalse(rate_limiter.is_idle)
+
+    def test_configure_shrinks_tokens_to_burst(self):
+        rate_limiter = SnmpRateLimiter(pdu_rate=10, burst=20)
+        rate_limiter.configure(burst=5)
+        self.assertEqual(rate_limiter._tokens, 5)
+
+
+class TestGetDeviceRateLimiter(TestCase):
+    def setUp(self):
+        self.original_max = snmp_rate_limiter.MAX_DEVICE_RATE_LIMITERS
+        snmp_rate_limiter.MAX_DEVICE_RATE_LIMITERS = 2
+        snmp_rate_limiter._device_rate_limiters.clear()
+
+    def tearDown(self):
+        snmp_rate_limiter.MAX_DEVICE_RATE_LIMITERS = self.original_max
+        snmp_rate_limiter._device_rate_limiters.clear()
+
+    def test_same_device_shares_limiter(self):
+        self.assertIs(get_device_rate_limiter('10.0.0.1'), get_device_rate_limiter('10.0.0.1'))
+
+    def test_least_recently_used_idle_limiter_is_dropped(self):
+        busy = get_device_rate_limiter('10.0.0.1')
+        busy.acquire()
+        get_device_rate_limiter('10.0.0.2')
+        get_device_rate_limiter('10.0.0.3')
+        self.assertEqual(list(snmp_rate_limiter._device_rate_limiters), ['10.0.0.1', '10.0.0.3'])
+        self.assertIs(get_device_rate_limiter('10.0.0.1'), busy)
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from pysnmp.proto.rfc1902 import Integer, OctetString
+from pysnmp.proto.rfc1905 import noSuchInstance
+
+from cloudshell.networking.brocade.autoload.snmp_request_batch import SnmpPropertyBatch
+
+
+class FakeSnmp(object):
+    def __init__(self, values, max_var_binds):
+        self.values = values
+        self.max_var_binds = max_var_binds
+        self.requests = []
+        self.var_binds = []
+
+    def get(self, *oids):
+        self.requests.append(len(oids))
+        if len(oids) > self.max_var_binds:
+            raise Exception('tooBig')
+        self.var_binds = [(oid, self.values.get(oid, noSuchInstance)) for oid in oids]
+
+
+class FakeLogger(object):
+    def debug(self, message):
+        pass
+
+
+class TestSnmpPropertyBatch(TestCase):
+    def test_values_are_resolved_with_multi_varbind_get(self):
+        snmp = FakeSnmp({('ENTITY-MIB', 'entPhysicalName', 1): OctetString('chassis '),
+                         ('ENTITY-MIB', 'entPhysicalClass', 1): Integer(3)}, max_var_binds=10)
+        batch = SnmpPropertyBatch(snmp, FakeLogger(), max_var_binds=10)
+        name = batch.get_property('ENTITY-MIB', 'entPhysicalName', 1)
+        entity_class = batch.get_property('ENTITY-MIB', 'entPhysicalClass', 1, 'int')
+        serial = batch.get_property('ENTITY-MIB', 'entPhysicalSerialNum', 1)
+        self.assertEqual(batch.execute(), 1)
+        self.assertEqual((name.value, entity_class.value, serial.value), ('chassis', 3, ''))
+
+    def test_chunks_are_limited_by_max_var_binds(self):
+        snmp = FakeSnmp({}, max_var_binds=10)
+        batch = SnmpPropertyBatch(snmp, FakeLogger(), max_var_binds=4)
+        for index in range(10):
+            batch.get_property('IF-MIB', 'ifDescr', index)
+        self.assertEqual(batch.execute(), 3)
+        self.assertEqual(snmp.requests, [4, 4, 2])
+
+    def test_rejected_chunk_is_split_in_halves(self):
+        values = dict((('IF-MIB', 'ifDescr', index), OctetString('port{0}'.format(index))) for index in range(8))
+        snmp = FakeSnmp(values, max_var_binds=2)
+        batch = SnmpPropertyBatch(snmp, FakeLogger(), max_var_binds=8)
+        requests = [batch.get_property('IF-MIB', 'ifDescr', index) for index in range(8)]
+        self.assertEqual(batch.execute(), 7)
+        self.assertEqual(snmp.requests, [8, 4, 2, 2, 4, 2, 2])
+        self.assertEqual([request.value for request in requests], ['port{0}'.format(index) for index in range(8)])
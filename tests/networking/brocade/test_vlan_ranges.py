@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from cloudshell.cli.command_template.command_template_service import add_templates
+from cloudshell.networking.brocade.brocade_connectivity_operations import BrocadeConnectivityOperations, \
+    CLI_MAX_LINE_LENGTH
+from cloudshell.networking.brocade.command_templates.ethernet import ETHERNET_COMMANDS_TEMPLATES
+from cloudshell.networking.brocade.command_templates.vlan import VLAN_COMMANDS_TEMPLATES
+from cloudshell.networking.brocade.vlan_ranges import VlanSet
+
+
+class TestVlanSet(TestCase):
+    def test_parse_merges_overlapping_and_adjacent_ranges(self):
+        vlan_set = VlanSet.parse('30, 10-20,21,25-40, 5')
+        self.assertEqual(vlan_set.intervals, [(5, 5), (10, 21), (25, 40)])
+        self.assertEqual(str(vlan_set), '5,10-21,25-40')
+        self.assertEqual(len(vlan_set), 1 + 12 + 16)
+
+    def test_parse_reversed_range(self):
+        self.assertEqual(VlanSet.parse('20-10').intervals, [(10, 20)])
+
+    def test_parse_wrong_range(self):
+        self.assertRaises(Exception, VlanSet.parse, '10-a')
+        self.assertRaises(Exception, VlanSet.parse, '0-10')
+        self.assertRaises(Exception, VlanSet.parse, '4095')
+
+    def test_union(self):
+        vlan_set = VlanSet.parse('10-20') | VlanSet.parse('21-30,40')
+        self.assertEqual(vlan_set.intervals, [(10, 30), (40, 40)])
+
+    def test_difference(self):
+        vlan_set = VlanSet.parse('1-100') - VlanSet.parse('10-20,50,90-200')
+        self.assertEqual(vlan_set.intervals, [(1, 9), (21, 49), (51, 89)])
+        self.assertFalse(VlanSet.parse('10-20') - VlanSet.parse('1-4094'))
+
+    def test_intersection(self):
+        vlan_set = VlanSet.parse('1-10,20-30') & VlanSet.parse('5-25')
+        self.assertEqual(vlan_set.intervals, [(5, 10), (20, 25)])
+
+    def test_contains(self):
+        vlan_set = VlanSet.parse('10-20')
+        self.assertIn(15, vlan_set)
+        self.assertNotIn(21, vlan_set)
+
+    def test_split_respects_max_length(self):
+        vlan_set = VlanSet.from_ids(range(2, 40, 2))
+        parts = vlan_set.split(10)
+        self.assertTrue(all(len(part) <= 10 for part in parts))
+        self.assertEqual(VlanSet.parse(','.join(parts)), vlan_set)
+
+    def test_split_keeps_long_expression_whole(self):
+        self.assertEqual(VlanSet.parse('1000-2000,3000').split(5), ['1000-2000', '3000'])
+
+
+class TestVlanRangeCommands(TestCase):
+    def setUp(self):
+        add_templates(ETHERNET_COMMANDS_TEMPLATES)
+        add_templates(VLAN_COMMANDS_TEMPLATES)
+
+    def test_commands_fit_cli_line(self):
+        vlan_set = VlanSet.from_ids(range(2, 4000, 3))
+        for template_name in ('trunk_allow_vlan', 'configure_vlan'):
+            commands = BrocadeConnectivityOperations._get_vlan_range_commands(template_name, vlan_set)
+            self.assertTrue(len(commands) > 1)
+            self.assertTrue(all(len(command) <= CLI_MAX_LINE_LENGTH for command in commands))
+            self.assertEqual(VlanSet.parse(','.join(command.split()[-1] for command in commands)), vlan_set)
+
+    def test_short_set_is_single_command(self):
+        self.assertEqual(BrocadeConnectivityOperations._get_vlan_range_commands('trunk_allow_vlan',
+                                                                                VlanSet.parse('10-20,30')),
+                         ['switchport trunk allowed vlan add 10-20,30'])